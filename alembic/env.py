@@ -10,7 +10,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from app.database import Base, get_pg8000_database_url
-from app.models import user, sync_log
+from app.models import user, sync_log, sync_job, worker_heartbeat, webhook_event, import_job
 from app.config import settings
 
 # this is the Alembic Config object, which provides
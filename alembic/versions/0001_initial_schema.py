@@ -0,0 +1,66 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+Tables used to be created only by Base.metadata.create_all() at app startup,
+so existing databases may already have them. This revision creates them only
+when missing, which lets both fresh and existing databases be stamped with
+the same history.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("beag_client_id", sa.Integer(), nullable=True),
+            sa.Column("subscription_status", sa.String(), nullable=True),
+            sa.Column("plan_id", sa.Integer(), nullable=True),
+            sa.Column("start_date", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("end_date", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("my_saas_app_id", sa.String(), nullable=True),
+            sa.Column("last_synced", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_id", "users", ["id"], unique=False)
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+    
+    if "sync_logs" not in existing:
+        op.create_table(
+            "sync_logs",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("users_synced", sa.Integer(), nullable=True),
+            sa.Column("users_failed", sa.Integer(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("error_message", sa.Text(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_sync_logs_id", "sync_logs", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sync_logs_id", table_name="sync_logs")
+    op.drop_table("sync_logs")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,39 @@
+"""Adaptive sync schedule columns on users
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The columns may already exist if create_all() ran against a newer model
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    
+    if "next_sync_at" not in columns:
+        op.add_column("users", sa.Column("next_sync_at", sa.DateTime(timezone=True), nullable=True))
+        op.create_index("ix_users_next_sync_at", "users", ["next_sync_at"], unique=False)
+    if "status_changed_at" not in columns:
+        op.add_column("users", sa.Column("status_changed_at", sa.DateTime(timezone=True), nullable=True))
+    if "status_change_count" not in columns:
+        op.add_column(
+            "users",
+            sa.Column("status_change_count", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "status_change_count")
+    op.drop_column("users", "status_changed_at")
+    op.drop_index("ix_users_next_sync_at", table_name="users")
+    op.drop_column("users", "next_sync_at")
@@ -0,0 +1,29 @@
+"""Subscription fingerprint on users
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The column may already exist if create_all() ran against a newer model
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    
+    if "subscription_fingerprint" not in columns:
+        # Existing rows start as NULL, so their first sync always writes in full
+        op.add_column("users", sa.Column("subscription_fingerprint", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "subscription_fingerprint")
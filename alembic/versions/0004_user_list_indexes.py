@@ -0,0 +1,42 @@
+"""Indexes for the paginated user list filters
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_users_subscription_status_id", ["subscription_status", "id"]),
+    ("ix_users_plan_id_id", ["plan_id", "id"]),
+    ("ix_users_end_date", ["end_date"]),
+    ("ix_users_last_synced", ["last_synced"]),
+]
+
+
+def upgrade() -> None:
+    # The indexes may already exist if create_all() ran against a newer model
+    existing = {i["name"] for i in sa.inspect(op.get_bind()).get_indexes("users")}
+    
+    # CONCURRENTLY keeps the users table writable while the indexes build;
+    # it can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            if name not in existing:
+                op.create_index(name, "users", columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="users", postgresql_concurrently=True)
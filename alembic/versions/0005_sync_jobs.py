@@ -0,0 +1,61 @@
+"""Sync job queue
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The table may already exist if create_all() ran against a newer model
+    if "sync_jobs" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    
+    op.create_table(
+        "sync_jobs",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("batch_id", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), server_default="PENDING", nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_sync_jobs_batch_id", "sync_jobs", ["batch_id"], unique=False)
+    op.create_index(
+        "uq_sync_jobs_active_user", "sync_jobs", ["user_id"], unique=True,
+        postgresql_where=sa.text("status IN ('PENDING', 'RUNNING')")
+    )
+    op.create_index(
+        "ix_sync_jobs_pending_run_at", "sync_jobs", ["run_at"], unique=False,
+        postgresql_where=sa.text("status = 'PENDING'")
+    )
+    op.create_index(
+        "ix_sync_jobs_running_locked_until", "sync_jobs", ["locked_until"], unique=False,
+        postgresql_where=sa.text("status = 'RUNNING'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sync_jobs_running_locked_until", table_name="sync_jobs")
+    op.drop_index("ix_sync_jobs_pending_run_at", table_name="sync_jobs")
+    op.drop_index("uq_sync_jobs_active_user", table_name="sync_jobs")
+    op.drop_index("ix_sync_jobs_batch_id", table_name="sync_jobs")
+    op.drop_table("sync_jobs")
@@ -0,0 +1,55 @@
+"""Sync run telemetry on sync_logs
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+NEW_COLUMNS = [
+    sa.Column("run_type", sa.String(), nullable=True),
+    sa.Column("duration_seconds", sa.Float(), nullable=True),
+    sa.Column("users_per_second", sa.Float(), nullable=True),
+    sa.Column("users_changed", sa.Integer(), nullable=True),
+    sa.Column("users_unchanged", sa.Integer(), nullable=True),
+    sa.Column("beag_retries", sa.Integer(), nullable=True),
+    sa.Column("telemetry", sa.JSON(), nullable=True),
+]
+
+NEW_INDEXES = {
+    "ix_sync_logs_status": ["status"],
+    "ix_sync_logs_run_type": ["run_type"],
+    "ix_sync_logs_started_at": ["started_at"],
+}
+
+
+def upgrade() -> None:
+    # Columns and indexes may already exist if create_all() ran against a newer model
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("sync_logs")}
+    indexes = {i["name"] for i in inspector.get_indexes("sync_logs")}
+    
+    # Older runs keep NULL telemetry
+    for column in NEW_COLUMNS:
+        if column.name not in columns:
+            op.add_column("sync_logs", column)
+    
+    for name, index_columns in NEW_INDEXES.items():
+        if name not in indexes:
+            op.create_index(name, "sync_logs", index_columns, unique=False)
+
+
+def downgrade() -> None:
+    for name in reversed(list(NEW_INDEXES)):
+        op.drop_index(name, table_name="sync_logs")
+    for column in reversed(NEW_COLUMNS):
+        op.drop_column("sync_logs", column.name)
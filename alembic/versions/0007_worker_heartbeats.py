@@ -0,0 +1,40 @@
+"""Worker heartbeats
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The table may already exist if create_all() ran against a newer model
+    if "worker_heartbeats" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    
+    op.create_table(
+        "worker_heartbeats",
+        sa.Column("worker_id", sa.String(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("hostname", sa.String(), nullable=False),
+        sa.Column("pid", sa.Integer(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("last_beat_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("details", sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint("worker_id"),
+    )
+    op.create_index("ix_worker_heartbeats_last_beat_at", "worker_heartbeats", ["last_beat_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_worker_heartbeats_last_beat_at", table_name="worker_heartbeats")
+    op.drop_table("worker_heartbeats")
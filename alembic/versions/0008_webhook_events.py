@@ -0,0 +1,55 @@
+"""Webhook events and users.subscription_event_at
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The column and table may already exist if create_all() ran against a newer model
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("users")}
+    
+    if "subscription_event_at" not in columns:
+        op.add_column("users", sa.Column("subscription_event_at", sa.DateTime(timezone=True), nullable=True))
+    
+    if "webhook_events" in inspector.get_table_names():
+        return
+    
+    op.create_table(
+        "webhook_events",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("event_id", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(), server_default="PENDING", nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("received_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("event_id"),
+    )
+    op.create_index("ix_webhook_events_processed_at", "webhook_events", ["processed_at"], unique=False)
+    op.create_index(
+        "ix_webhook_events_pending_occurred_at", "webhook_events", ["occurred_at"], unique=False,
+        postgresql_where=sa.text("status = 'PENDING'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_webhook_events_pending_occurred_at", table_name="webhook_events")
+    op.drop_index("ix_webhook_events_processed_at", table_name="webhook_events")
+    op.drop_table("webhook_events")
+    op.drop_column("users", "subscription_event_at")
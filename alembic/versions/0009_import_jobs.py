@@ -0,0 +1,48 @@
+"""Import jobs
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The table may already exist if create_all() ran against a newer model
+    if "import_jobs" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    
+    op.create_table(
+        "import_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), server_default="PENDING", nullable=False),
+        sa.Column("emails_received", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("emails_unique", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("emails_invalid", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("invalid_sample", sa.JSON(), nullable=True),
+        sa.Column("users_inserted", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("users_existing", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("users_synced", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("users_failed", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("sync_summary", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_import_jobs_created_at", "import_jobs", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_import_jobs_created_at", table_name="import_jobs")
+    op.drop_table("import_jobs")
@@ -8,8 +8,62 @@ class Settings(BaseSettings):
     beag_api_key: str
     beag_api_url: str = "https://my-saas-basic-api-d5e3hpgdf0gnh2em.eastus-01.azurewebsites.net/api/v1/saas"
     
+    # Beag HTTP client (shared, pooled)
+    beag_http_max_connections: int = 50
+    beag_http_max_keepalive_connections: int = 20
+    beag_http_keepalive_expiry_seconds: float = 30.0
+    beag_http_timeout_seconds: float = 10.0
+    beag_http_connect_timeout_seconds: float = 5.0
+    beag_http_pool_timeout_seconds: float = 10.0
+    beag_http2: bool = False  # Requires the 'h2' package
+    
+    # Beag retries and adaptive (AIMD) concurrency limit
+    beag_max_retries: int = 3
+    beag_retry_backoff_base_seconds: float = 0.5
+    beag_retry_backoff_max_seconds: float = 10.0
+    beag_retry_after_max_seconds: float = 60.0
+    beag_rate_limit_initial: int = 10
+    beag_rate_limit_min: int = 1
+    beag_rate_limit_max: int = 50
+    beag_rate_limit_latency_target_seconds: float = 1.0
+    
+    # Beag circuit breaker
+    beag_breaker_failure_threshold: int = 5  # Consecutive failed calls before opening
+    beag_breaker_recovery_seconds: float = 30.0  # Time open before a trial call
+    beag_breaker_half_open_max_calls: int = 1
+    
+    # Beag lookup cache (in-process, per worker)
+    beag_cache_enabled: bool = True
+    beag_cache_max_size: int = 10000
+    beag_cache_ttl_seconds: float = 60.0  # Subscriptions found
+    beag_cache_negative_ttl_seconds: float = 30.0  # 404 "no subscription" answers
+    
     # Database
     database_url: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_executor_workers: int = 0  # Threads for DB calls from async code (0 = db_pool_size)
+    
+    # Read-through cache for user lookups by email (in-process, per worker)
+    user_cache_enabled: bool = True
+    user_cache_max_size: int = 10000
+    user_cache_ttl_seconds: float = 60.0
+    user_cache_notify: bool = False  # Cross-process invalidation via Postgres LISTEN/NOTIFY
+    user_cache_notify_poll_seconds: float = 1.0
+    
+    # Entitlement checks (GET /api/subscriptions/entitlement/{email}): answers may be
+    # reused by browsers and CDNs for up to this long (less near end_date)
+    entitlement_max_age_seconds: int = 300
+    
+    # Batch subscription lookups (POST /api/subscriptions/batch)
+    batch_lookup_max_emails: int = 1000
+    batch_lookup_concurrency: int = 20  # Beag calls in flight per request, for users not synced locally
+    
+    # Bulk user import (POST /api/users/import)
+    user_import_max_emails: int = 200000
+    
+    # User export (GET /api/users/export): rows fetched and encoded per chunk
+    user_export_chunk_size: int = 5000
     
     # CORS Configuration
     frontend_url: str = "http://localhost:3000"
@@ -17,10 +71,76 @@ class Settings(BaseSettings):
     
     # Server
     port: int = 8000
+    metrics_enabled: bool = True  # Prometheus metrics on GET /metrics
+    worker_metrics_port: int = 0  # worker.py metrics port (consumer N uses port + 1 + N); 0 = off
     environment: str = "development"
     
+    # Logging: written to stdout by a background thread, never on the event loop
+    log_level: str = "INFO"
+    log_format: str = "text"  # text or json
+    log_queue_size: int = 10000  # Records beyond this are dropped instead of blocking
+    sync_log_sample_first: int = 20  # Per-user sync lines logged in full per run...
+    sync_log_sample_every: int = 500  # ...then one in every N (the rest go into the run summary)
+    
+    # Startup: the app serves immediately and warms up in the background; /health/ready
+    # answers 503 until the steps below are done
+    startup_create_schema: bool = True  # Create missing tables (migrations normally already did)
+    startup_warm_connections: int = 2  # DB connections opened ahead of the first requests
+    startup_retry_seconds: float = 2.0  # First retry delay for a failing warm-up step (doubles)
+    startup_ttfb_budget_seconds: float = 10.0  # First response and readiness should land within this
+    
+    # Health endpoints serve a snapshot refreshed in the background instead of probing per request
+    health_probe_interval_seconds: float = 15.0
+    health_probe_timeout_seconds: float = 5.0
+    health_probe_beag: bool = True  # Report Beag as down while its circuit breaker is open
+    worker_heartbeat_seconds: float = 15.0
+    worker_heartbeat_timeout_seconds: float = 60.0  # A worker is considered dead after this long without a beat
+    
+    # Signed subscription webhooks from Beag (POST /api/webhooks/beag). Events are stored
+    # and acknowledged at once, then applied in batches; polling becomes a slower
+    # reconciliation pass
+    beag_webhook_secret: str = ""  # HMAC-SHA256 key shared with Beag; empty disables webhooks
+    beag_webhook_tolerance_seconds: int = 300  # Reject signatures older than this (replays)
+    beag_webhook_max_events: int = 1000  # Events accepted per request
+    beag_webhook_batch_size: int = 500  # Events applied per transaction
+    beag_webhook_poll_seconds: float = 5.0  # Check for events received by other processes this often
+    beag_webhook_retention_hours: int = 72  # Processed events are kept this long (for de-duplication)
+    sync_webhook_interval_multiplier: float = 4.0  # Polling intervals are this many times longer with webhooks on
+    
     # Worker Configuration
     sync_interval_hours: int = 6
+    sync_concurrency: int = 10  # Max concurrent Beag lookups during a sync
+    sync_batch_size: int = 200  # Users written back per UPDATE during a sync
+    sync_page_size: int = 1000  # Users read per keyset page during a sync
+    
+    # Only the process holding a Postgres advisory lock runs the periodic sweep
+    sync_leader_election: bool = True
+    sync_leader_check_seconds: float = 10.0  # How often standbys try to take over
+    
+    # Durable job queue: sweeps queue one job per user in Postgres and worker.py
+    # consumer processes sync them (otherwise sweeps run in-process)
+    sync_queue_enabled: bool = False
+    sync_queue_consumers: int = 2  # Consumer processes started by worker.py
+    sync_queue_poll_seconds: float = 2.0  # Idle wait when there is nothing to claim
+    sync_job_visibility_timeout_seconds: float = 300.0  # Claimed jobs return to the queue after this
+    sync_job_max_attempts: int = 5
+    sync_job_retry_base_seconds: float = 30.0
+    sync_job_retry_max_seconds: float = 3600.0
+    sync_job_retention_hours: int = 24  # Finished jobs are kept this long
+    
+    # Adaptive scheduling: each user gets its own next check time instead of
+    # every user being re-fetched every sync_interval_hours
+    sync_adaptive: bool = True
+    sync_poll_minutes: int = 5  # How often the worker looks for users that are due
+    sync_min_interval_minutes: int = 30
+    sync_max_interval_hours: int = 48
+    sync_inactive_interval_multiplier: float = 4.0
+    sync_expiry_grace_minutes: int = 15
+    sync_expiry_watch_hours: int = 48
+    
+    @property
+    def webhooks_enabled(self) -> bool:
+        return bool(self.beag_webhook_secret)
     
     @property
     def cors_origins(self) -> List[str]:
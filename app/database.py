@@ -1,7 +1,16 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.config import settings
+from app.metrics import DB_POOL_CHECKOUT_WAIT
 
 
 def get_pg8000_database_url(database_url: str) -> str:
@@ -14,13 +23,30 @@ def get_pg8000_database_url(database_url: str) -> str:
     return database_url
 
 
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+# Connections held for minutes or for the life of the process, on top of
+# DB_POOL_SIZE: the sweep leader's advisory lock, the sync run lock and the
+# user cache invalidation listener
+DEDICATED_CONNECTIONS = 3
+
 # Create engine for PostgreSQL with pg8000 driver
 database_url = get_pg8000_database_url(settings.database_url)
 engine = create_engine(
     database_url,
+    poolclass=InstrumentedQueuePool,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=settings.db_pool_size + DEDICATED_CONNECTIONS,
+    max_overflow=settings.db_max_overflow
 )
 
 # Create SessionLocal class
@@ -30,6 +56,72 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# Blocking SQLAlchemy/pg8000 calls made from async code run on this pool so
+# they never stall the event loop. Sized to the connection pool by default:
+# more threads than connections would only queue on pool checkout.
+db_executor = ThreadPoolExecutor(
+    max_workers=settings.db_executor_workers or settings.db_pool_size,
+    thread_name_prefix="db"
+)
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Run blocking database work on the DB thread pool and await the result
+    
+    A Session may be passed between calls as long as they are awaited one at a time.
+    Context variables (like the request ID in log records) carry over to the thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(db_executor, functools.partial(context.run, fn, *args, **kwargs))
+
+
+class DedicatedConnection:
+    """
+    A raw connection owned by one background task, used from async code
+    
+    Calls run on the DB executor one at a time. If the task is cancelled while a
+    call is in flight, that call keeps the connection on its thread: close()
+    waits for it before invalidating the connection (on the executor too), so
+    the driver is never used from two threads at once. Invalidating rather than
+    returning it to the pool drops any session state, like locks or LISTEN.
+    """
+    
+    def __init__(self):
+        self.conn = None
+        self._pending: Optional[concurrent.futures.Future] = None
+    
+    async def call(self, fn, *args):
+        self._pending = db_executor.submit(fn, *args)
+        return await asyncio.wrap_future(self._pending)
+    
+    async def open(self, setup=None):
+        """Check out a connection, then run `setup(conn)` on it"""
+        def connect():
+            conn = engine.raw_connection()
+            try:
+                if setup is not None:
+                    setup(conn)
+            except Exception:
+                conn.invalidate()
+                raise
+            return conn
+        self.conn = await self.call(connect)
+        return self.conn
+    
+    async def close(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None and not pending.done():
+            await asyncio.wait([asyncio.wrap_future(pending)])
+        conn, self.conn = self.conn, None
+        if conn is None and pending is not None and not pending.cancelled() and pending.exception() is None:
+            # Cancelled while connecting, after the connection was made
+            conn = pending.result()
+        if conn is not None:
+            await asyncio.get_running_loop().run_in_executor(db_executor, conn.invalidate)
+
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,146 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from app.config import settings
+from app.metrics import LOG_RECORDS_DROPPED
+
+# Correlation ID of the request being handled (set by RequestIdMiddleware)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+# Loggers uvicorn configures with their own synchronous handlers
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_listener: Optional[QueueListener] = None
+
+_exception_formatter = logging.Formatter()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps each record with the current request's correlation ID, in the thread that logged it"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed with `extra=` are included as keys"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if getattr(record, "request_id", "-") != "-":
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text or record.exc_info:
+            entry["exception"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread with only the message interpolated
+    
+    The stock QueueHandler runs the full formatter before queueing, which puts
+    the formatting cost back on the caller; here only `msg % args` (and any
+    traceback) is rendered up front, so arguments the caller mutates afterwards
+    can't change the line, and the formatter runs in the listener thread.
+    When the queue is full the record is dropped (and counted) rather than
+    blocking the event loop.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def setup_logging(level: Optional[str] = None) -> None:
+    """
+    Route all logging through a bounded queue to a stdout writer thread
+    
+    LOG_FORMAT is "text" (readable, with the request ID) or "json" (one object
+    per line). Safe to call more than once; later calls replace the handlers.
+    """
+    _flush_logs()
+    global _listener
+    
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.log_format.lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    
+    records = queue.Queue(maxsize=settings.log_queue_size)
+    queue_handler = NonBlockingQueueHandler(records)
+    queue_handler.addFilter(RequestIdFilter())
+    
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel((level or settings.log_level).upper())
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+    
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+
+
+@atexit.register
+def _flush_logs() -> None:
+    # Drains the queue so the last records before exit are written
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class LogSampler:
+    """
+    Decides which of many similar per-item log lines to emit
+    
+    The first `first` calls to allow() return True, then one in every `every`.
+    Everything else is only counted in `suppressed`, for a summary line at the end.
+    """
+    
+    def __init__(self, first: int, every: int):
+        self.first = first
+        self.every = max(1, every)
+        self.seen = 0
+        self.suppressed = 0
+    
+    def allow(self) -> bool:
+        self.seen += 1
+        if self.seen <= self.first or (self.seen - self.first) % self.every == 0:
+            return True
+        self.suppressed += 1
+        return False
@@ -1,43 +1,33 @@
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.config import settings
-from app.database import engine, Base
-from app.routers import users, subscriptions, health
-from app.services.sync_service import SubscriptionSyncService
+from app.logging_config import setup_logging
+from app.metrics import event_loop_lag_monitor, mark_process_dead, render_latest
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.request_id import RequestIdMiddleware
+from app.middleware.startup import FirstResponseMiddleware
+from app.routers import users, subscriptions, health, sync, webhooks
+from app.services.coordination import run_scheduled_sweep, run_sweep, sweep_leader
+from app.services.health_probe import health_prober
+from app.services.heartbeat import HeartbeatReporter
+from app.services.http_client import close_http_client
+from app.services.startup import startup_warmup
+from app.services.user_cache import invalidation_listener
+from app.services.webhooks import webhook_processor
+from app.services.beag_client import get_circuit_breaker_stats
+from app.services.scheduler import worker_interval_seconds, describe_worker_interval
 import logging
 import asyncio
-from datetime import datetime
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (queued, written off the event loop)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+router = APIRouter()
 
-# Create FastAPI app
-app = FastAPI(
-    title="Beag Boilerplate Backend",
-    description="Backend API for Beag.io SaaS boilerplate",
-    version="1.0.0"
-)
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(users.router)
-app.include_router(subscriptions.router)
-app.include_router(health.router)
-
-
-@app.get("/")
+@router.get("/")
 async def root():
     return {
         "message": "Beag Boilerplate Backend API",
@@ -46,23 +36,54 @@ async def root():
     }
 
 
-@app.get("/health")
+@router.get("/health")
 async def health_check():
+    """Cheap status from cached state; `workers_alive` counts sync workers with a recent heartbeat, cluster-wide"""
+    workers_alive = health_prober.workers_alive()
     return {
         "status": "healthy",
         "environment": settings.environment,
-        "worker_running": not should_stop_worker
+        "ready": startup_warmup.ready,
+        "worker_running": sum(workers_alive.values()) > 0,
+        "workers_alive": workers_alive,
+        "sweep_leader": sweep_leader.is_leader,
+        "beag_circuit_breaker": get_circuit_breaker_stats()["state"]
     }
 
 
-@app.post("/sync-now")
+@router.get("/health/live")
+async def liveness():
+    """Liveness: the process is up and its event loop responds (no dependencies checked)"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """Readiness: 200 once startup warm-up is done, 503 (with its progress) until then"""
+    snapshot = startup_warmup.snapshot()
+    return JSONResponse(
+        {"status": "ready" if snapshot["ready"] else "starting", **snapshot},
+        status_code=200 if snapshot["ready"] else 503
+    )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this process"""
+    if not settings.metrics_enabled:
+        return Response(status_code=404)
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+@router.post("/sync-now")
 async def manual_sync():
     """Trigger an immediate subscription sync"""
     try:
         result = await sync_subscriptions()
         return {
             "status": "success",
-            "message": "Subscription sync completed",
+            "message": "Joined the subscription sync already in progress" if result.get("joined") else "Subscription sync completed",
             "result": result
         }
     except Exception as e:
@@ -77,30 +98,35 @@ async def manual_sync():
 background_task = None
 should_stop_worker = False
 
+# Beats only while the background worker task is alive
+worker_heartbeat = HeartbeatReporter("api", is_alive=lambda: background_task is not None and not background_task.done())
+
 
 async def sync_subscriptions():
-    """Sync all user subscriptions with Beag API"""
-    sync_service = SubscriptionSyncService()
-    result = await sync_service.sync_all_users()
-    return result
+    """Sync all user subscriptions with Beag API, joining a sync already in progress"""
+    return await run_sweep(full=True)
 
 
 async def background_worker():
-    """Background worker that runs subscription sync every SYNC_INTERVAL_HOURS"""
-    logger.info(f"Starting background subscription sync worker (interval: {settings.sync_interval_hours} hours)")
+    """
+    Background worker that syncs due users every SYNC_POLL_MINUTES (or everyone every SYNC_INTERVAL_HOURS)
+    
+    Runs in every process, but only the elected sweep leader actually syncs
+    """
+    logger.info(f"Starting background subscription sync worker ({describe_worker_interval()})")
     
     while not should_stop_worker:
-        logger.info(f"Starting subscription sync at {datetime.now()}")
-        
         try:
-            result = await sync_subscriptions()
-            logger.info(f"Subscription sync completed: {result}")
+            result = await run_scheduled_sweep()
+            worker_heartbeat.record_pass(result.get("status"))
+            if result.get("status") != "SKIPPED":
+                logger.info(f"Subscription sync completed: {result}")
         except Exception as e:
             logger.error(f"Error during sync: {str(e)}")
+            worker_heartbeat.record_pass("ERROR")
         
-        # Wait for next sync interval (check should_stop_worker every 60 seconds)
-        sleep_seconds = settings.sync_interval_hours * 3600
-        logger.info(f"Next sync in {settings.sync_interval_hours} hours")
+        # Wait for next sync pass (check should_stop_worker every 60 seconds)
+        sleep_seconds = worker_interval_seconds()
         
         # Sleep in chunks so we can check should_stop_worker periodically
         total_sleep = 0
@@ -111,22 +137,45 @@ async def background_worker():
     logger.info("Background worker stopped")
 
 
-@app.on_event("startup")
-async def startup_event():
+async def start_background_tasks():
+    """Start everything that needs the database, once warm-up has made it reachable"""
     global background_task
-    logger.info(f"Starting Beag Boilerplate Backend in {settings.environment} mode")
-    logger.info(f"CORS origins: {settings.cors_origins}")
+    if settings.user_cache_notify:
+        invalidation_listener.start()
+    
+    # Apply stored webhook events (any process can; claims don't overlap)
+    if settings.webhooks_enabled:
+        webhook_processor.start()
     
-    # Start background worker
+    # Compete for ownership of the periodic sweep, then start the background worker
+    sweep_leader.start()
     background_task = asyncio.create_task(background_worker())
+    worker_heartbeat.start()
     logger.info("Background worker started")
 
 
-@app.on_event("shutdown")
+async def startup_event():
+    logger.info(f"Starting Beag Boilerplate Backend in {settings.environment} mode")
+    logger.info(f"CORS origins: {settings.cors_origins}")
+    
+    if settings.metrics_enabled:
+        event_loop_lag_monitor.start()
+    
+    # Health endpoints serve what this finds; it reports the database as down until warm-up gets there
+    health_prober.start()
+    
+    # Returns at once so uvicorn binds the port; schema check, pool and HTTP client
+    # warm up in the background and /health/ready reports when they are done
+    startup_warmup.start(on_ready=start_background_tasks)
+
+
 async def shutdown_event():
     global should_stop_worker, background_task
     logger.info("Shutting down Beag Boilerplate Backend")
     
+    await startup_warmup.stop()
+    await health_prober.stop()
+    
     # Stop background worker gracefully
     should_stop_worker = True
     if background_task:
@@ -135,4 +184,56 @@ async def shutdown_event():
         try:
             await background_task
         except asyncio.CancelledError:
-            logger.info("Background worker cancelled")
\ No newline at end of file
+            logger.info("Background worker cancelled")
+    
+    await worker_heartbeat.stop()
+    await webhook_processor.stop()
+    await sweep_leader.stop()
+    await invalidation_listener.stop()
+    await event_loop_lag_monitor.stop()
+    await close_http_client()
+    mark_process_dead()
+
+
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI app
+    
+    Does no I/O: the database is first touched by the background warm-up started
+    on startup, so importing this module and binding the port never wait on it.
+    """
+    app = FastAPI(
+        title="Beag Boilerplate Backend",
+        description="Backend API for Beag.io SaaS boilerplate",
+        version="1.0.0"
+    )
+    
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Request-ID", "ETag"],
+    )
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+    app.add_middleware(FirstResponseMiddleware)
+    # Outermost, so all other middleware and handlers log with the request ID
+    app.add_middleware(RequestIdMiddleware)
+    
+    # Include routers
+    app.include_router(router)
+    app.include_router(users.router)
+    app.include_router(subscriptions.router)
+    app.include_router(health.router)
+    app.include_router(sync.router)
+    app.include_router(webhooks.router)
+    
+    app.add_event_handler("startup", startup_event)
+    app.add_event_handler("shutdown", shutdown_event)
+    return app
+
+
+app = create_app()
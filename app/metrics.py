@@ -0,0 +1,199 @@
+import asyncio
+import os
+import time
+from typing import Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server
+)
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+import logging
+
+logger = logging.getLogger(__name__)
+
+# prometheus_client's own switch for multiprocess mode, read when it is imported: with
+# several processes behind one scrape target (uvicorn --workers N), each one writes its
+# values to files in this directory and /metrics adds them all up
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Everything below is updated in place on the hot path (a dict lookup and an
+# atomic add) or read from existing stats at scrape time, so it stays on in production
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status_code"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being handled", multiprocess_mode="livesum")
+
+BEAG_REQUEST_DURATION = Histogram(
+    "beag_request_duration_seconds",
+    "Latency of individual Beag API calls (each retry counts separately)",
+    ["endpoint"]
+)
+BEAG_RESPONSES = Counter(
+    "beag_responses_total",
+    "Beag API call outcomes by HTTP status code ('error' for timeouts and connection errors)",
+    ["endpoint", "status_code"]
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent getting a connection from the SQLAlchemy pool (including opening new ones)",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+)
+
+SYNC_USERS = Counter("sync_users_total", "Users processed by syncs", ["outcome"])
+SYNC_LOOKUPS_IN_FLIGHT = Gauge("sync_beag_lookups_in_flight", "Beag lookups in flight for syncs", multiprocess_mode="livesum")
+SYNC_RUNS = Counter("sync_runs_total", "Completed sync sweeps by final status", ["status"])
+SYNC_RUN_DURATION = Histogram(
+    "sync_run_duration_seconds",
+    "Duration of sync sweeps",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+)
+SYNC_JOBS = Counter("sync_jobs_total", "Sync queue jobs processed by this consumer", ["outcome"])
+
+WEBHOOK_EVENTS = Counter(
+    "beag_webhook_events_total",
+    "Beag webhook events by outcome (received, duplicate, rejected, then applied, unchanged, stale, ignored, failed)",
+    ["outcome"]
+)
+WEBHOOK_APPLY_LAG = Histogram(
+    "beag_webhook_apply_lag_seconds",
+    "Time from a subscription change at Beag to it being applied to the user",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+)
+
+STARTUP_SECONDS = Gauge(
+    "app_startup_seconds",
+    "Seconds from process start to each startup milestone (serving, first_response, ready)",
+    ["milestone"],
+    multiprocess_mode="liveall"
+)
+
+HEALTH_PROBE_UP = Gauge("health_probe_up", "1 if the last background health probe succeeded", ["probe"], multiprocess_mode="livemin")
+HEALTH_PROBE_LATENCY = Gauge("health_probe_latency_seconds", "Duration of the last background health probe", ["probe"], multiprocess_mode="livemax")
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the logging queue was full")
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke up a sleeping probe task",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+class _StateCollector:
+    """Exposes pool and Beag client state that is already tracked elsewhere, read at scrape time"""
+    
+    def describe(self):
+        # Keeps register() from calling collect() at import time
+        return []
+    
+    def collect(self):
+        # Imported here: app.database itself imports this module
+        from app.database import engine
+        from app.services.beag_client import (
+            get_cache_stats,
+            get_circuit_breaker_stats,
+            get_rate_limiter_stats
+        )
+        
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            yield GaugeMetricFamily("db_pool_size", "Configured pool size", value=pool.size())
+            yield GaugeMetricFamily("db_pool_checked_out", "Connections currently checked out", value=pool.checkedout())
+            yield GaugeMetricFamily("db_pool_checked_in", "Idle connections in the pool", value=pool.checkedin())
+            yield GaugeMetricFamily("db_pool_overflow", "Connections open beyond the pool size", value=max(0, pool.overflow()))
+        
+        cache = get_cache_stats()
+        yield GaugeMetricFamily("beag_cache_size", "Entries in the Beag lookup cache", value=cache["size"])
+        lookups = CounterMetricFamily("beag_cache_lookups", "Beag lookup cache results", labels=["result"])
+        for result in ("hits", "misses", "coalesced"):
+            lookups.add_metric([result], cache[result])
+        yield lookups
+        
+        limiter = get_rate_limiter_stats()
+        yield GaugeMetricFamily("beag_concurrency_limit", "Current adaptive concurrency limit for Beag", value=limiter["limit"])
+        yield GaugeMetricFamily("beag_requests_in_flight", "Beag requests holding a concurrency slot", value=limiter["in_flight"])
+        yield CounterMetricFamily("beag_retries", "Beag call retries", value=limiter["retries"])
+        yield CounterMetricFamily("beag_unavailable", "Lookups that gave up with Beag unavailable", value=limiter["unavailable"])
+        
+        breaker = get_circuit_breaker_stats()
+        state = GaugeMetricFamily("beag_circuit_breaker_state", "1 for the breaker's current state", labels=["state"])
+        for name in ("closed", "open", "half_open"):
+            state.add_metric([name], 1 if breaker["state"] == name else 0)
+        yield state
+        yield CounterMetricFamily("beag_circuit_breaker_rejected", "Calls rejected by the open breaker", value=breaker["rejected_calls"])
+
+
+REGISTRY.register(_StateCollector())
+
+
+def _exposition_registry() -> CollectorRegistry:
+    """
+    Registry that scrapes are answered from
+    
+    In multiprocess mode that's the sum over every process's files. The state read
+    at scrape time (pool, Beag cache, limiter and breaker) can't be shared that way,
+    so it comes from whichever process answers.
+    """
+    if not MULTIPROCESS_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_StateCollector())
+    return registry
+
+
+def render_latest():
+    """Current metrics in the Prometheus text format, with their content type"""
+    return generate_latest(_exposition_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve /metrics on its own port (for processes without the API, like worker.py)"""
+    start_http_server(port, registry=_exposition_registry())
+    logger.info(f"📈 Serving metrics on port {port}")
+
+
+def mark_process_dead() -> None:
+    """On shutdown in multiprocess mode, drop this process's live gauges from the totals"""
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class EventLoopLagMonitor:
+    """Sleeps for a fixed interval in a loop and records how late each wake-up was"""
+    
+    def __init__(self, interval_seconds: float = 0.5):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval_seconds)
+            EVENT_LOOP_LAG.observe(max(0.0, time.monotonic() - started - self.interval_seconds))
+
+
+event_loop_lag_monitor = EventLoopLagMonitor()
@@ -0,0 +1,44 @@
+import re
+import uuid
+from app.logging_config import request_id_var
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Incoming IDs are reused only if they look like IDs (no log injection, bounded length)
+_VALID_REQUEST_ID = re.compile(rb"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestIdMiddleware:
+    """
+    Gives every request a correlation ID, echoed in the X-Request-ID response header
+    
+    A well-formed X-Request-ID from the caller (e.g. a load balancer) is kept,
+    otherwise a new one is generated. Every log record written while handling
+    the request carries it.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER and _VALID_REQUEST_ID.match(value):
+                request_id = value.decode()
+                break
+        request_id = request_id or uuid.uuid4().hex
+        
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode())]
+            await send(message)
+        
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
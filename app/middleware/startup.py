@@ -0,0 +1,22 @@
+from app.services.startup import startup_warmup
+
+
+class FirstResponseMiddleware:
+    """Records when the process sent its first response (time to first byte after a cold start)"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.seen = False
+    
+    async def __call__(self, scope, receive, send):
+        if self.seen or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_first(message):
+            if message["type"] == "http.response.start" and not self.seen:
+                self.seen = True
+                startup_warmup.record_milestone("first_response")
+            await send(message)
+        
+        await self.app(scope, receive, send_first)
@@ -1,4 +1,8 @@
 from .user import User
 from .sync_log import SyncLog
+from .sync_job import SyncJob
+from .worker_heartbeat import WorkerHeartbeat
+from .webhook_event import WebhookEvent
+from .import_job import ImportJob
 
-__all__ = ["User", "SyncLog"]
\ No newline at end of file
+__all__ = ["User", "SyncLog", "SyncJob", "WorkerHeartbeat", "WebhookEvent", "ImportJob"]
\ No newline at end of file
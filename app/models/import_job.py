@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, Integer, JSON, String, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ImportJob(Base):
+    """Progress of one bulk user import and the sync of its new users, readable from any process"""
+    __tablename__ = "import_jobs"
+    
+    id = Column(String, primary_key=True)  # Job handle returned by POST /api/users/import
+    status = Column(String, nullable=False, default="PENDING", server_default="PENDING")  # PENDING, RUNNING, QUEUED, SUCCESS, PARTIAL, FAILED
+    emails_received = Column(Integer, nullable=False, default=0, server_default="0")
+    emails_unique = Column(Integer, nullable=False, default=0, server_default="0")
+    emails_invalid = Column(Integer, nullable=False, default=0, server_default="0")
+    invalid_sample = Column(JSON, nullable=True)  # First few rejected emails
+    users_inserted = Column(Integer, nullable=False, default=0, server_default="0")
+    users_existing = Column(Integer, nullable=False, default=0, server_default="0")
+    users_synced = Column(Integer, nullable=False, default=0, server_default="0")
+    users_failed = Column(Integer, nullable=False, default=0, server_default="0")
+    sync_summary = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SyncJob(Base):
+    """One user's subscription sync, queued for the worker consumers"""
+    __tablename__ = "sync_jobs"
+    __table_args__ = (
+        # At most one queued or running job per user; enqueueing again is a no-op
+        Index(
+            "uq_sync_jobs_active_user", "user_id", unique=True,
+            postgresql_where=text("status IN ('PENDING', 'RUNNING')")
+        ),
+        # Claim order for pending jobs and lookup of expired running ones
+        Index("ix_sync_jobs_pending_run_at", "run_at", postgresql_where=text("status = 'PENDING'")),
+        Index("ix_sync_jobs_running_locked_until", "locked_until", postgresql_where=text("status = 'RUNNING'")),
+    )
+    
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    batch_id = Column(String, nullable=True, index=True)  # Sweep or import that queued the job
+    status = Column(String, nullable=False, default="PENDING", server_default="PENDING")  # PENDING, RUNNING, DONE, FAILED
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # Not claimable before this
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # Visibility timeout of a running job
+    locked_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, JSON
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -7,9 +7,18 @@ class SyncLog(Base):
     __tablename__ = "sync_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     users_synced = Column(Integer, default=0)
     users_failed = Column(Integer, default=0)
-    status = Column(String, nullable=False)  # SUCCESS, PARTIAL, FAILED
-    error_message = Column(Text, nullable=True)
\ No newline at end of file
+    status = Column(String, nullable=False, index=True)  # SUCCESS, PARTIAL, FAILED
+    error_message = Column(Text, nullable=True)
+    
+    # Run telemetry
+    run_type = Column(String, nullable=True, index=True)  # full, due, users
+    duration_seconds = Column(Float, nullable=True)
+    users_per_second = Column(Float, nullable=True)
+    users_changed = Column(Integer, nullable=True)
+    users_unchanged = Column(Integer, nullable=True)
+    beag_retries = Column(Integer, nullable=True)
+    telemetry = Column(JSON, nullable=True)  # Phase timings, Beag latency percentiles, top errors
\ No newline at end of file
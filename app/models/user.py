@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Filters of the paginated user list; the id suffix serves its keyset order
+        Index("ix_users_subscription_status_id", "subscription_status", "id"),
+        Index("ix_users_plan_id_id", "plan_id", "id"),
+        Index("ix_users_end_date", "end_date"),
+        Index("ix_users_last_synced", "last_synced"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -16,8 +23,13 @@ class User(Base):
     start_date = Column(DateTime(timezone=True), nullable=True)
     end_date = Column(DateTime(timezone=True), nullable=True)
     my_saas_app_id = Column(String, nullable=True)
+    subscription_fingerprint = Column(String, nullable=True)  # Hash of the fields above, NULL = never synced
+    subscription_event_at = Column(DateTime(timezone=True), nullable=True)  # Time of the newest webhook event applied
     
     # Tracking
     last_synced = Column(DateTime(timezone=True), nullable=True)
+    next_sync_at = Column(DateTime(timezone=True), nullable=True, index=True)  # NULL = due now
+    status_changed_at = Column(DateTime(timezone=True), nullable=True)
+    status_change_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
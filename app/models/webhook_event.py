@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, JSON, String, Text, text
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class WebhookEvent(Base):
+    """A subscription event pushed by Beag, stored on receipt and applied to users in batches"""
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        # Apply order for pending events
+        Index("ix_webhook_events_pending_occurred_at", "occurred_at", postgresql_where=text("status = 'PENDING'")),
+    )
+    
+    id = Column(BigInteger, primary_key=True)
+    event_id = Column(String, unique=True, nullable=False)  # Beag's ID; redeliveries are ignored
+    email = Column(String, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)  # When the change happened at Beag
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="PENDING", server_default="PENDING")  # PENDING, APPLIED, UNCHANGED, STALE, IGNORED, FAILED
+    error = Column(Text, nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True, index=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer, JSON, String
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class WorkerHeartbeat(Base):
+    """Last sign of life from a sync worker process (API background worker, worker.py, queue consumer)"""
+    __tablename__ = "worker_heartbeats"
+    
+    worker_id = Column(String, primary_key=True)  # host-pid-kind
+    kind = Column(String, nullable=False)  # api, worker, consumer
+    hostname = Column(String, nullable=False)
+    pid = Column(Integer, nullable=False)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_beat_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+    details = Column(JSON, nullable=True)  # Last pass time and result
@@ -1,18 +1,25 @@
 import os
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from app.database import get_db
+from fastapi import APIRouter
 from app.config import settings
+from app.services.beag_client import get_cache_stats, get_circuit_breaker_stats, get_rate_limiter_stats
+from app.services.coordination import get_coordination_stats
+from app.services.health_probe import health_prober
+from app.services.startup import startup_warmup
 
 router = APIRouter(
     prefix="/api/health",
     tags=["health"]
 )
 
+
 @router.get("/")
-async def health_check(db: Session = Depends(get_db)):
-    """Comprehensive health check with environment validation"""
+async def health_check():
+    """
+    Comprehensive health check with environment validation
+    
+    Served from the background prober's latest snapshot: no database or Beag
+    calls per request. `probe.age_seconds` says how old the results are.
+    """
     
     # Check required environment variables through settings
     env_checks = {
@@ -20,33 +27,41 @@ async def health_check(db: Session = Depends(get_db)):
         "DATABASE_URL": bool(settings.database_url)
     }
     
-    # Check database connectivity
-    db_connected = False
-    try:
-        db.execute(text("SELECT 1"))
-        db_connected = True
-    except Exception:
-        db_connected = False
+    # Database connectivity, as last probed
+    snapshot = health_prober.snapshot()
+    database = health_prober.probe("database")
+    db_connected = database["ok"]
     
     # Calculate overall health
     env_healthy = all(env_checks.values())
-    overall_health = env_healthy and db_connected
+    overall_health = env_healthy and db_connected and not snapshot["stale"]
     
     return {
         "status": "healthy" if overall_health else "unhealthy",
         "database": {
-            "connected": db_connected
+            "connected": db_connected,
+            "latency_ms": database.get("latency_ms"),
+            "error": database.get("error")
         },
         "environment": {
             "configured": env_healthy,
             "variables": env_checks
         },
-        "setup_complete": overall_health
+        "setup_complete": overall_health,
+        "probe": {key: snapshot[key] for key in ("checked_at", "age_seconds", "interval_seconds", "stale")},
+        "beag": health_prober.probe("beag") if settings.health_probe_beag else None,
+        "workers": health_prober.probe("workers"),
+        "startup": startup_warmup.snapshot(),
+        "beag_circuit_breaker": get_circuit_breaker_stats(),
+        "beag_cache": get_cache_stats(),
+        "beag_rate_limiter": get_rate_limiter_stats(),
+        "sync_coordination": get_coordination_stats(),
+        "sync_queue": health_prober.probe("sync_queue") if settings.sync_queue_enabled else None
     }
 
 @router.get("/setup-status")
-async def get_setup_status(db: Session = Depends(get_db)):
-    """Detailed setup status for dashboard progress tracking"""
+async def get_setup_status():
+    """Detailed setup status for dashboard progress tracking (from the cached health snapshot)"""
     
     # Backend environment checks through settings
     backend_env = {
@@ -54,13 +69,8 @@ async def get_setup_status(db: Session = Depends(get_db)):
         "DATABASE_URL": bool(settings.database_url)
     }
     
-    # Database connectivity
-    db_connected = False
-    try:
-        db.execute(text("SELECT 1"))
-        db_connected = True
-    except Exception:
-        db_connected = False
+    # Database connectivity, as last probed
+    db_connected = health_prober.probe("database")["ok"]
     
     # Calculate progress percentages
     backend_progress = sum(backend_env.values()) / len(backend_env) * 100
@@ -76,5 +86,9 @@ async def get_setup_status(db: Session = Depends(get_db)):
             "connected": db_connected,
             "progress": database_progress
         },
+        "beag": {
+            "circuit_breaker": get_circuit_breaker_stats()["state"]
+        },
+        "probe_age_seconds": health_prober.snapshot()["age_seconds"],
         "overall_progress": (backend_progress + database_progress) / 2
     }
\ No newline at end of file
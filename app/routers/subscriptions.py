@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.user import User
-from app.schemas.subscription import SubscriptionResponse
-from app.services.beag_client import BeagClient
+from app.config import settings
+from app.database import get_db, run_db
+from app.schemas.subscription import BatchLookupRequest, SubscriptionResponse
+from app.services.beag_client import BeagClient, BeagUnavailableError
+from app.services.entitlements import entitlement_body, etag_matches, evaluate_entitlement, lookup_user
+from app.services import batch_lookup, user_cache
 
 router = APIRouter(
     prefix="/api/subscriptions",
@@ -11,14 +16,38 @@ router = APIRouter(
 )
 
 
+def _cached_subscription(user: dict) -> dict:
+    return {
+        "email": user["email"],
+        "status": user["subscription_status"],
+        "plan_id": user["plan_id"],
+        "start_date": user["start_date"],
+        "end_date": user["end_date"],
+        "last_synced": user["last_synced"]
+    }
+
+
 @router.get("/check/{email}", response_model=SubscriptionResponse)
-async def check_subscription(email: str):
+async def check_subscription(email: str, fresh: bool = False, db: Session = Depends(get_db)):
     """
     Check subscription status directly from Beag API
-    This endpoint bypasses the local cache and gets real-time data
+    This endpoint bypasses the local database. Beag answers are cached in-process
+    for a short TTL; pass ?fresh=true to always get real-time data
+    
+    If Beag is unavailable (or its circuit breaker is open), the locally synced
+    subscription is returned instead, flagged with "stale": true
     """
     beag_client = BeagClient()
-    subscription = await beag_client.get_subscription_by_email(email)
+    try:
+        subscription = await beag_client.get_subscription_by_email(email, fresh=fresh)
+    except BeagUnavailableError:
+        user = await run_db(user_cache.get_user, db, email)
+        if not user or not user["subscription_status"]:
+            raise HTTPException(status_code=503, detail="Subscription service temporarily unavailable")
+        return JSONResponse(
+            content=jsonable_encoder({**_cached_subscription(user), "stale": True, "source": "local"}),
+            headers={"Warning": '110 - "Response is Stale"'}
+        )
     
     if not subscription:
         raise HTTPException(status_code=404, detail="No active subscription found")
@@ -32,22 +61,63 @@ def get_cached_subscription(email: str, db: Session = Depends(get_db)):
     Get subscription status from local database (cached data)
     This is faster but may be up to 6 hours old
     """
-    user = db.query(User).filter(User.email == email).first()
+    user = user_cache.get_user(db, email)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    if not user.subscription_status:
+    if not user["subscription_status"]:
         raise HTTPException(status_code=404, detail="No subscription data available")
     
-    return {
-        "email": user.email,
-        "status": user.subscription_status,
-        "plan_id": user.plan_id,
-        "start_date": user.start_date,
-        "end_date": user.end_date,
-        "last_synced": user.last_synced
+    return _cached_subscription(user)
+
+
+@router.post("/batch")
+async def batch_subscription_lookup(request: BatchLookupRequest):
+    """
+    Subscription status of many users in one request, streamed as NDJSON
+    
+    Emails are deduped and each gets one line, in the order the answers are
+    ready. Users synced before are answered from the local database in a single
+    query (`"source": "local"`); the rest are looked up in Beag concurrently
+    (`"source": "beag"`). `source` can force "local" (never call Beag) or
+    "beag" (skip the local rows). A failed lookup gets a line with "error".
+    """
+    if len(request.emails) > settings.batch_lookup_max_emails:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many emails ({len(request.emails)}), the limit is {settings.batch_lookup_max_emails} per request"
+        )
+    
+    async def ndjson():
+        async for lines in batch_lookup.lookup(request.emails, request.source, request.fresh):
+            yield "".join(json.dumps(jsonable_encoder(line)) + "\n" for line in lines)
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/entitlement/{email}")
+async def get_entitlement(email: str, request: Request):
+    """
+    Compact access check for gating features: active or not, plan and expiry
+    
+    Computed from the locally synced row, from the in-process user cache when
+    possible. Responses carry a strong ETag and a Cache-Control max-age that
+    never runs past the subscription's end; send the ETag back in If-None-Match
+    to get an empty 304 while the answer is unchanged.
+    """
+    user = user_cache.peek(email) or await run_db(lookup_user, email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found", headers={"Cache-Control": "no-store"})
+    
+    active, etag, max_age = evaluate_entitlement(user)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}" if max_age else "no-cache"
     }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entitlement_body(user, active), media_type="application/json", headers=headers)
 
 
 @router.post("/sync-all")
@@ -55,10 +125,29 @@ async def trigger_sync_all():
     """
     Manually trigger a sync of all users' subscription data
     This is useful for admin operations
+    
+    If a sync is already running anywhere in the cluster, this waits for it and
+    returns its result (flagged with "joined": true) instead of starting another
     """
-    from app.services.sync_service import SubscriptionSyncService
+    from app.services.coordination import run_sweep
     
-    sync_service = SubscriptionSyncService()
-    result = await sync_service.sync_all_users()
+    return await run_sweep(full=True)
+
+
+@router.get("/sync-batches/{batch_id}")
+async def get_sync_batch(batch_id: str):
+    """
+    Progress of a queued sync (job queue mode): job counts by status
     
-    return result
\ No newline at end of file
+    `batch_id` is returned by /sync-all and /sync-now when SYNC_QUEUE_ENABLED is set
+    """
+    from app.services import sync_queue
+    
+    counts = await run_db(sync_queue.batch_progress, batch_id)
+    if not any(counts.values()):
+        raise HTTPException(status_code=404, detail="Sync batch not found (or already purged)")
+    return {
+        "batch_id": batch_id,
+        "jobs": counts,
+        "complete": counts["PENDING"] == 0 and counts["RUNNING"] == 0
+    }
\ No newline at end of file
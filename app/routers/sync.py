@@ -0,0 +1,139 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from app.database import get_db
+from app.models.sync_log import SyncLog
+
+router = APIRouter(
+    prefix="/api/sync",
+    tags=["sync"]
+)
+
+# Largest page GET /api/sync/runs returns
+MAX_RUNS_PAGE_SIZE = 200
+
+# Numeric run metrics compared by /runs/compare
+COMPARED_METRICS = [
+    "duration_seconds",
+    "users_per_second",
+    "users_synced",
+    "users_failed",
+    "users_changed",
+    "users_unchanged",
+    "beag_retries",
+]
+
+
+def _run_dict(sync_log: SyncLog) -> dict:
+    return {
+        "id": sync_log.id,
+        "run_type": sync_log.run_type,
+        "status": sync_log.status,
+        "started_at": sync_log.started_at.isoformat() if sync_log.started_at else None,
+        "completed_at": sync_log.completed_at.isoformat() if sync_log.completed_at else None,
+        "duration_seconds": sync_log.duration_seconds,
+        "users_per_second": sync_log.users_per_second,
+        "users_synced": sync_log.users_synced,
+        "users_failed": sync_log.users_failed,
+        "users_changed": sync_log.users_changed,
+        "users_unchanged": sync_log.users_unchanged,
+        "beag_retries": sync_log.beag_retries,
+        "error_message": sync_log.error_message,
+        "telemetry": sync_log.telemetry
+    }
+
+
+def _get_run(db: Session, run_id: int) -> SyncLog:
+    sync_log = db.query(SyncLog).filter(SyncLog.id == run_id).first()
+    if not sync_log:
+        raise HTTPException(status_code=404, detail=f"Sync run {run_id} not found")
+    return sync_log
+
+
+def _latency(sync_log: SyncLog, percentile: str) -> Optional[float]:
+    latency = (sync_log.telemetry or {}).get("beag_latency_seconds") or {}
+    return latency.get(percentile)
+
+
+@router.get("/runs")
+def list_runs(
+    status: Optional[str] = None,
+    run_type: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Runs started at or after this time"),
+    until: Optional[datetime] = Query(None, description="Runs started before this time"),
+    limit: int = Query(50, ge=1, le=MAX_RUNS_PAGE_SIZE),
+    before_id: Optional[int] = Query(None, description="Runs older than this id (the previous page's next_before_id)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Recorded sync runs with their telemetry, newest first
+    
+    Pages are keyset on id: pass the returned `next_before_id` as `before_id`
+    for the next page.
+    """
+    query = db.query(SyncLog)
+    if status:
+        query = query.filter(SyncLog.status == status.upper())
+    if run_type:
+        query = query.filter(SyncLog.run_type == run_type.lower())
+    if since:
+        query = query.filter(SyncLog.started_at >= since)
+    if until:
+        query = query.filter(SyncLog.started_at < until)
+    if before_id is not None:
+        query = query.filter(SyncLog.id < before_id)
+    
+    runs = query.order_by(SyncLog.id.desc()).limit(limit).all()
+    return {
+        "runs": [_run_dict(sync_log) for sync_log in runs],
+        "next_before_id": runs[-1].id if len(runs) == limit else None
+    }
+
+
+@router.get("/runs/compare")
+def compare_runs(
+    baseline: int = Query(..., description="Sync run id to compare against"),
+    candidate: int = Query(..., description="Sync run id being evaluated"),
+    db: Session = Depends(get_db)
+):
+    """
+    Side-by-side numbers for two runs, e.g. before and after a tuning change
+    
+    For each metric: both values, `delta` (candidate - baseline) and `ratio`
+    (candidate / baseline). Either is null when a run has no value for it.
+    """
+    baseline_run = _get_run(db, baseline)
+    candidate_run = _get_run(db, candidate)
+    
+    values = {
+        metric: (getattr(baseline_run, metric), getattr(candidate_run, metric))
+        for metric in COMPARED_METRICS
+    }
+    for percentile in ("p50", "p90", "p99"):
+        values[f"beag_latency_{percentile}"] = (
+            _latency(baseline_run, percentile),
+            _latency(candidate_run, percentile)
+        )
+    
+    comparison = {}
+    for metric, (before, after) in values.items():
+        both = before is not None and after is not None
+        comparison[metric] = {
+            "baseline": before,
+            "candidate": after,
+            "delta": round(after - before, 4) if both else None,
+            "ratio": round(after / before, 4) if both and before else None
+        }
+    
+    return {
+        "baseline": _run_dict(baseline_run),
+        "candidate": _run_dict(candidate_run),
+        "comparison": comparison
+    }
+
+
+@router.get("/runs/{run_id}")
+def get_run(run_id: int, db: Session = Depends(get_db)):
+    """One sync run with its telemetry"""
+    return _run_dict(_get_run(db, run_id))
@@ -1,98 +1,257 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional
+import base64
+import json
 import logging
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, run_db
 from app.models.user import User
 from app.schemas.user import User as UserSchema, UserCreate
 from app.services.beag_client import BeagClient
 from app.services.sync_service import SubscriptionSyncService
+from app.services import scheduler, user_cache, user_export, user_import
 
 logger = logging.getLogger(__name__)
 
+# Largest page GET /api/users/ returns
+MAX_PAGE_SIZE = 1000
+
 router = APIRouter(
     prefix="/api/users",
     tags=["users"]
 )
 
 
+def _find_user(db: Session, **filters):
+    return db.query(User).filter_by(**filters).first()
+
+
+def _insert_user(db: Session, email: str) -> User:
+    db_user = User(email=email)
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
 @router.post("/", response_model=UserSchema)
 async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """Create a new user and sync their subscription data"""
-    logger.info(f"🔍 [DEBUG] POST /api/users/ called with email: {user.email}")
+    logger.debug("🔍 POST /api/users/ called with email: %s", user.email)
     
     # Check if user already exists
-    logger.info(f"🔍 [DEBUG] Checking if user already exists: {user.email}")
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    logger.debug("🔍 Checking if user already exists: %s", user.email)
+    existing_user = await run_db(_find_user, db, email=user.email)
     if existing_user:
-        logger.info(f"✅ [DEBUG] User already exists, syncing and returning: {user.email} (ID: {existing_user.id})")
+        logger.debug("✅ User already exists, syncing and returning: %s (ID: %s)", user.email, existing_user.id)
         # Instead of failing, sync and return the existing user
         sync_service = SubscriptionSyncService()
         await sync_service.sync_user(db, existing_user)
         return existing_user
     
-    logger.info(f"🔍 [DEBUG] User does not exist, creating new user: {user.email}")
+    logger.debug("🔍 User does not exist, creating new user: %s", user.email)
     try:
         # Create user
-        logger.info(f"🔍 [DEBUG] Creating User object and adding to database")
-        db_user = User(email=user.email)
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        logger.info(f"✅ [DEBUG] User created successfully in database: {user.email} (ID: {db_user.id})")
+        logger.debug("🔍 Creating User object and adding to database")
+        db_user = await run_db(_insert_user, db, user.email)
+        logger.info("✅ User created: %s (ID: %s)", user.email, db_user.id)
         
         # Sync subscription data
-        logger.info(f"🔍 [DEBUG] Starting subscription sync for new user: {user.email}")
+        logger.debug("🔍 Starting subscription sync for new user: %s", user.email)
         sync_service = SubscriptionSyncService()
         await sync_service.sync_user(db, db_user)
-        logger.info(f"✅ [DEBUG] User creation and sync completed: {user.email}")
+        logger.debug("✅ User creation and sync completed: %s", user.email)
         
         return db_user
     except Exception as e:
-        logger.error(f"❌ [DEBUG] Error creating user {user.email}: {str(e)}")
-        db.rollback()
+        logger.error("❌ Error creating user %s: %s", user.email, e)
+        await run_db(db.rollback)
         # Check again if user was created by another process
-        existing_user = db.query(User).filter(User.email == user.email).first()
+        existing_user = await run_db(_find_user, db, email=user.email)
         if existing_user:
-            logger.info(f"🔍 [DEBUG] User was created by another process during error, returning: {user.email}")
+            logger.info("🔍 User was created by another process during error, returning: %s", user.email)
             # User was created by another process, sync and return it
             sync_service = SubscriptionSyncService()
             await sync_service.sync_user(db, existing_user)
             return existing_user
         else:
             # Real error, re-raise
-            logger.error(f"❌ [DEBUG] Failed to create user, no existing user found: {user.email}")
+            logger.error("❌ Failed to create user, no existing user found: %s", user.email)
             raise HTTPException(status_code=500, detail=f"Failed to create user: {str(e)}")
 
 
+@router.post("/import", status_code=202)
+async def import_users(request: Request):
+    """
+    Bulk-create users from a list of emails
+    
+    Accepts a JSON body (`{"emails": [...]}` or a plain array) or a CSV body
+    (`Content-Type: text/csv`, emails in the first column). Users are inserted right
+    away; their subscriptions are synced in the background. Returns a job handle to
+    poll with GET /api/users/import/{job_id}.
+    """
+    body = (await request.body()).decode("utf-8-sig")
+    content_type = request.headers.get("content-type", "")
+    
+    if "csv" in content_type or content_type.startswith("text/plain"):
+        emails = user_import.parse_csv(body)
+    else:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be JSON or CSV")
+        if isinstance(payload, dict):
+            payload = payload.get("emails")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail='Expected {"emails": [...]} or a list of emails')
+        emails = payload
+    
+    if len(emails) > settings.user_import_max_emails:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many emails ({len(emails)}), the limit is {settings.user_import_max_emails} per import"
+        )
+    
+    logger.info(f"📥 Bulk import of {len(emails)} emails requested")
+    job_id = await user_import.start_import(emails)
+    return user_import.job_to_dict(await run_db(user_import.get_job, job_id))
+
+
+@router.get("/import/{job_id}")
+async def get_import_job(job_id: str):
+    """Progress of a bulk import job, from any process"""
+    job = await run_db(user_import.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return user_import.job_to_dict(job)
+
+
+def _encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
+
+
+def _user_filters(
+    subscription_status: Optional[str],
+    plan_id: Optional[int],
+    end_date_from: Optional[datetime],
+    end_date_to: Optional[datetime],
+    stale_hours: Optional[float]
+) -> list:
+    """WHERE clauses for the user list filters"""
+    filters = []
+    if subscription_status is not None:
+        filters.append(User.subscription_status == subscription_status.upper())
+    if plan_id is not None:
+        filters.append(User.plan_id == plan_id)
+    if end_date_from is not None:
+        filters.append(User.end_date >= end_date_from)
+    if end_date_to is not None:
+        filters.append(User.end_date < end_date_to)
+    if stale_hours is not None:
+        synced_before = scheduler.utcnow() - timedelta(hours=stale_hours)
+        filters.append(or_(User.last_synced.is_(None), User.last_synced < synced_before))
+    return filters
+
+
 @router.get("/", response_model=List[UserSchema])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all users"""
-    users = db.query(User).offset(skip).limit(limit).all()
+def get_users(
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    subscription_status: Optional[str] = None,
+    plan_id: Optional[int] = None,
+    end_date_from: Optional[datetime] = None,
+    end_date_to: Optional[datetime] = None,
+    stale_hours: Optional[float] = Query(None, gt=0),
+    skip: int = Query(0, ge=0, deprecated=True),
+    db: Session = Depends(get_db)
+):
+    """
+    Get users, ordered by id
+    
+    Pages are keyset-based: pass the `X-Next-Cursor` response header back as
+    `cursor` to get the next page (the header is absent on the last page), so deep
+    pages cost the same as the first. Optional filters: `subscription_status`,
+    `plan_id`, an `end_date_from`/`end_date_to` range, and `stale_hours` (last
+    synced more than that many hours ago, or never). `skip` is kept for older
+    clients and ignored when a cursor is given.
+    """
+    query = db.query(User).filter(*_user_filters(subscription_status, plan_id, end_date_from, end_date_to, stale_hours))
+    
+    query = query.order_by(User.id)
+    if cursor is not None:
+        query = query.filter(User.id > _decode_cursor(cursor))
+    elif skip:
+        query = query.offset(skip)
+    
+    # One extra row tells whether there is a next page
+    users = query.limit(limit + 1).all()
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(users[-1].id)
     return users
 
 
+@router.get("/export")
+async def export_users(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    subscription_status: Optional[str] = None,
+    plan_id: Optional[int] = None,
+    end_date_from: Optional[datetime] = None,
+    end_date_to: Optional[datetime] = None,
+    stale_hours: Optional[float] = Query(None, gt=0)
+):
+    """
+    Stream every user (or those matching the same filters as GET /api/users/) as NDJSON or CSV
+    
+    Rows come from a server-side cursor and are encoded straight from the query
+    results, so memory stays flat and large exports run at about database speed.
+    """
+    filters = _user_filters(subscription_status, plan_id, end_date_from, end_date_to, stale_hours)
+    filename = f"users-{scheduler.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        user_export.stream_users(filters, fmt),
+        media_type=user_export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get("/by-email/{email}", response_model=UserSchema)
 def get_user_by_email(email: str, db: Session = Depends(get_db)):
     """Get user by email"""
-    logger.info(f"🔍 [DEBUG] GET /api/users/by-email/{email} called")
-    user = db.query(User).filter(User.email == email).first()
+    logger.debug("🔍 GET /api/users/by-email/%s called", email)
+    user = user_cache.get_user(db, email)
     if not user:
-        logger.info(f"❌ [DEBUG] User not found in database: {email}")
+        logger.debug("❌ User not found in database: %s", email)
         raise HTTPException(status_code=404, detail="User not found")
-    logger.info(f"✅ [DEBUG] User found in database: {email} (ID: {user.id})")
+    logger.debug("✅ User found: %s (ID: %s)", email, user["id"])
     return user
 
 
 @router.post("/sync/{user_id}")
 async def sync_user_subscription(user_id: int, db: Session = Depends(get_db)):
     """Manually sync a user's subscription data"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await run_db(_find_user, db, id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     sync_service = SubscriptionSyncService()
-    success = await sync_service.sync_user(db, user)
+    success = await sync_service.sync_user(db, user, fresh=True)
     
     if success:
         return {"message": "Subscription synced successfully"}
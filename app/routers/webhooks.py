@@ -0,0 +1,79 @@
+import json
+from typing import List
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import ValidationError, parse_obj_as
+from app.config import settings
+from app.database import run_db
+from app.metrics import WEBHOOK_EVENTS
+from app.schemas.subscription import SubscriptionEvent
+from app.services.webhooks import (
+    SIGNATURE_HEADER,
+    TIMESTAMP_HEADER,
+    WebhookSignatureError,
+    get_event_stats,
+    store_events,
+    verify_signature,
+    webhook_processor
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/webhooks",
+    tags=["webhooks"]
+)
+
+
+def _require_enabled() -> None:
+    if not settings.webhooks_enabled:
+        raise HTTPException(status_code=404, detail="Webhooks are not enabled (set BEAG_WEBHOOK_SECRET)")
+
+
+@router.post("/beag", status_code=202)
+async def receive_beag_events(request: Request):
+    """
+    Receive subscription events pushed by Beag
+    
+    The body is one event or a JSON array of them, each a subscription plus
+    `event_id` and `occurred_at`, signed with BEAG_WEBHOOK_SECRET. Events are
+    stored and acknowledged with 202 straight away, then applied to users in
+    batches in the background. Redelivered event IDs are acknowledged but not
+    stored again.
+    """
+    _require_enabled()
+    body = await request.body()
+    try:
+        verify_signature(body, request.headers.get(TIMESTAMP_HEADER), request.headers.get(SIGNATURE_HEADER))
+    except WebhookSignatureError as e:
+        WEBHOOK_EVENTS.labels("rejected").inc()
+        logger.warning(f"Rejected webhook request: {str(e)}")
+        raise HTTPException(status_code=401, detail=str(e))
+    
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    if not isinstance(payload, list):
+        payload = [payload]
+    # Checked before validation, so an oversized batch isn't parsed first
+    if len(payload) > settings.beag_webhook_max_events:
+        raise HTTPException(status_code=413, detail=f"At most {settings.beag_webhook_max_events} events per request")
+    try:
+        events = parse_obj_as(List[SubscriptionEvent], payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    
+    accepted = await run_db(store_events, events) if events else 0
+    WEBHOOK_EVENTS.labels("received").inc(accepted)
+    WEBHOOK_EVENTS.labels("duplicate").inc(len(events) - accepted)
+    if accepted:
+        webhook_processor.notify()
+    return {"received": len(events), "accepted": accepted, "duplicates": len(events) - accepted}
+
+
+@router.get("/beag/stats")
+async def webhook_event_stats():
+    """Stored webhook events by status; processed ones are kept for BEAG_WEBHOOK_RETENTION_HOURS"""
+    _require_enabled()
+    return {"events": await run_db(get_event_stats)}
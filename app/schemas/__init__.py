@@ -1,5 +1,5 @@
 from .user import User, UserCreate, UserUpdate, UserInDB
-from .subscription import SubscriptionResponse, SubscriptionStatus
+from .subscription import BatchLookupRequest, SubscriptionEvent, SubscriptionResponse, SubscriptionStatus
 
 __all__ = [
     "User", 
@@ -7,5 +7,7 @@ __all__ = [
     "UserUpdate", 
     "UserInDB",
     "SubscriptionResponse",
-    "SubscriptionStatus"
+    "SubscriptionEvent",
+    "SubscriptionStatus",
+    "BatchLookupRequest"
 ]
\ No newline at end of file
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, constr
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from enum import Enum
 
 
@@ -13,6 +13,10 @@ class SubscriptionStatus(str, Enum):
     RESUMED = "RESUMED"
 
 
+# Statuses counted as an active subscription
+ACTIVE_STATUSES = ["PAID", "ACTIVE", "TRIAL"]
+
+
 class SubscriptionResponse(BaseModel):
     """Response from Beag API"""
     email: EmailStr
@@ -21,4 +25,17 @@ class SubscriptionResponse(BaseModel):
     start_date: datetime
     end_date: datetime
     my_saas_app_id: str
-    client_id: int
\ No newline at end of file
+    client_id: int
+
+
+class SubscriptionEvent(SubscriptionResponse):
+    """Subscription change pushed by Beag's webhook: the subscription plus event metadata"""
+    event_id: constr(min_length=1, max_length=200)
+    occurred_at: datetime
+
+
+class BatchLookupRequest(BaseModel):
+    """Body of POST /api/subscriptions/batch"""
+    emails: List[str]
+    source: Literal["auto", "local", "beag"] = "auto"
+    fresh: bool = False  # Bypass the in-process Beag lookup cache
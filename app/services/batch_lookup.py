@@ -0,0 +1,103 @@
+import asyncio
+from typing import AsyncIterator, Dict, List
+from sqlalchemy import select
+from app.config import settings
+from app.database import engine, run_db
+from app.models.user import User
+from app.schemas.subscription import SubscriptionResponse
+from app.services.beag_client import BeagClient, BeagUnavailableError
+from app.services.user_import import normalize_emails
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns answered from the local row
+LOCAL_COLUMNS = [User.email, User.subscription_status, User.plan_id, User.start_date, User.end_date, User.last_synced]
+
+
+def load_local(emails: List[str]) -> Dict[str, tuple]:
+    """Local rows for these emails, in one IN query"""
+    with engine.connect() as conn:
+        rows = conn.execute(select(*LOCAL_COLUMNS).where(User.email.in_(emails)))
+        return {row.email: row for row in rows}
+
+
+def _local_line(row) -> dict:
+    return {
+        "email": row.email,
+        "source": "local",
+        "found": bool(row.subscription_status),
+        "status": row.subscription_status,
+        "plan_id": row.plan_id,
+        "start_date": row.start_date,
+        "end_date": row.end_date,
+        "last_synced": row.last_synced
+    }
+
+
+def _beag_line(email: str, subscription: SubscriptionResponse) -> dict:
+    if not subscription:
+        return {"email": email, "source": "beag", "found": False}
+    return {
+        "email": email,
+        "source": "beag",
+        "found": True,
+        "status": subscription.status.value,
+        "plan_id": subscription.plan_id,
+        "start_date": subscription.start_date,
+        "end_date": subscription.end_date
+    }
+
+
+async def lookup(raw_emails: List[str], source: str = "auto", fresh: bool = False) -> AsyncIterator[List[dict]]:
+    """
+    Subscription status of many users, yielded in chunks of result lines as they are ready
+    
+    Emails are validated and deduped first, and each one gets exactly one line.
+    With source "auto", users synced before are answered from their local rows
+    (one IN query, all in the first chunk) and the rest are looked up in Beag with
+    up to BATCH_LOOKUP_CONCURRENCY calls in flight, one chunk per answer.
+    "local" never calls Beag; "beag" skips the local rows.
+    """
+    emails, invalid = normalize_emails(raw_emails)
+    first = [{"email": email, "error": "Invalid email"} for email in invalid]
+    
+    misses = emails
+    if source != "beag":
+        local = await run_db(load_local, emails) if emails else {}
+        misses = []
+        for email in emails:
+            row = local.get(email)
+            if row is not None and (row.last_synced is not None or source == "local"):
+                first.append(_local_line(row))
+            elif source == "local":
+                first.append({"email": email, "source": "local", "found": False, "error": "User not found"})
+            else:
+                misses.append(email)
+    if first:
+        yield first
+    if not misses:
+        return
+    
+    beag_client = BeagClient()
+    semaphore = asyncio.Semaphore(settings.batch_lookup_concurrency)
+    
+    async def fetch(email: str) -> dict:
+        async with semaphore:
+            try:
+                return _beag_line(email, await beag_client.get_subscription_by_email(email, fresh=fresh))
+            except BeagUnavailableError as e:
+                return {"email": email, "source": "beag", "error": str(e) or type(e).__name__}
+            except Exception as e:
+                # The status line and earlier answers are already out: report it in-stream
+                logger.error("Batch lookup failed for %s: %s", email, e)
+                return {"email": email, "source": "beag", "error": str(e) or type(e).__name__}
+    
+    tasks = [asyncio.create_task(fetch(email)) for email in misses]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield [await task]
+    finally:
+        # The client went away: don't keep calling Beag for nobody
+        for task in tasks:
+            task.cancel()
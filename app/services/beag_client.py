@@ -1,77 +1,292 @@
+import asyncio
+import functools
+import random
+import time
 import httpx
-from typing import Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
 from app.config import settings
+from app.metrics import BEAG_REQUEST_DURATION, BEAG_RESPONSES
 from app.schemas.subscription import SubscriptionResponse
+from app.services.cache import MISSING, TTLCache
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.http_client import get_http_client
+from app.services.rate_limiter import AdaptiveRateLimiter
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Responses worth retrying; anything else that isn't 200/404 fails immediately
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class BeagUnavailableError(Exception):
+    """
+    Beag could not give a definitive answer (throttled, erroring, unreachable)
+    
+    The subscription state is unknown, so callers must keep existing data rather
+    than treating this as "no subscription". `reason` is a short, user-independent
+    cause (e.g. "HTTP 503") for grouping errors.
+    """
+    
+    def __init__(self, message: str, reason: Optional[str] = None):
+        super().__init__(message)
+        self.reason = reason or message
+
+
+class BeagCircuitOpenError(BeagUnavailableError):
+    """Beag is considered down; the call was rejected without contacting it"""
+
+
+# Shared by every BeagClient in the process (routers create one per request)
+_cache = TTLCache(settings.beag_cache_max_size)
+_inflight: Dict[str, asyncio.Task] = {}
+_cache_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+_rate_limiter = AdaptiveRateLimiter(
+    initial_limit=settings.beag_rate_limit_initial,
+    min_limit=settings.beag_rate_limit_min,
+    max_limit=settings.beag_rate_limit_max,
+    latency_target_seconds=settings.beag_rate_limit_latency_target_seconds
+)
+_request_stats = {"retries": 0, "unavailable": 0}
+_breaker = CircuitBreaker(
+    "beag",
+    failure_threshold=settings.beag_breaker_failure_threshold,
+    recovery_timeout_seconds=settings.beag_breaker_recovery_seconds,
+    half_open_max_calls=settings.beag_breaker_half_open_max_calls
+)
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss/coalesce counters for the Beag lookup cache"""
+    lookups = _cache_stats["hits"] + _cache_stats["misses"] + _cache_stats["coalesced"]
+    return {
+        "enabled": settings.beag_cache_enabled,
+        "size": len(_cache),
+        "max_size": _cache.max_size,
+        **_cache_stats,
+        "hit_ratio": round((_cache_stats["hits"] + _cache_stats["coalesced"]) / lookups, 4) if lookups else 0.0
+    }
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def get_rate_limiter_stats() -> dict:
+    """Current adaptive concurrency limit and retry counters for Beag calls"""
+    return {**_rate_limiter.snapshot(), **_request_stats}
+
+
+def get_circuit_breaker_stats() -> dict:
+    """State and recent transitions of the Beag circuit breaker"""
+    return _breaker.snapshot()
+
+
+def circuit_open() -> bool:
+    """True while Beag calls are being rejected by the circuit breaker"""
+    return _breaker.is_open()
+
+
+async def _fetch_and_store(
+    key: str,
+    fetch: Callable[[], Awaitable[Optional[SubscriptionResponse]]]
+) -> Optional[SubscriptionResponse]:
+    subscription = await fetch()
+    ttl = settings.beag_cache_ttl_seconds if subscription else settings.beag_cache_negative_ttl_seconds
+    _cache.set(key, subscription, ttl)
+    return subscription
+
+
+def _lookup_done(key: str, task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Mark the result as retrieved even if every caller was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date)"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), settings.beag_retry_after_max_seconds)
+
+
+def _backoff_seconds(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    ceiling = min(settings.beag_retry_backoff_max_seconds, settings.beag_retry_backoff_base_seconds * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
 
 class BeagClient:
     """Client for interacting with Beag API"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = settings.beag_api_url
         self.api_key = settings.beag_api_key
         self.headers = {
             "X-API-KEY": self.api_key,
             "Content-Type": "application/json"
         }
+        self._client = client
     
-    async def get_subscription_by_email(self, email: str) -> Optional[SubscriptionResponse]:
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for requests (the shared pooled client unless one was injected)"""
+        return self._client or get_http_client()
+    
+    async def _get_subscription(self, path: str, label: str, endpoint: str) -> Optional[SubscriptionResponse]:
         """
-        Get subscription details for a user by email
+        Fetch a subscription from Beag, retrying transient failures
         
-        Returns None if user not found or has no active subscription
+        Returns None only when Beag answers 404. Throttling, 5xx, timeouts and other
+        unexpected answers are retried with jittered exponential backoff (honoring
+        Retry-After) and raise BeagUnavailableError once retries run out.
+        Each attempt goes through the circuit breaker; while it is open the call
+        fails fast with BeagCircuitOpenError. `endpoint` names the Beag endpoint in metrics.
         """
-        async with httpx.AsyncClient() as client:
+        url = f"{self.base_url}{path}"
+        last_error = "no attempt made"
+        last_reason = last_error
+        
+        for attempt in range(settings.beag_max_retries + 1):
+            if attempt:
+                _request_stats["retries"] += 1
+            
+            if not _breaker.allow_request():
+                raise BeagCircuitOpenError(f"Beag circuit breaker is open, skipped lookup for {label}", "circuit open")
+            
             try:
-                url = f"{self.base_url}/clients/by-email/{email}"
-                response = await client.get(url, headers=self.headers)
-                
+                await _rate_limiter.acquire()
+            except BaseException:
+                _breaker.record_abandoned()
+                raise
+            started = time.monotonic()
+            overloaded = None
+            retry_after = None
+            response = None
+            try:
+                response = await self.client.get(url, headers=self.headers)
+                overloaded = response.status_code in RETRYABLE_STATUS_CODES
+            except httpx.RequestError as e:
+                overloaded = True
+                last_error = f"request error: {str(e) or type(e).__name__}"
+                last_reason = type(e).__name__
+            finally:
+                latency = time.monotonic() - started
+                await _rate_limiter.release(latency, bool(overloaded))
+                if overloaded is not None:
+                    BEAG_REQUEST_DURATION.labels(endpoint).observe(latency)
+                    BEAG_RESPONSES.labels(endpoint, str(response.status_code) if response is not None else "error").inc()
+                # Only outage-like failures count against the breaker, not 4xx answers
+                if overloaded is None:
+                    _breaker.record_abandoned()
+                elif overloaded:
+                    _breaker.record_failure()
+                else:
+                    _breaker.record_success()
+            
+            if response is not None:
                 if response.status_code == 200:
-                    data = response.json()
-                    return SubscriptionResponse(**data)
+                    try:
+                        return SubscriptionResponse(**response.json())
+                    except Exception as e:
+                        logger.error("Unexpected response for %s: %s", label, e)
+                        _request_stats["unavailable"] += 1
+                        raise BeagUnavailableError(f"Invalid response from Beag for {label}", "invalid response") from e
                 elif response.status_code == 404:
-                    logger.info(f"No subscription found for email: {email}")
+                    logger.debug("No subscription found for %s", label)
                     return None
-                else:
-                    logger.error(f"Error fetching subscription for {email}: {response.status_code}")
-                    logger.error(f"Response: {response.text}")
-                    return None
-                    
-            except httpx.RequestError as e:
-                logger.error(f"Request error for {email}: {str(e)}")
-                return None
-            except Exception as e:
-                logger.error(f"Unexpected error for {email}: {str(e)}")
-                return None
+                
+                last_error = last_reason = f"HTTP {response.status_code}"
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    logger.error("Error fetching subscription for %s: %s", label, response.status_code)
+                    logger.error("Response: %s", response.text)
+                    break
+                
+                retry_after = _retry_after_seconds(response)
+                if retry_after is not None:
+                    _rate_limiter.pause(retry_after)
+            
+            if attempt < settings.beag_max_retries:
+                delay = max(retry_after or 0.0, _backoff_seconds(attempt))
+                # Per attempt, so debug only: retries are counted in the stats and metrics
+                logger.debug("Beag lookup for %s failed (%s), retrying in %.1fs", label, last_error, delay)
+                await asyncio.sleep(delay)
+        
+        logger.error("Beag unavailable for %s: %s", label, last_error)
+        _request_stats["unavailable"] += 1
+        raise BeagUnavailableError(f"Beag unavailable for {label}: {last_error}", last_reason)
     
-    async def get_subscription_by_id(self, client_id: int) -> Optional[SubscriptionResponse]:
+    async def _cached(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Optional[SubscriptionResponse]]],
+        fresh: bool
+    ) -> Optional[SubscriptionResponse]:
+        """
+        Serve a lookup from the cache, joining an identical in-flight request if any
+        
+        `fresh` skips both the cache and in-flight requests, but still stores the result.
+        Errors (BeagUnavailableError) are shared with joined callers but never cached.
+        A shared lookup runs as a task of its own, so a caller that is cancelled
+        (say, its client disconnected) doesn't cancel it for the others.
+        """
+        if not settings.beag_cache_enabled:
+            return await fetch()
+        
+        if fresh:
+            _cache_stats["misses"] += 1
+            return await _fetch_and_store(key, fetch)
+        
+        cached = _cache.get(key)
+        if cached is not MISSING:
+            _cache_stats["hits"] += 1
+            return cached
+        task = _inflight.get(key)
+        if task is not None:
+            _cache_stats["coalesced"] += 1
+        else:
+            _cache_stats["misses"] += 1
+            task = asyncio.create_task(_fetch_and_store(key, fetch))
+            _inflight[key] = task
+            task.add_done_callback(functools.partial(_lookup_done, key))
+        return await asyncio.shield(task)
+    
+    async def get_subscription_by_email(self, email: str, fresh: bool = False) -> Optional[SubscriptionResponse]:
+        """
+        Get subscription details for a user by email
+        
+        Returns None if user not found or has no active subscription.
+        Raises BeagUnavailableError if Beag couldn't answer (state unknown).
+        Answers are cached briefly; pass fresh=True to always ask Beag.
+        """
+        return await self._cached(
+            f"email:{email}",
+            lambda: self._get_subscription(f"/clients/by-email/{email}", f"email: {email}", "by-email"),
+            fresh
+        )
+    
+    async def get_subscription_by_id(self, client_id: int, fresh: bool = False) -> Optional[SubscriptionResponse]:
         """
         Get subscription details for a user by client ID
         
-        Returns None if user not found or has no active subscription
+        Returns None if user not found or has no active subscription.
+        Raises BeagUnavailableError if Beag couldn't answer (state unknown).
+        Answers are cached briefly; pass fresh=True to always ask Beag.
         """
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"{self.base_url}/clients/by-id/{client_id}"
-                response = await client.get(url, headers=self.headers)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return SubscriptionResponse(**data)
-                elif response.status_code == 404:
-                    logger.info(f"No subscription found for client_id: {client_id}")
-                    return None
-                else:
-                    logger.error(f"Error fetching subscription for client_id {client_id}: {response.status_code}")
-                    logger.error(f"Response: {response.text}")
-                    return None
-                    
-            except httpx.RequestError as e:
-                logger.error(f"Request error for client_id {client_id}: {str(e)}")
-                return None
-            except Exception as e:
-                logger.error(f"Unexpected error for client_id {client_id}: {str(e)}")
-                return None
\ No newline at end of file
+        return await self._cached(
+            f"id:{client_id}",
+            lambda: self._get_subscription(f"/clients/by-id/{client_id}", f"client_id: {client_id}", "by-id"),
+            fresh
+        )
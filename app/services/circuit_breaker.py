@@ -0,0 +1,103 @@
+import time
+from collections import deque
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker
+    
+    After `failure_threshold` consecutive failures the circuit opens and calls are
+    rejected immediately. Once `recovery_timeout_seconds` have passed it goes
+    half-open and lets up to `half_open_max_calls` trial calls through: a success
+    closes it again, a failure re-opens it.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_timeout_seconds: float,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout_seconds = recovery_timeout_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.rejected_calls = 0
+        self.transitions = deque(maxlen=20)
+    
+    def _transition(self, state: str, reason: str) -> None:
+        if state == self.state:
+            return
+        logger.warning(f"Circuit '{self.name}' {self.state} -> {state} ({reason})")
+        self.transitions.append({
+            "from": self.state,
+            "to": state,
+            "reason": reason,
+            "at": datetime.utcnow().isoformat() + "Z"
+        })
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        self.half_open_calls = 0
+    
+    def is_open(self) -> bool:
+        """True while calls would be rejected (open and not yet due for a trial call)"""
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.recovery_timeout_seconds
+    
+    def allow_request(self) -> bool:
+        """Check (and claim) permission for one call"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout_seconds:
+                self.rejected_calls += 1
+                return False
+            self._transition(HALF_OPEN, "recovery timeout elapsed")
+        
+        if self.state == HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.rejected_calls += 1
+                return False
+            self.half_open_calls += 1
+        return True
+    
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state == HALF_OPEN:
+            self._transition(CLOSED, "trial call succeeded")
+    
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self._transition(OPEN, "trial call failed")
+        elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._transition(OPEN, f"{self.consecutive_failures} consecutive failures")
+    
+    def record_abandoned(self) -> None:
+        """A permitted call ended without a verdict (e.g. cancelled): free its trial slot"""
+        if self.state == HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+    
+    def snapshot(self) -> dict:
+        retry_in = 0.0
+        if self.state == OPEN:
+            retry_in = max(0.0, self.recovery_timeout_seconds - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "retry_in_seconds": round(retry_in, 1),
+            "rejected_calls": self.rejected_calls,
+            "transitions": list(self.transitions)
+        }
@@ -0,0 +1,270 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import text
+from app.config import settings
+from app.database import DedicatedConnection, SessionLocal, engine, run_db
+from app.models.sync_log import SyncLog
+from app.services import sync_queue
+from app.services.sync_service import SubscriptionSyncService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Advisory locks use the two-key form: (namespace, lock id). "BEAG" as an int4
+LOCK_NAMESPACE = 0x42454147
+# Held for as long as a process owns the periodic sweep
+SWEEP_LEADER_LOCK = 1
+# Held while a sweep is running, whoever started it
+SYNC_RUN_LOCK = 2
+
+# Seconds between checks while waiting for another process's sweep to finish
+REMOTE_RUN_POLL_SECONDS = 2.0
+
+
+def _try_lock_sql(lock_id: int) -> str:
+    return f"SELECT pg_try_advisory_lock({LOCK_NAMESPACE}, {lock_id})"
+
+
+def _unlock_sql(lock_id: int) -> str:
+    return f"SELECT pg_advisory_unlock({LOCK_NAMESPACE}, {lock_id})"
+
+
+class LeaderElection:
+    """
+    Elects one process cluster-wide through a session-level Postgres advisory lock
+    
+    Every candidate holds a dedicated connection and tries to take the lock every
+    SYNC_LEADER_CHECK_SECONDS. The leader keeps the lock for as long as its
+    connection lives: if the process stops or dies, Postgres drops the session and
+    the next candidate to try takes over.
+    """
+    
+    def __init__(self, lock_id: int, name: str):
+        self.lock_id = lock_id
+        self.name = name
+        self._task: Optional[asyncio.Task] = None
+        self._is_leader = False
+        self._leader_since: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+    
+    @property
+    def is_leader(self) -> bool:
+        return not settings.sync_leader_election or self._is_leader
+    
+    def start(self) -> None:
+        if settings.sync_leader_election and self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def snapshot(self) -> dict:
+        return {
+            "enabled": settings.sync_leader_election,
+            "is_leader": self.is_leader,
+            "leader_since": self._leader_since.isoformat() if self._leader_since else None,
+            "last_error": self._last_error
+        }
+    
+    def _try_acquire(self, conn) -> bool:
+        cursor = conn.cursor()
+        cursor.execute(_try_lock_sql(self.lock_id))
+        acquired = cursor.fetchone()[0]
+        conn.commit()
+        return acquired
+    
+    def _check(self, conn) -> None:
+        # The lock lives as long as the session; make sure the session is still there
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        conn.commit()
+    
+    def _set_leader(self, is_leader: bool) -> None:
+        if is_leader and not self._is_leader:
+            self._leader_since = datetime.utcnow()
+            logger.info("👑 This process is now the %s leader", self.name)
+        elif not is_leader and self._is_leader:
+            self._leader_since = None
+            logger.warning("⚠️  Lost %s leadership", self.name)
+        self._is_leader = is_leader
+    
+    async def _run(self) -> None:
+        while True:
+            connection = DedicatedConnection()
+            try:
+                conn = await connection.open()
+                while True:
+                    if self._is_leader:
+                        await connection.call(self._check, conn)
+                    else:
+                        self._set_leader(await connection.call(self._try_acquire, conn))
+                    self._last_error = None
+                    await asyncio.sleep(settings.sync_leader_check_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("%s leader election error: %s", self.name, e)
+                self._last_error = str(e)
+            finally:
+                self._set_leader(False)
+                # Closing the session releases the lock; never pool a connection holding it
+                await connection.close()
+            await asyncio.sleep(5)
+
+
+sweep_leader = LeaderElection(SWEEP_LEADER_LOCK, "sync sweep")
+
+# The sweep this process is running, shared with callers that join it
+_local_run: Optional[asyncio.Task] = None
+
+
+def _acquire_run_lock():
+    """Take the sync run lock on its own connection, or return None if it is held"""
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_try_lock_sql(SYNC_RUN_LOCK))
+        acquired = cursor.fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.invalidate()
+        raise
+    if not acquired:
+        conn.close()
+        return None
+    return conn
+
+
+def _release_run_lock(conn) -> None:
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_unlock_sql(SYNC_RUN_LOCK))
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        # Dropping the session releases the lock too
+        logger.error("Error releasing sync run lock: %s", e)
+        conn.invalidate()
+
+
+def _remote_run_active() -> bool:
+    db = SessionLocal()
+    try:
+        # Two-key advisory locks show up in pg_locks as (classid, objid) with objsubid 2
+        return db.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+            f"AND classid = {LOCK_NAMESPACE} AND objid = {SYNC_RUN_LOCK} AND objsubid = 2 AND granted)"
+        )).scalar()
+    finally:
+        db.close()
+
+
+def _latest_run() -> dict:
+    db = SessionLocal()
+    try:
+        sync_log = (
+            db.query(SyncLog)
+            .filter(SyncLog.completed_at.isnot(None))
+            .order_by(SyncLog.id.desc())
+            .first()
+        )
+        if not sync_log:
+            return {"total_users": 0, "users_synced": 0, "users_failed": 0, "status": "UNKNOWN"}
+        result = {
+            "sync_log_id": sync_log.id,
+            "total_users": (sync_log.users_synced or 0) + (sync_log.users_failed or 0),
+            "users_synced": sync_log.users_synced or 0,
+            "users_failed": sync_log.users_failed or 0,
+            "status": sync_log.status
+        }
+        if sync_log.error_message:
+            result["error"] = sync_log.error_message
+        return result
+    finally:
+        db.close()
+
+
+async def _run_exclusive(full: bool) -> Optional[dict]:
+    """
+    Run a sweep holding the cluster-wide run lock; None if another process holds it
+    
+    With the job queue enabled the sweep only queues jobs for the consumers
+    """
+    conn = await run_db(_acquire_run_lock)
+    if conn is None:
+        return None
+    try:
+        if settings.sync_queue_enabled:
+            return await run_db(sync_queue.enqueue_sweep, due_only=not full)
+        sync_service = SubscriptionSyncService()
+        if full:
+            return await sync_service.sync_all_users()
+        return await sync_service.sync_due_users()
+    finally:
+        await run_db(_release_run_lock, conn)
+
+
+def _skipped(reason: str) -> dict:
+    return {
+        "total_users": 0,
+        "users_synced": 0,
+        "users_failed": 0,
+        "status": "SKIPPED",
+        "reason": reason
+    }
+
+
+async def run_sweep(full: bool = True, join: bool = True) -> dict:
+    """
+    Run a sync sweep unless one is already running somewhere in the cluster
+    
+    `full` syncs every user, otherwise only the due ones. If a sweep (of either
+    kind) is already running, in this process or another, `join` waits for it and
+    returns its result flagged with "joined": true; without `join` it returns
+    SKIPPED. The sweep carries on if the caller is cancelled.
+    """
+    global _local_run
+    joined = _local_run is not None and not _local_run.done()
+    if joined:
+        if not join:
+            return _skipped("A sync is already running in this process")
+        logger.info("🔗 Joining the sync already running in this process")
+    else:
+        _local_run = asyncio.create_task(_run_exclusive(full))
+    
+    result = await asyncio.shield(_local_run)
+    
+    if result is None:
+        if not join:
+            return _skipped("A sync is already running in another process")
+        logger.info("🔗 Waiting for the sync running in another process")
+        while await run_db(_remote_run_active):
+            await asyncio.sleep(REMOTE_RUN_POLL_SECONDS)
+        result = await run_db(_latest_run)
+        joined = True
+    
+    if joined:
+        result = {**result, "joined": True}
+    return result
+
+
+async def run_scheduled_sweep() -> dict:
+    """One periodic pass, run only by the sweep leader: due users, or everyone if adaptive sync is off"""
+    if not sweep_leader.is_leader:
+        return _skipped("Another process owns the periodic sync")
+    return await run_sweep(full=not settings.sync_adaptive, join=False)
+
+
+def get_coordination_stats() -> dict:
+    return {
+        "sweep_leader": sweep_leader.snapshot(),
+        "sync_running_locally": _local_run is not None and not _local_run.done()
+    }
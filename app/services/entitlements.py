@@ -0,0 +1,91 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from app.config import settings
+from app.database import SessionLocal
+from app.schemas.subscription import ACTIVE_STATUSES
+from app.services import scheduler, user_cache
+
+
+def is_active(status: Optional[str], end_date: Optional[datetime], now: datetime) -> bool:
+    """
+    Whether a synced subscription grants access right now
+    
+    Access ends at end_date plus SYNC_EXPIRY_GRACE_MINUTES, the window the scheduler
+    gives a renewal to be picked up, even if the row hasn't been re-synced yet.
+    """
+    if not status or status.upper() not in ACTIVE_STATUSES:
+        return False
+    end_date = scheduler.as_utc(end_date)
+    return end_date is None or now < end_date + timedelta(minutes=settings.sync_expiry_grace_minutes)
+
+
+def max_age_seconds(user: dict, active: bool, now: datetime) -> int:
+    """
+    How long clients and CDNs may reuse an entitlement answer without revalidating
+    
+    Up to ENTITLEMENT_MAX_AGE_SECONDS, but never past the user's next sync (which
+    may change the answer) or the moment access runs out, and not at all for users
+    that have never been synced (their first sync may change the answer at any
+    moment) or whose sync is overdue.
+    """
+    if user["last_synced"] is None:
+        return 0
+    max_age = float(settings.entitlement_max_age_seconds)
+    next_sync_at = scheduler.as_utc(user["next_sync_at"])
+    if next_sync_at is None:
+        next_sync_at = scheduler.as_utc(user["last_synced"]) + timedelta(hours=settings.sync_interval_hours)
+    max_age = min(max_age, (next_sync_at - now).total_seconds())
+    end_date = scheduler.as_utc(user["end_date"])
+    if active and end_date is not None:
+        expires = end_date + timedelta(minutes=settings.sync_expiry_grace_minutes)
+        max_age = min(max_age, (expires - now).total_seconds())
+    return max(0, int(max_age))
+
+
+def evaluate_entitlement(user: dict, now: Optional[datetime] = None) -> Tuple[bool, str, int]:
+    """
+    Access state for a user row: (active, strong ETag, max-age seconds)
+    
+    The ETag is a hash of the row fields the answer is made of plus `active`, so
+    it changes exactly when the answer does (a sync or webhook changing the
+    subscription, or access running out), and a 304 never needs the body.
+    """
+    now = now or scheduler.utcnow()
+    active = is_active(user["subscription_status"], user["end_date"], now)
+    end_date = scheduler.as_utc(user["end_date"])
+    fields = (user["email"], user["subscription_status"], user["plan_id"], end_date.isoformat() if end_date else None, active)
+    etag = '"' + hashlib.sha256(repr(fields).encode()).hexdigest()[:32] + '"'
+    return active, etag, max_age_seconds(user, active, now)
+
+
+def entitlement_body(user: dict, active: bool) -> bytes:
+    """The JSON answer for a user row, only built when it is actually sent"""
+    end_date = scheduler.as_utc(user["end_date"])
+    return json.dumps({
+        "email": user["email"],
+        "active": active,
+        "status": user["subscription_status"],
+        "plan_id": user["plan_id"],
+        "expires_at": end_date.isoformat() if end_date else None
+    }, separators=(",", ":")).encode()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def lookup_user(email: str) -> Optional[dict]:
+    """User row through the read-through cache, with a session of its own (blocking)"""
+    db = SessionLocal()
+    try:
+        return user_cache.get_user(db, email)
+    finally:
+        db.close()
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+from sqlalchemy import text
+from app.config import settings
+from app.database import engine, run_db
+from app.metrics import HEALTH_PROBE_LATENCY, HEALTH_PROBE_UP
+from app.services import sync_queue
+from app.services.beag_client import circuit_open, get_circuit_breaker_stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A snapshot older than this many probe intervals means the prober itself is stuck
+STALE_AFTER_INTERVALS = 3
+
+
+def _check_database() -> dict:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {}
+
+
+def _check_workers() -> dict:
+    timeout = float(settings.worker_heartbeat_timeout_seconds)
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT worker_id, kind, details, "
+            "EXTRACT(EPOCH FROM now() - last_beat_at) AS age_seconds "
+            "FROM worker_heartbeats ORDER BY kind, worker_id"
+        )).fetchall()
+    
+    workers = []
+    alive = {"api": 0, "worker": 0, "consumer": 0}
+    for row in rows:
+        age = float(row.age_seconds)
+        is_alive = age <= timeout
+        if is_alive:
+            alive[row.kind] = alive.get(row.kind, 0) + 1
+        workers.append({
+            "worker_id": row.worker_id,
+            "kind": row.kind,
+            "alive": is_alive,
+            "last_beat_seconds_ago": round(age, 1),
+            **(row.details or {})
+        })
+    return {"alive": alive, "workers": workers}
+
+
+async def _check_beag() -> dict:
+    # Judged by the circuit breaker, which sees every real Beag call: a request of
+    # our own would skip the rate limiter and add load just when Beag struggles
+    breaker = get_circuit_breaker_stats()
+    if circuit_open():
+        raise RuntimeError(f"Circuit breaker open, retrying in {breaker['retry_in_seconds']}s")
+    return {"circuit_breaker": breaker["state"], "consecutive_failures": breaker["consecutive_failures"]}
+
+
+class HealthProber:
+    """
+    Checks the database, worker heartbeats and Beag's circuit breaker in the background and caches the results
+    
+    Health endpoints serve the cached snapshot, so load balancer and uptime checks
+    never take a pool connection themselves. The probes only read: Beag is never
+    called, and old heartbeat rows are cleaned up by their writers. Each probe
+    runs every HEALTH_PROBE_INTERVAL_SECONDS with its own timeout.
+    """
+    
+    def __init__(self):
+        self._results: Dict[str, dict] = {}
+        self._checked_at: Optional[datetime] = None
+        self._checked_monotonic: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def _probes(self) -> Dict[str, Callable[[], Awaitable[dict]]]:
+        probes = {
+            "database": lambda: run_db(_check_database),
+            "workers": lambda: run_db(_check_workers)
+        }
+        if settings.health_probe_beag:
+            probes["beag"] = _check_beag
+        if settings.sync_queue_enabled:
+            probes["sync_queue"] = lambda: run_db(lambda: {"jobs": sync_queue.get_queue_stats()})
+        return probes
+    
+    async def _probe(self, name: str, check: Callable[[], Awaitable[dict]]) -> dict:
+        started = time.perf_counter()
+        try:
+            # A timed-out DB check keeps its executor thread until the driver gives up
+            result = {"ok": True, "error": None, **await asyncio.wait_for(check(), settings.health_probe_timeout_seconds)}
+        except asyncio.TimeoutError:
+            result = {"ok": False, "error": f"Timed out after {settings.health_probe_timeout_seconds}s"}
+        except Exception as e:
+            result = {"ok": False, "error": str(e) or type(e).__name__}
+        latency = time.perf_counter() - started
+        result["latency_ms"] = round(latency * 1000, 1)
+        HEALTH_PROBE_UP.labels(name).set(1 if result["ok"] else 0)
+        HEALTH_PROBE_LATENCY.labels(name).set(latency)
+        return result
+    
+    async def probe_once(self) -> None:
+        probes = self._probes()
+        results = await asyncio.gather(*(self._probe(name, check) for name, check in probes.items()))
+        self._results = dict(zip(probes, results))
+        self._checked_at = datetime.utcnow()
+        self._checked_monotonic = time.monotonic()
+    
+    def snapshot(self) -> dict:
+        """The latest probe results, without doing any I/O"""
+        age = None if self._checked_monotonic is None else time.monotonic() - self._checked_monotonic
+        return {
+            "checked_at": self._checked_at.isoformat() if self._checked_at else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "interval_seconds": settings.health_probe_interval_seconds,
+            "stale": age is None or age > settings.health_probe_interval_seconds * STALE_AFTER_INTERVALS,
+            "probes": self._results
+        }
+    
+    def probe(self, name: str) -> dict:
+        return self._results.get(name) or {"ok": False, "error": "Not probed yet"}
+    
+    def workers_alive(self) -> dict:
+        return self._results.get("workers", {}).get("alive", {})
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.error(f"Health probe error: {str(e)}")
+            await asyncio.sleep(settings.health_probe_interval_seconds)
+
+
+health_prober = HealthProber()
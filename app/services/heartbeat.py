@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Callable, Optional
+from sqlalchemy import text
+from app.config import settings
+from app.database import engine, run_db
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows of workers that stopped beating this long ago are deleted
+HEARTBEAT_RETENTION_HOURS = 24
+
+# Each reporter deletes old rows at most this often
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class HeartbeatReporter:
+    """
+    Keeps this process's row in worker_heartbeats fresh while its worker runs
+    
+    Beats every WORKER_HEARTBEAT_SECONDS from the worker's own event loop, so a
+    blocked loop, a dead worker task (`is_alive` returns False) or a dead process
+    all stop the beats; the health prober treats a row older than
+    WORKER_HEARTBEAT_TIMEOUT_SECONDS as a dead worker. `kind` is "api", "worker"
+    or "consumer".
+    """
+    
+    def __init__(self, kind: str, is_alive: Optional[Callable[[], bool]] = None):
+        self.kind = kind
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{kind}"
+        self.is_alive = is_alive
+        self.details = {"passes": 0, "last_pass_at": None, "last_status": None}
+        self._task: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                # Leave no row behind to age out after a clean shutdown
+                await run_db(self._remove)
+            except Exception as e:
+                logger.error(f"Error removing worker heartbeat: {str(e)}")
+    
+    def record_pass(self, status: Optional[str]) -> None:
+        """Note a completed worker pass; sent with the next beat"""
+        self.details["passes"] += 1
+        self.details["last_pass_at"] = datetime.utcnow().isoformat()
+        self.details["last_status"] = status
+    
+    def _beat(self) -> None:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO worker_heartbeats (worker_id, kind, hostname, pid, details) "
+                "VALUES (:worker_id, :kind, :hostname, :pid, CAST(:details AS json)) "
+                "ON CONFLICT (worker_id) DO UPDATE SET last_beat_at = now(), details = EXCLUDED.details"
+            ), {
+                "worker_id": self.worker_id,
+                "kind": self.kind,
+                "hostname": socket.gethostname(),
+                "pid": os.getpid(),
+                "details": json.dumps(self.details)
+            })
+    
+    def _purge_stale(self) -> None:
+        # Left behind by processes that died without a clean shutdown
+        with engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM worker_heartbeats WHERE last_beat_at < now() - make_interval(hours => :hours)"
+            ), {"hours": HEARTBEAT_RETENTION_HOURS})
+    
+    def _remove(self) -> None:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM worker_heartbeats WHERE worker_id = :worker_id"), {"worker_id": self.worker_id})
+    
+    async def _run(self) -> None:
+        while True:
+            if self.is_alive is None or self.is_alive():
+                try:
+                    await run_db(self._beat)
+                    if time.monotonic() - self._last_purge > PURGE_INTERVAL_SECONDS:
+                        await run_db(self._purge_stale)
+                        self._last_purge = time.monotonic()
+                except Exception as e:
+                    logger.error(f"Error sending worker heartbeat: {str(e)}")
+            await asyncio.sleep(settings.worker_heartbeat_seconds)
@@ -0,0 +1,70 @@
+import httpx
+from typing import Optional
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client shared by BeagClient, the sync service and the routers.
+# Reusing it keeps TCP/TLS connections to the Beag API alive between calls.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.beag_http_max_connections,
+        max_keepalive_connections=settings.beag_http_max_keepalive_connections,
+        keepalive_expiry=settings.beag_http_keepalive_expiry_seconds
+    )
+    timeout = httpx.Timeout(
+        settings.beag_http_timeout_seconds,
+        connect=settings.beag_http_connect_timeout_seconds,
+        pool=settings.beag_http_pool_timeout_seconds
+    )
+    
+    http2 = settings.beag_http2
+    if http2 and not _http2_available():
+        logger.warning("BEAG_HTTP2 is enabled but the 'h2' package is not installed, falling back to HTTP/1.1")
+        http2 = False
+    
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client
+    
+    Created lazily so scripts that never call start_http_client() still work
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Open the shared HTTP client (called on app/worker startup)"""
+    client = get_http_client()
+    logger.info(
+        f"HTTP client ready (max connections: {settings.beag_http_max_connections}, "
+        f"keep-alive: {settings.beag_http_max_keepalive_connections}, "
+        f"http2: {settings.beag_http2 and _http2_available()})"
+    )
+    return client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and its pooled connections (called on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("HTTP client closed")
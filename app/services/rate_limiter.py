@@ -0,0 +1,97 @@
+import asyncio
+import time
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD concurrency limiter for outbound API calls
+    
+    The number of requests allowed in flight grows by roughly one per round of
+    fast, successful responses (additive increase) and is cut by `decrease_factor`
+    on throttling, server errors or timeouts (multiplicative decrease). Slow but
+    successful responses shrink it gently. A Retry-After from the server pauses
+    all new requests until it has passed.
+    """
+    
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target_seconds: float,
+        decrease_factor: float = 0.5,
+        decrease_cooldown_seconds: float = 1.0
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_target_seconds = latency_target_seconds
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.stats = {"requests": 0, "overloaded": 0, "slow": 0, "pauses": 0}
+        self._last_decrease = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+    
+    @property
+    def _cond(self) -> asyncio.Condition:
+        # Created on first use so it binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+    
+    async def acquire(self) -> None:
+        """Wait for a free slot (and for any Retry-After pause to end)"""
+        while True:
+            delay = self.paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self._cond:
+                await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+                if self.paused_until <= time.monotonic():
+                    self.in_flight += 1
+                    self.stats["requests"] += 1
+                    return
+    
+    async def release(self, latency: float, overloaded: bool) -> None:
+        """Free a slot and adjust the limit from the request's outcome"""
+        async with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                self.stats["overloaded"] += 1
+                self._decrease(self.decrease_factor)
+            elif latency > self.latency_target_seconds:
+                self.stats["slow"] += 1
+                self._decrease(0.9)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+    
+    def pause(self, seconds: float) -> None:
+        """Hold back new requests for `seconds` (e.g. from a Retry-After header)"""
+        until = time.monotonic() + seconds
+        if until > self.paused_until:
+            self.paused_until = until
+            self.stats["pauses"] += 1
+            logger.warning(f"Beag asked us to back off, pausing requests for {seconds:.1f}s")
+    
+    def _decrease(self, factor: float) -> None:
+        # One burst of failures from requests already in flight counts as one signal
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown_seconds:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
+    
+    def snapshot(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "paused_for_seconds": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            **self.stats
+        }
@@ -0,0 +1,117 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from app.config import settings
+from app.schemas.subscription import ACTIVE_STATUSES
+
+# A status change within this window marks a user as volatile (checked more often)
+VOLATILE_WINDOW = timedelta(days=7)
+# No status change within this window marks a user as stable (checked less often)
+STABLE_WINDOW = timedelta(days=30)
+# Users whose status flipped at least this many times never get the stable back-off
+FLAPPING_CHANGE_COUNT = 3
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Treat naive datetimes (as stored by datetime.utcnow()) as UTC"""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def track_status_change(
+    old_status: Optional[str],
+    new_status: Optional[str],
+    status_changed_at: Optional[datetime],
+    status_change_count: Optional[int],
+    now: datetime
+) -> Tuple[Optional[datetime], int]:
+    """
+    Update the status change bookkeeping for a freshly synced user
+    
+    Returns the new (status_changed_at, status_change_count)
+    """
+    count = status_change_count or 0
+    if (old_status or None) != (new_status or None):
+        return now, count + 1
+    return status_changed_at, count
+
+
+def next_sync_at(
+    status: Optional[str],
+    end_date: Optional[datetime],
+    status_changed_at: Optional[datetime],
+    status_change_count: Optional[int],
+    now: datetime
+) -> datetime:
+    """
+    Decide when a user should next be checked against Beag
+    
+    - Active subscriptions are checked every SYNC_INTERVAL_HOURS, users without one
+      SYNC_INACTIVE_INTERVAL_MULTIPLIER times less often.
+    - Users whose status changed recently are checked twice as often; users whose
+      status has been stable for a month (and isn't flapping) half as often.
+    - Subscriptions about to reach end_date are checked just after it (plus
+      SYNC_EXPIRY_GRACE_MINUTES), and ones past end_date that still look active are
+      re-checked every SYNC_MIN_INTERVAL_MINUTES for SYNC_EXPIRY_WATCH_HOURS so a
+      cancellation or renewal is picked up quickly.
+    
+    The result is clamped between the min and max intervals. With webhooks on,
+    polling only reconciles missed events: both the interval and the max are
+    SYNC_WEBHOOK_INTERVAL_MULTIPLIER times longer.
+    """
+    min_interval = timedelta(minutes=settings.sync_min_interval_minutes)
+    max_interval = timedelta(hours=settings.sync_max_interval_hours)
+    end_date = as_utc(end_date)
+    status_changed_at = as_utc(status_changed_at)
+    is_active = bool(status) and status.upper() in ACTIVE_STATUSES
+    
+    interval = timedelta(hours=settings.sync_interval_hours)
+    if not is_active:
+        interval *= settings.sync_inactive_interval_multiplier
+    
+    if status_changed_at and now - status_changed_at < VOLATILE_WINDOW:
+        interval /= 2
+    elif (status_change_count or 0) < FLAPPING_CHANGE_COUNT and (
+        status_changed_at is None or now - status_changed_at > STABLE_WINDOW
+    ):
+        interval *= 2
+    
+    if settings.webhooks_enabled:
+        interval *= settings.sync_webhook_interval_multiplier
+        max_interval *= settings.sync_webhook_interval_multiplier
+    
+    # Spread checks out so users synced together don't all come due together
+    interval *= random.uniform(0.9, 1.0)
+    interval = min(max(interval, min_interval), max_interval)
+    
+    if is_active and end_date:
+        grace = timedelta(minutes=settings.sync_expiry_grace_minutes)
+        if end_date > now:
+            # Check right after the period ends instead of up to a full interval later
+            if end_date + grace < now + interval:
+                interval = max(end_date + grace - now, min_interval)
+        elif now - end_date < timedelta(hours=settings.sync_expiry_watch_hours):
+            # Period over but still marked active: watch for the renewal or cancellation
+            interval = min_interval
+    
+    return now + interval
+
+
+def worker_interval_seconds() -> int:
+    """How long the background worker sleeps between sync passes"""
+    if settings.sync_adaptive:
+        return settings.sync_poll_minutes * 60
+    if settings.webhooks_enabled:
+        return int(settings.sync_interval_hours * 3600 * settings.sync_webhook_interval_multiplier)
+    return settings.sync_interval_hours * 3600
+
+
+def describe_worker_interval() -> str:
+    if settings.sync_adaptive:
+        return f"adaptive, checking for due users every {settings.sync_poll_minutes} minutes"
+    return f"interval: {worker_interval_seconds() / 3600:g} hours"
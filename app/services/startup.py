@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import text
+from app.config import settings
+from app.database import Base, engine, run_db
+from app.metrics import STARTUP_SECONDS
+from app.services.http_client import start_http_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between retries of a failing warm-up step
+MAX_RETRY_SECONDS = 30.0
+
+
+def _process_age_seconds() -> float:
+    """Seconds since this process was started, interpreter startup and imports included"""
+    try:
+        # Field 22 of /proc/self/stat is the start time in clock ticks since boot
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return max(0.0, time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        # Not Linux: measure from the first import of this module instead
+        return 0.0
+
+
+# Monotonic time the process started
+PROCESS_STARTED = time.monotonic() - _process_age_seconds()
+
+
+def _create_schema() -> None:
+    # Migrations own the schema; this only fills in tables a fresh database is missing
+    import app.models  # noqa: F401
+    Base.metadata.create_all(bind=engine)
+
+
+def _warm_pool(connections: int) -> None:
+    # Hold them all at once so the pool really opens `connections` sessions
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+class StartupWarmup:
+    """
+    Brings the app to ready in the background, after it is already serving
+    
+    Nothing here runs at import or blocks the startup event, so the port is bound
+    without waiting on the database. Each step is retried with backoff until it
+    succeeds: a database that is down at boot delays readiness instead of
+    crashing the process. Startup milestones are measured from process start.
+    """
+    
+    def __init__(self):
+        self.steps: Dict[str, dict] = {}
+        self.milestones: Dict[str, float] = {}
+        self.ready_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+    
+    def start(self, on_ready: Callable[[], Awaitable[None]]) -> None:
+        if self._task is None:
+            self.record_milestone("serving")
+            self._task = asyncio.create_task(self._run(on_ready))
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def record_milestone(self, name: str) -> None:
+        """Note the first time the process reached this milestone"""
+        if name in self.milestones:
+            return
+        seconds = round(time.monotonic() - PROCESS_STARTED, 3)
+        self.milestones[name] = seconds
+        STARTUP_SECONDS.labels(name).set(seconds)
+        if name in ("first_response", "ready") and seconds > settings.startup_ttfb_budget_seconds:
+            logger.warning(f"⚠️  Startup milestone '{name}' took {seconds}s, over the {settings.startup_ttfb_budget_seconds}s budget")
+        else:
+            logger.info(f"⏱️  Startup milestone '{name}' at {seconds}s")
+    
+    def snapshot(self) -> dict:
+        budget = settings.startup_ttfb_budget_seconds
+        measured = [self.milestones[name] for name in ("first_response", "ready") if name in self.milestones]
+        return {
+            "ready": self.ready,
+            "ready_at": self.ready_at.isoformat() if self.ready_at else None,
+            "steps": self.steps,
+            "milestones_seconds": self.milestones,
+            "budget_seconds": budget,
+            "within_budget": all(seconds <= budget for seconds in measured)
+        }
+    
+    def _plan(self) -> List[tuple]:
+        steps = [("http_client", start_http_client)]
+        if settings.startup_create_schema:
+            steps.append(("schema", lambda: run_db(_create_schema)))
+        if settings.startup_warm_connections > 0:
+            connections = min(settings.startup_warm_connections, settings.db_pool_size)
+            steps.append(("db_pool", lambda: run_db(_warm_pool, connections)))
+        return steps
+    
+    async def _run_step(self, name: str, step: Callable[[], Awaitable]) -> None:
+        state = self.steps[name] = {"status": "running", "attempts": 0, "seconds": None, "error": None}
+        started = time.monotonic()
+        delay = settings.startup_retry_seconds
+        while True:
+            state["attempts"] += 1
+            try:
+                await step()
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                state["error"] = str(e)
+                logger.error(f"Startup step '{name}' failed (attempt {state['attempts']}), retrying in {delay:.0f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_SECONDS)
+        state["status"] = "done"
+        state["error"] = None
+        state["seconds"] = round(time.monotonic() - started, 3)
+    
+    async def _run(self, on_ready: Callable[[], Awaitable[None]]) -> None:
+        plan = self._plan()
+        for name, _ in plan:
+            self.steps[name] = {"status": "pending", "attempts": 0, "seconds": None, "error": None}
+        for name, step in plan:
+            await self._run_step(name, step)
+        
+        self.ready_at = datetime.utcnow()
+        self.record_milestone("ready")
+        await on_ready()
+
+
+startup_warmup = StartupWarmup()
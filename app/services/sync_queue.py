@@ -0,0 +1,264 @@
+import asyncio
+import os
+import socket
+import uuid
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from app.config import settings
+from app.database import SessionLocal, engine, run_db
+from app.metrics import SYNC_JOBS
+from app.services.beag_client import circuit_open
+from app.services.sync_service import SubscriptionSyncService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Matches the partial unique index uq_sync_jobs_active_user
+_ON_ACTIVE_CONFLICT = "ON CONFLICT (user_id) WHERE status IN ('PENDING', 'RUNNING') DO NOTHING"
+
+_DUE_FILTER = "WHERE next_sync_at IS NULL OR next_sync_at <= now()"
+
+
+def new_batch_id() -> str:
+    return uuid.uuid4().hex
+
+
+def enqueue_sweep(due_only: bool = False) -> dict:
+    """
+    Queue a sync job for every user (or every due user) in one INSERT ... SELECT
+    
+    Users that already have a pending or running job are skipped, so overlapping
+    sweeps never queue the same user twice. Finished jobs past their retention are
+    purged on the way.
+    """
+    batch_id = new_batch_id()
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "INSERT INTO sync_jobs (user_id, batch_id, max_attempts) "
+            f"SELECT id, CAST(:batch_id AS varchar), CAST(:max_attempts AS integer) FROM users {_DUE_FILTER if due_only else ''} "
+            f"{_ON_ACTIVE_CONFLICT}"
+        ), {"batch_id": batch_id, "max_attempts": settings.sync_job_max_attempts})
+        enqueued = result.rowcount
+    purge_finished_jobs()
+    
+    if enqueued:
+        logger.info(f"📬 Queued {enqueued} {'due ' if due_only else ''}users for sync (batch {batch_id})")
+    return {
+        "total_users": enqueued,
+        "users_synced": 0,
+        "users_failed": 0,
+        "status": "QUEUED" if enqueued else "SKIPPED",
+        "batch_id": batch_id,
+        "jobs_enqueued": enqueued
+    }
+
+
+def enqueue_users(user_ids: List[int], batch_id: Optional[str] = None) -> int:
+    """Queue a sync job for each of these users; returns how many were queued"""
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "INSERT INTO sync_jobs (user_id, batch_id, max_attempts) "
+            "SELECT id, CAST(:batch_id AS varchar), CAST(:max_attempts AS integer) FROM users WHERE id = ANY(CAST(:user_ids AS integer[])) "
+            f"{_ON_ACTIVE_CONFLICT}"
+        ), {"batch_id": batch_id, "max_attempts": settings.sync_job_max_attempts, "user_ids": user_ids})
+        return result.rowcount
+
+
+def _postpone_failed_users(conn, job_ids: List[int]) -> None:
+    """
+    Push back the next sync of users whose job just failed for good
+    
+    Their next_sync_at is still in the past, so without this the next due sweep
+    would queue them again straight away, and every sweep after it. They are
+    retried after SYNC_JOB_RETRY_MAX_SECONDS instead, the longest retry backoff.
+    """
+    if not job_ids:
+        return
+    conn.execute(text(
+        "UPDATE users SET next_sync_at = now() + make_interval(secs => :delay) "
+        "WHERE id IN (SELECT user_id FROM sync_jobs WHERE id = ANY(CAST(:ids AS bigint[])) AND status = 'FAILED')"
+    ), {"ids": job_ids, "delay": float(settings.sync_job_retry_max_seconds)})
+
+
+def claim_jobs(worker_id: str, limit: int) -> List[Tuple[int, int]]:
+    """
+    Claim up to `limit` runnable jobs for this worker, returning (job_id, user_id) pairs
+    
+    Pending jobs whose run_at has passed are claimable, including running jobs put
+    back because their visibility timeout expired. SKIP LOCKED lets any number of
+    consumers claim at once without waiting on or double-claiming each other.
+    """
+    with engine.begin() as conn:
+        # Running jobs whose consumer died go back to the queue, or are given up on
+        # if that was their last allowed attempt
+        expired = conn.execute(text(
+            "UPDATE sync_jobs SET "
+            "status = CASE WHEN attempts >= max_attempts THEN 'FAILED' ELSE 'PENDING' END, "
+            "completed_at = CASE WHEN attempts >= max_attempts THEN now() END, "
+            "locked_until = NULL, last_error = 'Visibility timeout expired' "
+            "WHERE status = 'RUNNING' AND locked_until < now() "
+            "RETURNING id, status"
+        ))
+        _postpone_failed_users(conn, [row.id for row in expired if row.status == "FAILED"])
+        result = conn.execute(text(
+            "UPDATE sync_jobs SET status = 'RUNNING', attempts = attempts + 1, "
+            "locked_until = now() + make_interval(secs => :visibility), locked_by = :worker_id "
+            "WHERE id IN ("
+            "  SELECT id FROM sync_jobs"
+            "  WHERE status = 'PENDING' AND run_at <= now()"
+            "  ORDER BY run_at"
+            "  LIMIT :limit"
+            "  FOR UPDATE SKIP LOCKED"
+            ") RETURNING id, user_id"
+        ), {
+            "visibility": float(settings.sync_job_visibility_timeout_seconds),
+            "worker_id": worker_id,
+            "limit": limit
+        })
+        return [(row.id, row.user_id) for row in result]
+
+
+def complete_jobs(
+    worker_id: str,
+    done: List[int],
+    failed: Dict[int, str],
+    deferred: List[int]
+) -> None:
+    """
+    Record the outcome of claimed jobs
+    
+    Failed jobs are retried with exponential backoff until max_attempts, then marked
+    FAILED and their users' next sync is pushed back. Deferred jobs go back to the queue without using up an attempt. Only jobs
+    still held by this worker are touched: one whose visibility timeout expired may
+    already belong to another consumer.
+    """
+    with engine.begin() as conn:
+        if done:
+            conn.execute(text(
+                "UPDATE sync_jobs SET status = 'DONE', completed_at = now(), locked_until = NULL, last_error = NULL "
+                "WHERE id = ANY(CAST(:ids AS bigint[])) AND status = 'RUNNING' AND locked_by = :worker_id"
+            ), {"ids": done, "worker_id": worker_id})
+        if failed:
+            conn.execute(text(
+                "UPDATE sync_jobs SET "
+                "status = CASE WHEN attempts >= max_attempts THEN 'FAILED' ELSE 'PENDING' END, "
+                "completed_at = CASE WHEN attempts >= max_attempts THEN now() END, "
+                "run_at = now() + make_interval(secs => LEAST(:base * power(2, attempts - 1), :max_delay)), "
+                "locked_until = NULL, last_error = :error "
+                "WHERE id = :id AND status = 'RUNNING' AND locked_by = :worker_id"
+            ), [
+                {
+                    "id": job_id,
+                    "error": error,
+                    "worker_id": worker_id,
+                    "base": float(settings.sync_job_retry_base_seconds),
+                    "max_delay": float(settings.sync_job_retry_max_seconds)
+                }
+                for job_id, error in failed.items()
+            ])
+            _postpone_failed_users(conn, list(failed))
+        if deferred:
+            release_jobs(worker_id, deferred, settings.beag_breaker_recovery_seconds, conn=conn)
+
+
+def release_jobs(worker_id: str, job_ids: List[int], delay_seconds: float = 0, conn=None) -> None:
+    """Put claimed jobs back in the queue without counting the attempt"""
+    statement = text(
+        "UPDATE sync_jobs SET status = 'PENDING', attempts = attempts - 1, locked_until = NULL, "
+        "run_at = now() + make_interval(secs => :delay) "
+        "WHERE id = ANY(CAST(:ids AS bigint[])) AND status = 'RUNNING' AND locked_by = :worker_id"
+    )
+    params = {"ids": job_ids, "worker_id": worker_id, "delay": float(delay_seconds)}
+    if conn is not None:
+        conn.execute(statement, params)
+        return
+    with engine.begin() as conn:
+        conn.execute(statement, params)
+
+
+def purge_finished_jobs() -> int:
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "DELETE FROM sync_jobs WHERE status IN ('DONE', 'FAILED') "
+            "AND completed_at < now() - make_interval(secs => :retention)"
+        ), {"retention": float(settings.sync_job_retention_hours * 3600)})
+        return result.rowcount
+
+
+def _count_by_status(where: str = "", params: Optional[dict] = None) -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT status, count(*) AS jobs FROM sync_jobs {where} GROUP BY status"), params or {})
+        counts = {"PENDING": 0, "RUNNING": 0, "DONE": 0, "FAILED": 0}
+        counts.update({row.status: row.jobs for row in rows})
+        return counts
+
+
+def batch_progress(batch_id: str) -> dict:
+    """Job counts by status for one sweep or import"""
+    return _count_by_status("WHERE batch_id = :batch_id", {"batch_id": batch_id})
+
+
+def get_queue_stats() -> dict:
+    """Job counts by status (finished jobs within the retention window)"""
+    return _count_by_status()
+
+
+class SyncQueueConsumer:
+    """
+    Claims sync jobs in batches and runs them through the batched sync path
+    
+    Each consumer claims up to SYNC_BATCH_SIZE jobs, looks them up in Beag with up to
+    SYNC_CONCURRENCY requests in flight and writes the batch back in one flush.
+    Run more consumer processes (worker.py --consumers N) to sync faster.
+    """
+    
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.sync_service = SubscriptionSyncService()
+    
+    async def run(self) -> None:
+        logger.info(f"📥 Sync queue consumer {self.worker_id} started (batch size: {settings.sync_batch_size}, concurrency: {settings.sync_concurrency})")
+        while True:
+            if circuit_open():
+                # Beag is down: leave the jobs queued until the breaker lets calls through
+                await asyncio.sleep(settings.sync_queue_poll_seconds)
+                continue
+            try:
+                jobs = await run_db(claim_jobs, self.worker_id, settings.sync_batch_size)
+            except Exception as e:
+                logger.error(f"Error claiming sync jobs: {str(e)}")
+                await asyncio.sleep(5)
+                continue
+            if not jobs:
+                await asyncio.sleep(settings.sync_queue_poll_seconds)
+                continue
+            await self.process(jobs)
+    
+    async def process(self, jobs: List[Tuple[int, int]]) -> None:
+        job_ids = {user_id: job_id for job_id, user_id in jobs}
+        db = SessionLocal()
+        try:
+            result = await self.sync_service.sync_user_batch(db, list(job_ids))
+        except asyncio.CancelledError:
+            # Shutting down: hand the jobs straight back instead of waiting out the visibility timeout
+            await run_db(release_jobs, self.worker_id, list(job_ids.values()))
+            raise
+        except Exception as e:
+            logger.error(f"Error processing {len(jobs)} sync jobs: {str(e)}")
+            result = {"synced": [], "failed": {user_id: str(e) for user_id in job_ids}, "deferred": [], "missing": []}
+        finally:
+            await run_db(db.close)
+        
+        done = [job_ids[user_id] for user_id in result["synced"] + result["missing"]]
+        failed = {job_ids[user_id]: error for user_id, error in result["failed"].items()}
+        deferred = [job_ids[user_id] for user_id in result["deferred"]]
+        try:
+            await run_db(complete_jobs, self.worker_id, done, failed, deferred)
+        except Exception as e:
+            # The jobs become claimable again once their visibility timeout expires
+            logger.error(f"Error recording sync job results: {str(e)}")
+            return
+        SYNC_JOBS.labels("done").inc(len(done))
+        SYNC_JOBS.labels("failed").inc(len(failed))
+        SYNC_JOBS.labels("deferred").inc(len(deferred))
+        logger.info(f"✅ Processed {len(jobs)} sync jobs: {len(done)} done, {len(failed)} failed, {len(deferred)} deferred")
@@ -1,13 +1,116 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import Counter
+from contextlib import aclosing
 from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+from sqlalchemy import DateTime, Integer, String, cast, column, func, or_, update, values
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from sqlalchemy.orm.attributes import flag_modified
+from app.config import settings
+from app.database import SessionLocal, run_db
+from app.logging_config import LogSampler
+from app.metrics import SYNC_LOOKUPS_IN_FLIGHT, SYNC_RUN_DURATION, SYNC_RUNS, SYNC_USERS
 from app.models.user import User
 from app.models.sync_log import SyncLog
-from app.services.beag_client import BeagClient
-import logging
+from app.schemas.subscription import ACTIVE_STATUSES, SubscriptionResponse
+from app.services.beag_client import (
+    BeagClient,
+    BeagCircuitOpenError,
+    BeagUnavailableError,
+    circuit_open,
+    get_rate_limiter_stats
+)
+from app.services.sync_telemetry import SyncTelemetry
+from app.services import scheduler, user_cache
 
 logger = logging.getLogger(__name__)
 
+# Fingerprint stored for users Beag has no subscription for
+NO_SUBSCRIPTION_FINGERPRINT = "none"
+
+# Upper bound keeps a batch's bind parameters well below Postgres' 32767 limit
+MAX_BATCH_SIZE = 2000
+
+# Columns written by a batched sync, in VALUES order, with the type each is cast to
+# (untyped NULL parameters would otherwise be inferred as text)
+BATCH_COLUMNS = [
+    ("id", Integer),
+    ("subscription_status", String),
+    ("plan_id", Integer),
+    ("start_date", DateTime(timezone=True)),
+    ("end_date", DateTime(timezone=True)),
+    ("my_saas_app_id", String),
+    ("beag_client_id", Integer),
+    ("last_synced", DateTime(timezone=True)),
+    ("next_sync_at", DateTime(timezone=True)),
+    ("status_changed_at", DateTime(timezone=True)),
+    ("status_change_count", Integer),
+    ("subscription_fingerprint", String),
+]
+
+# Columns written for users whose subscription didn't change
+FRESHNESS_COLUMNS = [
+    ("id", Integer),
+    ("last_synced", DateTime(timezone=True)),
+    ("next_sync_at", DateTime(timezone=True)),
+]
+
+
+# Columns loaded for each user during a sweep
+SYNC_USER_COLUMNS = [
+    User.id,
+    User.email,
+    User.subscription_status,
+    User.status_changed_at,
+    User.status_change_count,
+    User.subscription_fingerprint,
+]
+
+
+def subscription_fingerprint(subscription: Optional[SubscriptionResponse]) -> str:
+    """Stable hash of the subscription fields the sync writes, used to skip no-op updates"""
+    if not subscription:
+        return NO_SUBSCRIPTION_FINGERPRINT
+    parts = [
+        subscription.status.value,
+        subscription.plan_id,
+        scheduler.as_utc(subscription.start_date).isoformat(),
+        scheduler.as_utc(subscription.end_date).isoformat(),
+        subscription.my_saas_app_id,
+        subscription.client_id,
+    ]
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def schedule_after_sync(user, subscription: Optional[SubscriptionResponse]) -> tuple:
+    """
+    Work out the status change bookkeeping and next check time for a synced user
+    
+    Returns (status_changed_at, status_change_count, next_sync_at)
+    """
+    now = scheduler.utcnow()
+    new_status = subscription.status.value if subscription else None
+    changed_at, change_count = scheduler.track_status_change(
+        user.subscription_status, new_status, user.status_changed_at, user.status_change_count, now
+    )
+    next_sync_at = scheduler.next_sync_at(
+        new_status, subscription.end_date if subscription else None, changed_at, change_count, now
+    )
+    return changed_at, change_count, next_sync_at
+
+
+def no_newer_event(fetched_at):
+    """
+    Filter for users no webhook event at or after `fetched_at` was applied to
+    
+    An event applied after a lookup started may describe a newer state than the
+    lookup saw, so the lookup must not overwrite it.
+    """
+    return or_(User.subscription_event_at.is_(None), User.subscription_event_at < fetched_at)
+
 
 class SubscriptionSyncService:
     """Service for syncing user subscriptions with Beag API"""
@@ -15,132 +118,639 @@ class SubscriptionSyncService:
     def __init__(self):
         self.beag_client = BeagClient()
     
-    async def sync_user(self, db: Session, user: User) -> bool:
+    def _schedule(self, user, subscription: Optional[SubscriptionResponse]):
+        return schedule_after_sync(user, subscription)
+    
+    def apply_subscription(self, user: User, subscription: Optional[SubscriptionResponse], fetched_at: datetime) -> bool:
+        """
+        Copy subscription data from Beag onto the user row (does not commit)
+        
+        `fetched_at` is when the lookup was made and is stored as last_synced. If a
+        webhook event at or after that time was already applied, the user is left
+        alone. If the subscription matches the stored fingerprint only the sync
+        bookkeeping (last_synced, next_sync_at) is touched and updated_at is left alone.
+        Returns True if the subscription data changed.
+        """
+        if user.subscription_event_at and scheduler.as_utc(user.subscription_event_at) >= fetched_at:
+            return False
+        fingerprint = subscription_fingerprint(subscription)
+        user.status_changed_at, user.status_change_count, user.next_sync_at = self._schedule(user, subscription)
+        user.last_synced = fetched_at
+        
+        if fingerprint == user.subscription_fingerprint:
+            # Write updated_at back unchanged so its onupdate default doesn't fire
+            flag_modified(user, "updated_at")
+            return False
+        
+        if subscription:
+            user.subscription_status = subscription.status
+            user.plan_id = subscription.plan_id
+            user.start_date = subscription.start_date
+            user.end_date = subscription.end_date
+            user.my_saas_app_id = subscription.my_saas_app_id
+            user.beag_client_id = subscription.client_id
+        else:
+            # User has no active subscription
+            user.subscription_status = None
+            user.plan_id = None
+            user.start_date = None
+            user.end_date = None
+        user.subscription_fingerprint = fingerprint
+        return True
+    
+    def _batch_row(self, user, subscription: Optional[SubscriptionResponse], fingerprint: str, fetched_at: datetime) -> tuple:
+        """Build the VALUES row for a batched update, mirroring apply_subscription()"""
+        schedule = self._schedule(user, subscription)
+        if subscription:
+            return (
+                user.id, subscription.status.value, subscription.plan_id,
+                subscription.start_date, subscription.end_date,
+                subscription.my_saas_app_id, subscription.client_id, fetched_at
+            ) + schedule + (fingerprint,)
+        # my_saas_app_id / beag_client_id are NULL here and left untouched by COALESCE
+        return (user.id, None, None, None, None, None, None, fetched_at) + schedule + (fingerprint,)
+    
+    def _batch_update_statement(self, rows: List[tuple]):
+        """
+        Single UPDATE ... FROM (VALUES ...) statement applying a whole batch
+        
+        Each row's last_synced is its lookup time; users a newer webhook event was
+        applied to in the meantime are skipped.
+        """
+        v = values(*[column(name, type_) for name, type_ in BATCH_COLUMNS], name="v").data(rows)
+        c = {name: cast(v.c[name], type_) for name, type_ in BATCH_COLUMNS}
+        return (
+            update(User)
+            .where(User.id == c["id"], no_newer_event(c["last_synced"]))
+            .values(
+                subscription_status=c["subscription_status"],
+                plan_id=c["plan_id"],
+                start_date=c["start_date"],
+                end_date=c["end_date"],
+                my_saas_app_id=func.coalesce(c["my_saas_app_id"], User.my_saas_app_id),
+                beag_client_id=func.coalesce(c["beag_client_id"], User.beag_client_id),
+                last_synced=c["last_synced"],
+                next_sync_at=c["next_sync_at"],
+                status_changed_at=c["status_changed_at"],
+                status_change_count=c["status_change_count"],
+                subscription_fingerprint=c["subscription_fingerprint"]
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    def _freshness_update_statement(self, rows: List[tuple]):
+        """
+        Batched UPDATE for users whose subscription didn't change
+        
+        Only records when they were synced and when to check them next, skipping
+        users a newer webhook event was applied to. updated_at is set to itself so
+        its onupdate default doesn't fire.
+        """
+        v = values(*[column(name, type_) for name, type_ in FRESHNESS_COLUMNS], name="v").data(rows)
+        c = {name: cast(v.c[name], type_) for name, type_ in FRESHNESS_COLUMNS}
+        return (
+            update(User)
+            .where(User.id == c["id"], no_newer_event(c["last_synced"]))
+            .values(
+                last_synced=c["last_synced"],
+                next_sync_at=c["next_sync_at"],
+                updated_at=User.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    def _write_batch(self, db: Session, changed: List[tuple], unchanged: List[tuple]) -> None:
+        if changed:
+            db.execute(self._batch_update_statement([row for _, _, row in changed]))
+        if unchanged:
+            db.execute(self._freshness_update_statement([row for _, _, row in unchanged]))
+    
+    def _flush_batch(self, db: Session, batch: List[Tuple]):
+        """
+        Write a batch of (user, subscription, fetched_at) sync results in one transaction
+        
+        Rows are written in id order, the order webhook processing locks users in,
+        so the two can't deadlock. Results whose fingerprint matches the stored one only get their sync
+        bookkeeping refreshed; the rest get a full update. Both statements run inside
+        a savepoint. If that fails, each row is retried in its own savepoint so one
+        bad row only fails that user.
+        Returns (succeeded, failed) lists; succeeded holds (user, subscription, changed).
+        """
+        if not batch:
+            return [], []
+        
+        changed, unchanged = [], []
+        for user, subscription, fetched_at in sorted(batch, key=lambda item: item[0].id):
+            fingerprint = subscription_fingerprint(subscription)
+            if fingerprint == user.subscription_fingerprint:
+                unchanged.append((user, subscription, (user.id, fetched_at, self._schedule(user, subscription)[2])))
+            else:
+                changed.append((user, subscription, self._batch_row(user, subscription, fingerprint, fetched_at)))
+        
+        try:
+            with db.begin_nested():
+                self._write_batch(db, changed, unchanged)
+            # last_synced changed for every user, so every cached row is out of date
+            user_cache.invalidate_on_commit(db, [user.email for user, _, _ in batch])
+            db.commit()
+            return (
+                [(user, subscription, True) for user, subscription, _ in changed]
+                + [(user, subscription, False) for user, subscription, _ in unchanged]
+            ), []
+        except Exception as e:
+            logger.warning("Batch update of %d users failed (%s), retrying row by row", len(batch), e)
+        
+        succeeded, failed = [], []
+        for item, is_changed in [(item, True) for item in changed] + [(item, False) for item in unchanged]:
+            user, subscription, _ = item
+            try:
+                with db.begin_nested():
+                    if is_changed:
+                        self._write_batch(db, [item], [])
+                    else:
+                        self._write_batch(db, [], [item])
+                succeeded.append((user, subscription, is_changed))
+            except Exception as e:
+                logger.error("Error syncing user %s: %s", user.email, e)
+                failed.append((user, subscription))
+        user_cache.invalidate_on_commit(db, [user.email for user, _, _ in succeeded])
+        db.commit()
+        return succeeded, failed
+    
+    def _count_results(self, succeeded: List[Tuple], failed_count: int) -> None:
+        """Add a flushed batch to the sync metrics"""
+        changed = sum(1 for _, _, is_changed in succeeded if is_changed)
+        SYNC_USERS.labels("changed").inc(changed)
+        SYNC_USERS.labels("unchanged").inc(len(succeeded) - changed)
+        SYNC_USERS.labels("failed").inc(failed_count)
+    
+    def _log_update(self, user, subscription: Optional[SubscriptionResponse], level: int = logging.INFO) -> None:
+        if not logger.isEnabledFor(level):
+            return
+        if subscription:
+            # Log detailed sync information
+            start_date_str = subscription.start_date.strftime("%Y-%m-%d") if subscription.start_date else "N/A"
+            end_date_str = subscription.end_date.strftime("%Y-%m-%d") if subscription.end_date else "N/A"
+            logger.log(
+                level, "✅ Updated user: %s | Status: %s | Plan: %s | Period: %s to %s",
+                user.email, subscription.status, subscription.plan_id, start_date_str, end_date_str
+            )
+        else:
+            logger.log(level, "🚫 Updated user: %s | Status: NO_SUBSCRIPTION | Plan: None | Period: N/A to N/A", user.email)
+    
+    async def sync_user(self, db: Session, user: User, fresh: bool = False) -> bool:
         """
         Sync a single user's subscription data
         
+        `fresh` bypasses the Beag lookup cache.
         Returns True if successful, False otherwise
         """
         try:
             # Fetch latest subscription from Beag
-            subscription = await self.beag_client.get_subscription_by_email(user.email)
+            fetched_at = scheduler.utcnow()
+            subscription = await self.beag_client.get_subscription_by_email(user.email, fresh=fresh)
             
-            if subscription:
-                # Update user with subscription data
-                user.subscription_status = subscription.status
-                user.plan_id = subscription.plan_id
-                user.start_date = subscription.start_date
-                user.end_date = subscription.end_date
-                user.my_saas_app_id = subscription.my_saas_app_id
-                user.beag_client_id = subscription.client_id
-                user.last_synced = datetime.utcnow()
-                
-                db.commit()
-                
-                # Log detailed sync information
-                start_date_str = subscription.start_date.strftime("%Y-%m-%d") if subscription.start_date else "N/A"
-                end_date_str = subscription.end_date.strftime("%Y-%m-%d") if subscription.end_date else "N/A"
-                logger.info(f"✅ Updated user: {user.email} | Status: {subscription.status} | Plan: {subscription.plan_id} | Period: {start_date_str} to {end_date_str}")
-                return True
-            else:
-                # User has no active subscription
-                user.subscription_status = None
-                user.plan_id = None
-                user.start_date = None
-                user.end_date = None
-                user.last_synced = datetime.utcnow()
-                
-                db.commit()
-                logger.info(f"🚫 Updated user: {user.email} | Status: NO_SUBSCRIPTION | Plan: None | Period: N/A to N/A")
-                return True
-                
+            changed = await run_db(self._save_user, db, user, subscription, fetched_at)
+            if changed:
+                self._log_update(user, subscription)
+            return True
+        
+        except BeagUnavailableError as e:
+            # Subscription state unknown: keep whatever we already have
+            logger.warning("Keeping existing subscription data for %s: %s", user.email, e)
+            return False
         except Exception as e:
-            logger.error(f"Error syncing user {user.email}: {str(e)}")
-            db.rollback()
+            logger.error("Error syncing user %s: %s", user.email, e)
+            await run_db(self._discard_changes, db, user)
             return False
     
-    async def sync_all_users(self) -> dict:
+    def _save_user(self, db: Session, user: User, subscription: Optional[SubscriptionResponse], fetched_at: datetime) -> bool:
+        """Apply and commit one user's subscription (blocking, run via run_db)"""
+        # Locked until the commit, so a webhook event can't be applied in between
+        db.refresh(user, with_for_update=True)
+        changed = self.apply_subscription(user, subscription, fetched_at)
+        db.commit()
+        # Reload now so callers serializing the user don't lazy-load on the event loop
+        db.refresh(user)
+        return changed
+    
+    def _discard_changes(self, db: Session, user: User) -> None:
+        """Roll back a failed sync and reload the user (blocking, run via run_db)"""
+        db.rollback()
+        try:
+            db.refresh(user)
+        except Exception as e:
+            logger.error("Error reloading user %s: %s", user.email, e)
+    
+    def _fetch_page(self, db: Session, last_id: int, page_size: int, due_before: Optional[datetime]) -> list:
+        query = db.query(*SYNC_USER_COLUMNS).filter(User.id > last_id)
+        if due_before is not None:
+            query = query.filter(self._due_filter(due_before))
+        return query.order_by(User.id).limit(page_size).all()
+    
+    def _fetch_users_by_id(self, db: Session, user_ids: List[int]) -> list:
+        return db.query(*SYNC_USER_COLUMNS).filter(User.id.in_(user_ids)).order_by(User.id).all()
+    
+    async def _iter_users(
+        self,
+        db: Session,
+        page_size: int,
+        due_before: Optional[datetime] = None,
+        user_ids: Optional[List[int]] = None,
+        telemetry: Optional[SyncTelemetry] = None
+    ):
+        """
+        Stream user rows in id order using keyset pagination
+        
+        Only one page is held at a time and rows are plain tuples carrying just the
+        columns the sync needs, so memory stays flat as the users table grows and
+        nothing accumulates in the identity map. With `due_before`, only users whose
+        next_sync_at has passed (or was never set) are returned. With `user_ids`,
+        only those users are returned, `page_size` ids at a time.
+        """
+        telemetry = telemetry or SyncTelemetry()
+        if user_ids is not None:
+            user_ids = sorted(user_ids)
+            for start in range(0, len(user_ids), page_size):
+                with telemetry.phase("read_users"):
+                    page = await run_db(self._fetch_users_by_id, db, user_ids[start:start + page_size])
+                for row in page:
+                    yield row
+            return
+        
+        last_id = 0
+        while True:
+            with telemetry.phase("read_users"):
+                page = await run_db(self._fetch_page, db, last_id, page_size, due_before)
+            if not page:
+                return
+            last_id = page[-1].id
+            for row in page:
+                yield row
+    
+    def _count_users(self, db: Session, due_before: Optional[datetime] = None) -> int:
+        query = db.query(func.count(User.id))
+        if due_before is not None:
+            query = query.filter(self._due_filter(due_before))
+        return query.scalar()
+    
+    def _start_log(self, db: Session, run_type: str) -> SyncLog:
+        sync_log = SyncLog(status="IN_PROGRESS", run_type=run_type)
+        db.add(sync_log)
+        db.commit()
+        return sync_log
+    
+    def _finish_log(
+        self,
+        db: Session,
+        sync_log: SyncLog,
+        status: str,
+        users_synced: int,
+        users_failed: int,
+        error_message: Optional[str] = None,
+        details: Optional[dict] = None
+    ) -> None:
+        """Close a SyncLog; `details` sets its telemetry columns"""
+        sync_log.completed_at = datetime.utcnow()
+        sync_log.users_synced = users_synced
+        sync_log.users_failed = users_failed
+        sync_log.status = status
+        if error_message:
+            sync_log.error_message = error_message
+        for column, value in (details or {}).items():
+            setattr(sync_log, column, value)
+        db.commit()
+    
+    def _due_filter(self, due_before: datetime):
+        return or_(User.next_sync_at.is_(None), User.next_sync_at <= due_before)
+    
+    async def _fetch(self, user, telemetry: Optional[SyncTelemetry] = None):
+        """Fetch one user's subscription, returning (user, subscription, error, fetched_at)
+        
+        `user` only needs `id` and `email` attributes (an ORM object or a result row).
+        `fetched_at` is when the request was started.
+        """
+        started = time.perf_counter()
+        fetched_at = scheduler.utcnow()
+        try:
+            with SYNC_LOOKUPS_IN_FLIGHT.track_inprogress():
+                # Sweeps always ask Beag directly (and refresh the lookup cache)
+                subscription = await self.beag_client.get_subscription_by_email(user.email, fresh=True)
+            return user, subscription, None, fetched_at
+        except Exception as e:
+            return user, None, e, fetched_at
+        finally:
+            if telemetry:
+                telemetry.record_lookup(time.perf_counter() - started)
+    
+    async def _fetch_concurrently(self, users: AsyncIterator, concurrency: int, telemetry: Optional[SyncTelemetry] = None):
+        """
+        Fetch subscriptions for users with at most `concurrency` Beag requests in flight
+        
+        Yields (user, subscription, error, fetched_at) tuples in completion order. Only network
+        I/O happens concurrently; the caller applies results to the session serially.
+        """
+        pending = set()
+        
+        async def schedule_next() -> None:
+            user = await anext(users, None)
+            if user is not None:
+                pending.add(asyncio.ensure_future(self._fetch(user, telemetry)))
+        
+        for _ in range(concurrency):
+            await schedule_next()
+        
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    await schedule_next()
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await users.aclose()
+    
+    async def sync_user_batch(self, db: Session, user_ids: List[int], concurrency: Optional[int] = None) -> dict:
+        """
+        Sync a batch of users by id and write the results in one flush
+        
+        Used by the job queue consumers. Returns the user ids grouped by outcome:
+        "synced", "failed" (id -> error), "deferred" (not attempted because the Beag
+        circuit breaker is open) and "missing" (no such user).
+        """
+        concurrency = max(1, concurrency or settings.sync_concurrency)
+        rows = await run_db(self._fetch_users_by_id, db, user_ids)
+        found = {row.id for row in rows}
+        
+        async def iter_rows():
+            for row in rows:
+                yield row
+        
+        batch, failed, deferred = [], {}, []
+        async with aclosing(self._fetch_concurrently(iter_rows(), concurrency)) as results:
+            async for user, subscription, error, fetched_at in results:
+                if isinstance(error, BeagCircuitOpenError):
+                    deferred.append(user.id)
+                elif error is not None:
+                    # Row is left untouched; a Beag outage must not wipe subscriptions
+                    logger.debug("Error syncing user %s: %s", user.email, error)
+                    failed[user.id] = str(error)
+                else:
+                    batch.append((user, subscription, fetched_at))
+        
+        succeeded, write_failed = await run_db(self._flush_batch, db, batch)
+        for user, subscription, changed in succeeded:
+            if changed:
+                # Per user, so debug only; consumers log a summary per batch
+                self._log_update(user, subscription, logging.DEBUG)
+        for user, _ in write_failed:
+            failed[user.id] = "Database write failed"
+        self._count_results(succeeded, len(failed))
+        if failed:
+            logger.warning("⚠️  %d of %d users in the batch failed to sync (e.g. %s)", len(failed), len(user_ids), next(iter(failed.values())))
+        
+        return {
+            "synced": [user.id for user, _, _ in succeeded],
+            "failed": failed,
+            "deferred": deferred,
+            "missing": [user_id for user_id in user_ids if user_id not in found]
+        }
+    
+    async def sync_all_users(
+        self,
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        page_size: Optional[int] = None,
+        due_only: bool = False,
+        user_ids: Optional[List[int]] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> dict:
         """
         Sync all users' subscription data
         
+        With `due_only`, only users whose next_sync_at has passed are synced and
+        nothing is logged to SyncLog when no user is due. With `user_ids`, only
+        those users are synced. `on_progress(users_synced, users_failed)` is called
+        after every batch is written.
+        
+        Beag lookups are fanned out with up to `concurrency` requests in flight
+        (defaults to SYNC_CONCURRENCY); database writes stay on the single session
+        and are applied in batches of `batch_size` users (defaults to SYNC_BATCH_SIZE).
+        Users are read in id-ordered pages of `page_size` (defaults to SYNC_PAGE_SIZE).
         Returns a summary of the sync operation
         """
+        concurrency = max(1, concurrency or settings.sync_concurrency)
+        batch_size = min(max(1, batch_size or settings.sync_batch_size), MAX_BATCH_SIZE)
+        page_size = max(1, page_size or settings.sync_page_size)
+        due_before = scheduler.utcnow() if due_only else None
+        
+        if circuit_open():
+            # Beag is down: leave every row as it is and try again on the next pass
+            logger.warning("⏸️  Skipping subscription sync, Beag circuit breaker is open")
+            return {
+                "total_users": 0,
+                "users_synced": 0,
+                "users_failed": 0,
+                "status": "SKIPPED",
+                "reason": "Beag circuit breaker open"
+            }
+        
         db = SessionLocal()
-        sync_log = SyncLog(status="IN_PROGRESS")
-        db.add(sync_log)
-        db.commit()
+        
+        # All database work below goes through run_db so the sweep never blocks
+        # the event loop it shares with the API
+        if due_only:
+            due_users = await run_db(self._count_users, db, due_before)
+            if not due_users:
+                await run_db(db.close)
+                return {
+                    "total_users": 0,
+                    "users_synced": 0,
+                    "users_failed": 0,
+                    "status": "SKIPPED"
+                }
+        
+        run_type = "users" if user_ids is not None else "due" if due_only else "full"
+        sync_log = await run_db(self._start_log, db, run_type)
+        
+        # Process-wide counter; lookups outside this sweep during the run are included
+        retries_before = get_rate_limiter_stats()["retries"]
         
         users_synced = 0
         users_failed = 0
+        users_changed = 0
         active_subscriptions = 0
         inactive_subscriptions = 0
+        aborted_reason = None
+        started = time.monotonic()
+        telemetry = SyncTelemetry()
+        changes_by_status = Counter()
+        
+        # Per-user lines are sampled; the end-of-run summary covers everyone
+        update_sampler = LogSampler(settings.sync_log_sample_first, settings.sync_log_sample_every)
+        error_sampler = LogSampler(settings.sync_log_sample_first, settings.sync_log_sample_every)
+        
+        def run_details(duration: float, users_per_second: float) -> dict:
+            return {
+                "duration_seconds": round(duration, 3),
+                "users_per_second": users_per_second,
+                "users_changed": users_changed,
+                "users_unchanged": users_synced - users_changed,
+                "beag_retries": get_rate_limiter_stats()["retries"] - retries_before,
+                "telemetry": telemetry.to_dict()
+            }
         
         try:
-            # Get all users
-            users = db.query(User).all()
-            total_users = len(users)
+            # Users are streamed page by page instead of loaded all at once
+            if due_only:
+                total_users = due_users
+            elif user_ids is not None:
+                total_users = len(user_ids)
+            else:
+                with telemetry.phase("count_users"):
+                    total_users = await run_db(self._count_users, db)
+            users = self._iter_users(db, page_size, due_before, user_ids, telemetry)
             
-            logger.info(f"🔄 Starting subscription sync for {total_users} users...")
+            logger.info("🔄 Starting subscription sync for %s %susers (concurrency: %s, batch size: %s)...", total_users, "due " if due_only else "", concurrency, batch_size)
             
-            # Sync each user
-            for user in users:
-                success = await self.sync_user(db, user)
-                if success:
+            pending_batch = []
+            
+            def record(results):
+                nonlocal users_synced, users_failed, users_changed, active_subscriptions, inactive_subscriptions
+                succeeded, failed = results
+                users_failed += len(failed)
+                self._count_results(succeeded, len(failed))
+                if failed:
+                    telemetry.record_error("Database write failed", len(failed))
+                for user, subscription, changed in succeeded:
+                    if changed:
+                        # Unchanged users only had their sync timestamps refreshed
+                        if update_sampler.allow():
+                            self._log_update(user, subscription)
+                        changes_by_status[subscription.status.upper() if subscription else "NO_SUBSCRIPTION"] += 1
+                        users_changed += 1
                     users_synced += 1
                     # Count subscription types after sync
-                    if user.subscription_status and user.subscription_status.upper() in ['PAID', 'ACTIVE', 'TRIAL']:
+                    if subscription and subscription.status.upper() in ACTIVE_STATUSES:
                         active_subscriptions += 1
                     else:
                         inactive_subscriptions += 1
-                else:
-                    users_failed += 1
+                if on_progress:
+                    on_progress(users_synced, users_failed)
             
-            # Update sync log
-            sync_log.completed_at = datetime.utcnow()
-            sync_log.users_synced = users_synced
-            sync_log.users_failed = users_failed
+            # Sync each user, writing results back in batches
+            async with aclosing(self._fetch_concurrently(users, concurrency, telemetry)) as results:
+                async for user, subscription, error, fetched_at in results:
+                    if isinstance(error, BeagCircuitOpenError):
+                        # Beag went down mid-sweep: stop here, remaining users keep their data
+                        # (and stay due, so the next pass picks them up)
+                        telemetry.record_error(error)
+                        aborted_reason = "Beag circuit breaker opened during sync"
+                        logger.warning("⏸️  %s, stopping after %s users", aborted_reason, users_synced + users_failed)
+                        break
+                    if error is not None:
+                        # Row is left untouched; a Beag outage must not wipe subscriptions
+                        if error_sampler.allow():
+                            logger.error("Error syncing user %s: %s", user.email, error)
+                        users_failed += 1
+                        SYNC_USERS.labels("failed").inc()
+                        telemetry.record_error(error)
+                        continue
+                    
+                    pending_batch.append((user, subscription, fetched_at))
+                    if len(pending_batch) >= batch_size:
+                        with telemetry.phase("db_writes"):
+                            results_written = await run_db(self._flush_batch, db, pending_batch)
+                        record(results_written)
+                        pending_batch = []
+            
+            with telemetry.phase("db_writes"):
+                results_written = await run_db(self._flush_batch, db, pending_batch)
+            record(results_written)
+            
+            # Users added mid-sweep are picked up by later pages, so report what was processed
+            total_users = users_synced + users_failed
+            duration = time.monotonic() - started
+            users_per_second = round(total_users / duration, 2) if duration > 0 else 0.0
             
             if users_failed == 0:
-                sync_log.status = "SUCCESS"
+                status = "SUCCESS"
             elif users_synced > 0:
-                sync_log.status = "PARTIAL"
+                status = "PARTIAL"
             else:
-                sync_log.status = "FAILED"
+                status = "FAILED"
             
-            db.commit()
+            if aborted_reason:
+                status = "PARTIAL" if users_synced > 0 else "FAILED"
+            
+            # Update sync log
+            details = run_details(duration, users_per_second)
+            await run_db(self._finish_log, db, sync_log, status, users_synced, users_failed, aborted_reason, details)
+            SYNC_RUNS.labels(status).inc()
+            SYNC_RUN_DURATION.observe(duration)
             
             # Enhanced completion summary
-            logger.info(f"🎯 Sync completed successfully!")
-            logger.info(f"📊 Summary: {users_synced} users processed, {users_failed} failed")
-            logger.info(f"📈 Active subscriptions: {active_subscriptions} | Inactive/None: {inactive_subscriptions}")
+            logger.info("🎯 Sync completed successfully!")
+            logger.info("📊 Summary: %s users processed, %s failed", users_synced, users_failed)
+            logger.info("✏️  Changed: %s | Unchanged: %s", users_changed, users_synced - users_changed)
+            if changes_by_status:
+                logger.info("🔀 Changed by status: %s", ", ".join(f"{name}: {count}" for name, count in changes_by_status.most_common()))
+            logger.info("📈 Active subscriptions: %s | Inactive/None: %s", active_subscriptions, inactive_subscriptions)
+            logger.info("⏱️  Duration: %.1fs | Throughput: %s users/sec", duration, users_per_second)
             if users_failed > 0:
-                logger.warning(f"⚠️  {users_failed} users failed to sync - check logs above for details")
+                top_errors = ", ".join(f"{error['error']} ({error['count']})" for error in details["telemetry"]["top_errors"])
+                logger.warning("⚠️  %s users failed to sync - top errors: %s", users_failed, top_errors)
+            if update_sampler.suppressed or error_sampler.suppressed:
+                logger.info(
+                    "🔇 Sampled per-user logs: %s update and %s error lines suppressed",
+                    update_sampler.suppressed, error_sampler.suppressed
+                )
             
-            return {
+            summary = {
                 "total_users": total_users,
                 "users_synced": users_synced,
                 "users_failed": users_failed,
-                "status": sync_log.status
+                "users_changed": users_changed,
+                "users_unchanged": users_synced - users_changed,
+                "status": status,
+                "duration_seconds": round(duration, 3),
+                "users_per_second": users_per_second,
+                "sync_log_id": sync_log.id,
+                "beag_retries": details["beag_retries"],
+                "telemetry": details["telemetry"]
             }
-            
+            if aborted_reason:
+                summary["error"] = aborted_reason
+            return summary
+        
         except Exception as e:
-            logger.error(f"💥 Critical error during sync operation: {str(e)}")
-            sync_log.completed_at = datetime.utcnow()
-            sync_log.status = "FAILED"
-            sync_log.error_message = str(e)
-            db.commit()
+            logger.error("💥 Critical error during sync operation: %s", e)
+            await run_db(db.rollback)
+            telemetry.record_error(e)
+            duration = time.monotonic() - started
+            details = run_details(duration, round((users_synced + users_failed) / duration, 2) if duration > 0 else 0.0)
+            await run_db(self._finish_log, db, sync_log, "FAILED", users_synced, users_failed, str(e), details)
+            SYNC_RUNS.labels("FAILED").inc()
+            SYNC_RUN_DURATION.observe(duration)
             
             # Enhanced error summary
-            logger.error(f"❌ Sync failed after processing {users_synced} users successfully")
+            logger.error("❌ Sync failed after processing %s users successfully", users_synced)
             if users_synced > 0:
-                logger.info(f"📊 Partial success: {users_synced} users were updated before failure")
+                logger.info("📊 Partial success: %s users were updated before failure", users_synced)
             
             return {
                 "total_users": users_synced + users_failed,
                 "users_synced": users_synced,
                 "users_failed": users_failed,
                 "status": "FAILED",
-                "error": str(e)
+                "error": str(e),
+                "duration_seconds": round(duration, 3)
             }
         finally:
-            db.close()
\ No newline at end of file
+            await run_db(db.close)
+    
+    async def sync_due_users(self) -> dict:
+        """Sync only the users whose adaptive next_sync_at has passed"""
+        return await self.sync_all_users(due_only=True)
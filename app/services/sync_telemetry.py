@@ -0,0 +1,88 @@
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import List, Optional, Union
+from app.services.beag_client import BeagUnavailableError
+
+# Lookup latencies kept per run for percentiles (reservoir sample beyond this)
+LATENCY_SAMPLE_SIZE = 10000
+
+# Distinct error classes stored with a run
+TOP_ERRORS = 5
+
+
+def error_class(error: BaseException) -> str:
+    """Group errors by type and user-independent cause, e.g. "BeagUnavailableError: HTTP 503\""""
+    if isinstance(error, BeagUnavailableError):
+        return f"{type(error).__name__}: {error.reason}"
+    return type(error).__name__
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class SyncTelemetry:
+    """
+    Collects where a sync run spends its time, for storing with its SyncLog
+    
+    Phases are timed on the sweep coroutine itself: time spent there reading users
+    or writing batches is time no new results were being applied. Everything else
+    in the run is "waiting_on_beag". Lookup latencies are per user, retries included.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phase_seconds = defaultdict(float)
+        self.lookups = 0
+        self.max_latency = 0.0
+        self.latency_sample: List[float] = []
+        self.errors = Counter()
+    
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] += time.perf_counter() - started
+    
+    def record_lookup(self, latency: float) -> None:
+        self.lookups += 1
+        self.max_latency = max(self.max_latency, latency)
+        if len(self.latency_sample) < LATENCY_SAMPLE_SIZE:
+            self.latency_sample.append(latency)
+        else:
+            slot = random.randrange(self.lookups)
+            if slot < LATENCY_SAMPLE_SIZE:
+                self.latency_sample[slot] = latency
+    
+    def record_error(self, error: Union[BaseException, str], count: int = 1) -> None:
+        self.errors[error if isinstance(error, str) else error_class(error)] += count
+    
+    def latency_percentiles(self) -> Optional[dict]:
+        if not self.latency_sample:
+            return None
+        values = sorted(self.latency_sample)
+        return {
+            "count": self.lookups,
+            "p50": round(_percentile(values, 0.50), 4),
+            "p90": round(_percentile(values, 0.90), 4),
+            "p99": round(_percentile(values, 0.99), 4),
+            "max": round(self.max_latency, 4),
+            "mean": round(sum(values) / len(values), 4)
+        }
+    
+    def to_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        phases = {name: round(seconds, 3) for name, seconds in self.phase_seconds.items()}
+        phases["waiting_on_beag"] = round(max(0.0, elapsed - sum(self.phase_seconds.values())), 3)
+        return {
+            "phase_seconds": phases,
+            "beag_latency_seconds": self.latency_percentiles(),
+            "top_errors": [
+                {"error": name, "count": count} for name, count in self.errors.most_common(TOP_ERRORS)
+            ]
+        }
@@ -0,0 +1,207 @@
+import asyncio
+import json
+from typing import Iterable, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import DedicatedConnection, SessionLocal
+from app.models.user import User
+from app.schemas.user import User as UserSchema
+from app.services.cache import MISSING, TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Postgres LISTEN/NOTIFY channel used to invalidate entries in other processes
+NOTIFY_CHANNEL = "user_cache_invalidate"
+
+# email -> serialized user row, shared by the read endpoints of this process
+_cache = TTLCache(settings.user_cache_max_size)
+
+# Session.info key collecting emails to invalidate when the transaction commits
+_PENDING_KEY = "user_cache_pending"
+
+# NOTIFY payloads must stay under 8000 bytes; emails are sent as JSON lists up to this size
+NOTIFY_PAYLOAD_BYTES = 7900
+
+
+def _serialize(user: User) -> dict:
+    data = UserSchema.from_orm(user).dict()
+    # Not part of the API schema, but the entitlement max-age is bounded by it
+    data["next_sync_at"] = user.next_sync_at
+    return data
+
+
+def get_user(db: Session, email: str) -> Optional[dict]:
+    """
+    Read-through lookup of a user row by email
+    
+    Returns the row as a dict (User schema fields plus next_sync_at), or None if
+    there is no such user
+    """
+    if not settings.user_cache_enabled:
+        user = db.query(User).filter(User.email == email).first()
+        return _serialize(user) if user else None
+    
+    cached = _cache.get(email)
+    if cached is not MISSING:
+        return cached
+    
+    user = db.query(User).filter(User.email == email).first()
+    if not user:
+        return None
+    data = _serialize(user)
+    _cache.set(email, data, settings.user_cache_ttl_seconds)
+    return data
+
+
+def peek(email: str) -> Optional[dict]:
+    """Cached row for this email without touching the database (None if not cached)"""
+    if not settings.user_cache_enabled:
+        return None
+    cached = _cache.get(email)
+    return None if cached is MISSING else cached
+
+
+def invalidate_on_commit(db: Session, emails: Iterable[str]) -> None:
+    """
+    Drop cached rows for these emails once the session's transaction commits
+    
+    ORM changes to User objects are picked up automatically; this is for writes
+    that bypass the ORM, like the batched sync UPDATEs.
+    """
+    db.info.setdefault(_PENDING_KEY, set()).update(emails)
+
+
+def clear() -> None:
+    _cache.clear()
+
+
+def notify_payloads(emails: Iterable[str]) -> List[str]:
+    """Emails as JSON lists, as few as fit under NOTIFY_PAYLOAD_BYTES each"""
+    payloads, chunk, size = [], [], 2
+    for email in emails:
+        item_size = len(json.dumps(email).encode()) + 1
+        if chunk and size + item_size > NOTIFY_PAYLOAD_BYTES:
+            payloads.append(json.dumps(chunk, separators=(",", ":")))
+            chunk, size = [], 2
+        chunk.append(email)
+        size += item_size
+    if chunk:
+        payloads.append(json.dumps(chunk, separators=(",", ":")))
+    return payloads
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_user_changes(session, flush_context):
+    emails = [
+        obj.email for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User) and obj.email
+    ]
+    if emails:
+        session.info.setdefault(_PENDING_KEY, set()).update(emails)
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _notify_other_processes(session):
+    # before_commit runs ahead of the commit's own flush; flush now so after_flush
+    # has collected every pending User change
+    session.flush()
+    # NOTIFY is transactional: other listeners only see it if the write commits.
+    # One notification per commit (or per ~8 kB of emails), so a batch flush
+    # doesn't overrun the listener's buffer between polls
+    emails = session.info.get(_PENDING_KEY)
+    if emails and settings.user_cache_notify:
+        session.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": NOTIFY_CHANNEL, "payloads": notify_payloads(sorted(emails))}
+        )
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_local(session):
+    # Evict after the commit so a concurrent reader can't re-cache the old row
+    for email in session.info.pop(_PENDING_KEY, ()):
+        _cache.delete(email)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+class InvalidationListener:
+    """
+    Evicts entries written by other processes, via Postgres LISTEN/NOTIFY
+    
+    Holds one dedicated connection that is polled every USER_CACHE_NOTIFY_POLL_SECONDS
+    (pg8000 only receives notifications while talking to the server). If the
+    connection drops, the whole cache is cleared since notifications may have been missed.
+    """
+    
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def _listen(self, conn) -> None:
+        cursor = conn.cursor()
+        cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        conn.commit()
+    
+    def _poll(self, conn) -> Optional[list]:
+        """Emails notified since the last poll, or None if some may have been lost"""
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        conn.commit()
+        notifications = conn.driver_connection.notifications
+        # pg8000 keeps the latest `maxlen` notifications and silently drops older ones
+        overflowed = notifications.maxlen is not None and len(notifications) >= notifications.maxlen
+        emails = []
+        while notifications:
+            _pid, _channel, payload = notifications.popleft()
+            try:
+                emails.extend(json.loads(payload))
+            except ValueError:
+                overflowed = True
+        return None if overflowed else emails
+    
+    async def _run(self) -> None:
+        while True:
+            connection = DedicatedConnection()
+            try:
+                conn = await connection.open(self._listen)
+                logger.info(f"Listening for user cache invalidations on '{NOTIFY_CHANNEL}'")
+                while True:
+                    emails = await connection.call(self._poll, conn)
+                    if emails is None:
+                        logger.warning("User cache notifications may have been dropped, clearing the cache")
+                        _cache.clear()
+                    else:
+                        for email in emails:
+                            _cache.delete(email)
+                    await asyncio.sleep(settings.user_cache_notify_poll_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"User cache invalidation listener error: {str(e)}")
+                _cache.clear()
+            finally:
+                # Never hand a LISTENing connection back to the pool
+                await connection.close()
+            await asyncio.sleep(5)
+
+
+invalidation_listener = InvalidationListener()
@@ -0,0 +1,254 @@
+import asyncio
+import csv
+import io
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import delete, insert, select, text, update
+from app.config import settings
+from app.database import engine, run_db
+from app.models.import_job import ImportJob
+from app.services import sync_queue
+from app.services.sync_service import SubscriptionSyncService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Cheap shape check: per-email validation with email-validator costs ~70µs,
+# which alone would take seconds for a 100k import
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Rejected emails kept on the job for its status
+INVALID_SAMPLE_SIZE = 20
+
+# A running in-process sync writes its progress to import_jobs this often
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+# Finished jobs older than this are deleted when a new import starts
+JOB_RETENTION_DAYS = 30
+
+# Strong references to running sync tasks so they aren't garbage collected
+_tasks = set()
+
+
+def job_to_dict(job) -> dict:
+    """API representation of an import_jobs row"""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "emails_received": job.emails_received,
+        "emails_unique": job.emails_unique,
+        "emails_invalid": job.emails_invalid,
+        "invalid_sample": job.invalid_sample or [],
+        "users_inserted": job.users_inserted,
+        "users_existing": job.users_existing,
+        "sync_progress": {
+            "total": job.users_inserted,
+            "synced": job.users_synced,
+            "failed": job.users_failed,
+            "remaining": max(0, job.users_inserted - job.users_synced - job.users_failed)
+        },
+        "sync_summary": job.sync_summary,
+        "error": job.error
+    }
+
+
+def parse_csv(body: str) -> List[str]:
+    """Emails from the first column of a CSV body; an 'email' header row is skipped"""
+    emails = []
+    for row in csv.reader(io.StringIO(body)):
+        if not row:
+            continue
+        emails.append(row[0])
+    if emails and emails[0].strip().lower() == "email":
+        emails = emails[1:]
+    return emails
+
+
+def normalize_emails(raw_emails: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    Strip, validate and dedupe emails, keeping first-seen order
+    
+    Domains are lowercased like POST /api/users/ does, so both paths store the same
+    address for the same input. Returns (emails, invalid).
+    """
+    seen = set()
+    emails, invalid = [], []
+    for raw in raw_emails:
+        email = str(raw).strip()
+        if not EMAIL_PATTERN.match(email):
+            invalid.append(email)
+            continue
+        local_part, domain = email.rsplit("@", 1)
+        email = f"{local_part}@{domain.lower()}"
+        if email not in seen:
+            seen.add(email)
+            emails.append(email)
+    return emails, invalid
+
+
+def _copy_line(email: str) -> str:
+    # COPY text format: backslash is the escape character
+    return email.replace("\\", "\\\\") + "\n"
+
+
+def _copy_users(conn, emails: List[str]) -> List[int]:
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("CREATE TEMP TABLE user_import (email text NOT NULL) ON COMMIT DROP")
+        cursor.execute("COPY user_import (email) FROM STDIN", stream=(_copy_line(e) for e in emails))
+    finally:
+        cursor.close()
+    result = conn.execute(text(
+        "INSERT INTO users (email) SELECT email FROM user_import "
+        "ON CONFLICT (email) DO NOTHING RETURNING id"
+    ))
+    return [row.id for row in result]
+
+
+def insert_emails(emails: List[str]) -> List[int]:
+    """
+    Insert users for these emails in one transaction, skipping existing ones
+    
+    Emails are streamed into a temp table with COPY and moved into users with a
+    single INSERT ... ON CONFLICT DO NOTHING. Returns the ids of the new users.
+    """
+    with engine.begin() as conn:
+        return _copy_users(conn, emails)
+
+
+def create_job(job_id: str, received: int, emails: List[str], invalid: List[str]) -> List[int]:
+    """
+    Insert the users and their import_jobs row in one transaction (blocking)
+    
+    Returns the ids of the new users. Old finished jobs are cleaned up on the way.
+    """
+    with engine.begin() as conn:
+        user_ids = _copy_users(conn, emails) if emails else []
+        conn.execute(insert(ImportJob).values(
+            id=job_id,
+            status="PENDING" if user_ids else "SUCCESS",
+            emails_received=received,
+            emails_unique=len(emails),
+            emails_invalid=len(invalid),
+            invalid_sample=invalid[:INVALID_SAMPLE_SIZE],
+            users_inserted=len(user_ids),
+            users_existing=len(emails) - len(user_ids),
+            completed_at=None if user_ids else datetime.utcnow()
+        ))
+        conn.execute(delete(ImportJob).where(
+            ImportJob.completed_at < datetime.utcnow() - timedelta(days=JOB_RETENTION_DAYS)
+        ))
+        return user_ids
+
+
+def update_job(job_id: str, **values) -> None:
+    with engine.begin() as conn:
+        conn.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+
+
+def get_job(job_id: str):
+    """
+    An import job's row with up-to-date progress, or None (blocking)
+    
+    Jobs synced through the job queue take their progress from their sync jobs,
+    and are marked finished here once none are left to run.
+    """
+    with engine.connect() as conn:
+        job = conn.execute(select(ImportJob).where(ImportJob.id == job_id)).first()
+    if job is None or job.status != "QUEUED":
+        return job
+    
+    counts = sync_queue.batch_progress(job_id)
+    values = {"users_synced": counts["DONE"], "users_failed": counts["FAILED"]}
+    if counts["PENDING"] == 0 and counts["RUNNING"] == 0:
+        values["status"] = "SUCCESS" if counts["FAILED"] == 0 else "PARTIAL"
+        values["completed_at"] = datetime.utcnow()
+    update_job(job_id, **values)
+    with engine.connect() as conn:
+        return conn.execute(select(ImportJob).where(ImportJob.id == job_id)).first()
+
+
+async def start_import(raw_emails: Iterable[str]) -> str:
+    """
+    Insert the users now and sync their subscriptions in the background; returns the job id
+    
+    New users have no next_sync_at, so any the background sync doesn't get to
+    (restart, Beag outage) are picked up by the worker's next pass.
+    """
+    raw_emails = list(raw_emails)
+    emails, invalid = normalize_emails(raw_emails)
+    job_id = uuid.uuid4().hex
+    user_ids = await run_db(create_job, job_id, len(raw_emails), emails, invalid)
+    logger.info(
+        f"📥 Imported {len(user_ids)} new users ({len(emails) - len(user_ids)} existing, "
+        f"{len(invalid)} invalid) - job {job_id}"
+    )
+    
+    if user_ids:
+        task = asyncio.create_task(_sync_imported_users(job_id, user_ids))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+    return job_id
+
+
+async def _save_progress(job_id: str, progress: dict) -> None:
+    # Writes the latest counts every PROGRESS_INTERVAL_SECONDS until cancelled
+    saved = None
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL_SECONDS)
+        if progress != saved:
+            saved = dict(progress)
+            try:
+                await run_db(update_job, job_id, **saved)
+            except Exception as e:
+                logger.error(f"Error saving import job {job_id} progress: {str(e)}")
+
+
+async def _sync_imported_users(job_id: str, user_ids: List[int]) -> None:
+    if settings.sync_queue_enabled:
+        # The consumers sync them; progress is read back from the queue by batch id
+        try:
+            await run_db(sync_queue.enqueue_users, user_ids, job_id)
+            await run_db(update_job, job_id, status="QUEUED")
+        except Exception as e:
+            logger.error(f"❌ Import job {job_id} could not queue its sync: {str(e)}")
+            await run_db(update_job, job_id, status="FAILED", error=str(e), completed_at=datetime.utcnow())
+        return
+    
+    progress = {"users_synced": 0, "users_failed": 0}
+    
+    def on_progress(users_synced: int, users_failed: int) -> None:
+        progress["users_synced"] = users_synced
+        progress["users_failed"] = users_failed
+    
+    result = {}
+    saver = None
+    try:
+        await run_db(update_job, job_id, status="RUNNING")
+        saver = asyncio.create_task(_save_progress(job_id, progress))
+        summary = await SubscriptionSyncService().sync_all_users(user_ids=user_ids, on_progress=on_progress)
+        result = {
+            "status": summary["status"],
+            "sync_summary": summary,
+            "users_synced": summary["users_synced"],
+            "users_failed": summary["users_failed"]
+        }
+        logger.info(f"✅ Import job {job_id} sync finished: {summary['status']}")
+    except asyncio.CancelledError:
+        # Shutting down: the worker's next pass syncs whoever is left
+        result = {**progress, "status": "FAILED", "error": "Interrupted by shutdown"}
+        raise
+    except Exception as e:
+        logger.error(f"❌ Import job {job_id} sync failed: {str(e)}")
+        result = {**progress, "status": "FAILED", "error": str(e)}
+    finally:
+        if saver:
+            saver.cancel()
+        try:
+            await run_db(update_job, job_id, **result, completed_at=datetime.utcnow())
+        except Exception as e:
+            logger.error(f"Error saving import job {job_id} result: {str(e)}")
@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import DateTime, Integer, String, cast, column, select, text, update, values
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal, engine, run_db
+from app.metrics import WEBHOOK_APPLY_LAG, WEBHOOK_EVENTS
+from app.models.user import User
+from app.models.webhook_event import WebhookEvent
+from app.schemas.subscription import SubscriptionEvent
+from app.services import scheduler, user_cache
+from app.services.sync_service import SYNC_USER_COLUMNS, schedule_after_sync, subscription_fingerprint
+import logging
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Beag-Signature"
+TIMESTAMP_HEADER = "X-Beag-Timestamp"
+
+# Processed events are purged at most this often
+PURGE_INTERVAL_SECONDS = 600
+
+# Columns written when an event changes a user's subscription, in VALUES order
+EVENT_COLUMNS = [
+    ("id", Integer),
+    ("subscription_status", String),
+    ("plan_id", Integer),
+    ("start_date", DateTime(timezone=True)),
+    ("end_date", DateTime(timezone=True)),
+    ("my_saas_app_id", String),
+    ("beag_client_id", Integer),
+    ("subscription_fingerprint", String),
+    ("subscription_event_at", DateTime(timezone=True)),
+    ("status_changed_at", DateTime(timezone=True)),
+    ("status_change_count", Integer),
+    ("next_sync_at", DateTime(timezone=True)),
+]
+
+# Columns written when an event matches what the user already has
+EVENT_SEEN_COLUMNS = [
+    ("id", Integer),
+    ("subscription_event_at", DateTime(timezone=True)),
+]
+
+
+class WebhookSignatureError(Exception):
+    """The request isn't signed with BEAG_WEBHOOK_SECRET, or was signed too long ago"""
+
+
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    """Signature header value for `body`: HMAC-SHA256 of "{timestamp}." + body, hex encoded"""
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(body: bytes, timestamp: Optional[str], signature: Optional[str], now: Optional[float] = None) -> None:
+    """
+    Check a webhook request's signature headers, raising WebhookSignatureError if they don't match
+    
+    The timestamp is part of the signed message and must be within
+    BEAG_WEBHOOK_TOLERANCE_SECONDS of now, so a captured request can't be replayed later.
+    """
+    if not timestamp or not signature:
+        raise WebhookSignatureError(f"Missing {TIMESTAMP_HEADER} or {SIGNATURE_HEADER} header")
+    try:
+        signed_at = int(timestamp)
+    except ValueError:
+        raise WebhookSignatureError(f"Invalid {TIMESTAMP_HEADER} header")
+    now = time.time() if now is None else now
+    if abs(now - signed_at) > settings.beag_webhook_tolerance_seconds:
+        raise WebhookSignatureError("Signature timestamp is outside the allowed window")
+    if not hmac.compare_digest(sign(settings.beag_webhook_secret, signed_at, body), signature.strip()):
+        raise WebhookSignatureError("Signature mismatch")
+
+
+def store_events(events: List[SubscriptionEvent]) -> int:
+    """
+    Insert events as PENDING in one statement; returns how many were new
+    
+    Events whose event_id was already received (redeliveries, retries) are skipped.
+    A naive occurred_at is taken as UTC, as the apply path does, rather than in
+    the database session's time zone.
+    """
+    rows = []
+    for event in events:
+        occurred_at = scheduler.as_utc(event.occurred_at).isoformat()
+        rows.append({
+            "event_id": event.event_id,
+            "email": event.email,
+            "occurred_at": occurred_at,
+            "payload": {**json.loads(event.json()), "occurred_at": occurred_at}
+        })
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "INSERT INTO webhook_events (event_id, email, occurred_at, payload) "
+            "SELECT event_id, email, occurred_at, payload FROM json_to_recordset(CAST(:events AS json)) "
+            "AS e(event_id text, email text, occurred_at timestamptz, payload json) "
+            "ON CONFLICT (event_id) DO NOTHING RETURNING id"
+        ), {"events": json.dumps(rows)})
+        return len(result.fetchall())
+
+
+def _changed_row(user, event: SubscriptionEvent, fingerprint: str) -> tuple:
+    """VALUES row for a user whose subscription the event changes"""
+    return (
+        user.id, event.status.value, event.plan_id, event.start_date, event.end_date,
+        event.my_saas_app_id, event.client_id, fingerprint, scheduler.as_utc(event.occurred_at)
+    ) + schedule_after_sync(user, event)
+
+
+def _update_statement(columns: List[Tuple], rows: List[tuple], **extra):
+    v = values(*[column(name, type_) for name, type_ in columns], name="v").data(rows)
+    c = {name: cast(v.c[name], type_) for name, type_ in columns}
+    return (
+        update(User)
+        .where(User.id == c["id"])
+        .values(**{name: c[name] for name, _ in columns[1:]}, **extra)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _mark_events(db: Session, outcomes: Dict[int, Tuple[str, Optional[str]]]) -> None:
+    by_outcome = defaultdict(list)
+    for event_id, outcome in outcomes.items():
+        by_outcome[outcome].append(event_id)
+    for (status, error), ids in by_outcome.items():
+        db.execute(text(
+            "UPDATE webhook_events SET status = :status, error = :error, processed_at = now() "
+            "WHERE id = ANY(CAST(:ids AS bigint[]))"
+        ), {"status": status, "error": error, "ids": ids})
+
+
+def apply_pending_events(limit: int) -> Counter:
+    """
+    Apply up to `limit` pending events to users in one transaction
+    
+    Events are claimed with SKIP LOCKED, so several processes can apply at once.
+    Of several events for the same user only the newest is applied. An event is
+    discarded as STALE unless it is newer than both the last event applied to the
+    user and the user's last poll of Beag (which already saw the state it describes).
+    Returns the number of events by outcome.
+    """
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(WebhookEvent.id, WebhookEvent.email, WebhookEvent.occurred_at, WebhookEvent.payload)
+            .where(WebhookEvent.status == "PENDING")
+            .order_by(WebhookEvent.occurred_at, WebhookEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).fetchall()
+        if not rows:
+            return Counter()
+        
+        outcomes: Dict[int, Tuple[str, Optional[str]]] = {}
+        newest = {}
+        for row in rows:
+            if row.email in newest:
+                # Superseded by a later event for the same user in this batch
+                outcomes[newest[row.email].id] = ("STALE", None)
+            newest[row.email] = row
+        
+        users = {
+            user.email: user
+            for user in db.execute(
+                select(*SYNC_USER_COLUMNS, User.subscription_event_at, User.last_synced)
+                .where(User.email.in_(list(newest)))
+                # Locked in id order, as sync flushes write them, so the two can't deadlock
+                .order_by(User.id)
+                .with_for_update()
+            )
+        }
+        
+        changed, seen, applied_emails, lags = [], [], [], []
+        now = scheduler.utcnow()
+        for email, row in newest.items():
+            user = users.get(email)
+            if user is None:
+                outcomes[row.id] = ("IGNORED", "No user with this email")
+                continue
+            occurred_at = scheduler.as_utc(row.occurred_at)
+            known = [scheduler.as_utc(at) for at in (user.subscription_event_at, user.last_synced) if at]
+            if known and occurred_at <= max(known):
+                outcomes[row.id] = ("STALE", None)
+                continue
+            try:
+                event = SubscriptionEvent.parse_obj(row.payload)
+            except ValidationError as e:
+                outcomes[row.id] = ("FAILED", str(e))
+                continue
+            
+            fingerprint = subscription_fingerprint(event)
+            if fingerprint == user.subscription_fingerprint:
+                seen.append((user.id, occurred_at))
+                outcomes[row.id] = ("UNCHANGED", None)
+            else:
+                changed.append(_changed_row(user, event, fingerprint))
+                applied_emails.append(email)
+                outcomes[row.id] = ("APPLIED", None)
+            lags.append((now - occurred_at).total_seconds())
+        
+        if changed:
+            db.execute(_update_statement(EVENT_COLUMNS, changed))
+        if seen:
+            # updated_at is set to itself so its onupdate default doesn't fire
+            db.execute(_update_statement(EVENT_SEEN_COLUMNS, seen, updated_at=User.updated_at))
+        _mark_events(db, outcomes)
+        user_cache.invalidate_on_commit(db, applied_emails)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    
+    counts = Counter(status for status, _ in outcomes.values())
+    for status, count in counts.items():
+        WEBHOOK_EVENTS.labels(status.lower()).inc(count)
+    for lag in lags:
+        WEBHOOK_APPLY_LAG.observe(max(lag, 0.0))
+    return counts
+
+
+def purge_processed_events() -> int:
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "DELETE FROM webhook_events WHERE processed_at < now() - make_interval(secs => :retention)"
+        ), {"retention": float(settings.beag_webhook_retention_hours * 3600)})
+        return result.rowcount
+
+
+def get_event_stats() -> dict:
+    """Stored events by status (processed ones within the retention window)"""
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT status, count(*) AS events FROM webhook_events GROUP BY status"))
+        counts = {"PENDING": 0, "APPLIED": 0, "UNCHANGED": 0, "STALE": 0, "IGNORED": 0, "FAILED": 0}
+        counts.update({row.status: row.events for row in rows})
+        return counts
+
+
+class WebhookProcessor:
+    """
+    Applies stored webhook events to users in batches, in the background
+    
+    The webhook endpoint wakes it after storing events; events received by other
+    processes are picked up every BEAG_WEBHOOK_POLL_SECONDS. During a burst, events
+    pile up while a batch is applied and go out together in the next one.
+    """
+    
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._last_purge = 0.0
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def notify(self) -> None:
+        """New events were stored: apply them now instead of at the next poll"""
+        if self._wake is not None:
+            self._wake.set()
+    
+    async def drain(self) -> Counter:
+        """Apply pending events batch by batch until none are left"""
+        totals = Counter()
+        while True:
+            counts = await run_db(apply_pending_events, settings.beag_webhook_batch_size)
+            totals.update(counts)
+            if sum(counts.values()) < settings.beag_webhook_batch_size:
+                return totals
+    
+    async def _run(self) -> None:
+        logger.info(f"📨 Webhook processor started (batch size: {settings.beag_webhook_batch_size})")
+        while True:
+            # Cleared first, so events stored while draining trigger another pass
+            self._wake.clear()
+            try:
+                totals = await self.drain()
+                if totals:
+                    logger.info(f"📨 Processed {sum(totals.values())} webhook events: {dict(totals)}")
+                if time.monotonic() - self._last_purge > PURGE_INTERVAL_SECONDS:
+                    await run_db(purge_processed_events)
+                    self._last_purge = time.monotonic()
+            except Exception as e:
+                logger.error(f"Error applying webhook events: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.beag_webhook_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+webhook_processor = WebhookProcessor()
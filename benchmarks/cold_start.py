@@ -0,0 +1,90 @@
+"""
+Cold start check: time to first byte and to ready for a fresh API process
+
+Starts `uvicorn app.main:app` on a free port, polls /health/live until the first
+response arrives, then /health/ready until warm-up is done. Exits non-zero when
+either takes longer than the budget (STARTUP_TTFB_BUDGET_SECONDS by default), so
+it can gate a deploy or run in CI against a database configured in .env.
+
+    python -m benchmarks.cold_start --runs 5
+"""
+import argparse
+import logging
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+logger = logging.getLogger("cold_start")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _poll(url: str, started: float, deadline: float, ok_status: int = 200) -> float:
+    """Seconds from `started` until `url` answers with `ok_status`"""
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == ok_status:
+                return time.monotonic() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not answer {ok_status} in time")
+
+
+def measure(timeout: float) -> dict:
+    """Start one API process and time its first response and readiness"""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        deadline = started + timeout
+        first_byte = _poll(f"{base_url}/health/live", started, deadline)
+        ready = _poll(f"{base_url}/health/ready", started, deadline)
+        reported = httpx.get(f"{base_url}/health/ready").json()
+        return {
+            "first_byte_seconds": round(first_byte, 3),
+            "ready_seconds": round(ready, 3),
+            "steps": reported["steps"],
+            "budget_seconds": reported["budget_seconds"]
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure API cold start time to first byte and readiness")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to measure; the median is checked")
+    parser.add_argument("--budget", type=float, default=None, help="Seconds allowed (default: STARTUP_TTFB_BUDGET_SECONDS)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Give up on a start after this many seconds")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    runs = []
+    for index in range(args.runs):
+        run = measure(args.timeout)
+        runs.append(run)
+        logger.info(f"Run {index + 1}/{args.runs}: first byte {run['first_byte_seconds']}s, ready {run['ready_seconds']}s")
+    
+    budget = args.budget if args.budget is not None else runs[0]["budget_seconds"]
+    first_byte = statistics.median(run["first_byte_seconds"] for run in runs)
+    ready = statistics.median(run["ready_seconds"] for run in runs)
+    logger.info(f"\n⏱️  Median first byte {first_byte}s, ready {ready}s (budget {budget}s)")
+    if first_byte > budget or ready > budget:
+        logger.error("❌ Cold start is over budget")
+        sys.exit(1)
+    logger.info("✅ Cold start within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import hashlib
+import math
+import random
+import time
+import asyncio
+from collections import Counter, defaultdict
+from dataclasses import dataclass, asdict
+from fastapi import FastAPI, Header, Response
+from fastapi.responses import JSONResponse
+from typing import Optional
+
+# Statuses handed out to found clients, with their relative weights
+STATUS_WEIGHTS = [("PAID", 80), ("CANCELLED", 8), ("FAILED", 4), ("PAUSED", 4), ("REFUNDED", 2), ("RESUMED", 2)]
+
+# z-score of the 99th percentile of a standard normal
+_Z_99 = 2.326
+
+
+@dataclass
+class FakeBeagProfile:
+    """
+    How the fake Beag API behaves
+    
+    Latency follows `latency_dist` ("constant", "uniform" or "lognormal") with the
+    given median and p99. `error_rate` of calls answer 500, and `not_found_rate` of
+    clients (fixed per email/id) answer 404. Every `burst_every_seconds` the server
+    answers 429 with Retry-After for `burst_seconds`. Draws are seeded per client
+    and attempt, so the same run gets the same answers regardless of scheduling.
+    """
+    latency_dist: str = "lognormal"
+    latency_median_ms: float = 50.0
+    latency_p99_ms: float = 250.0
+    error_rate: float = 0.0
+    not_found_rate: float = 0.1
+    burst_every_seconds: float = 0.0  # 0 = no 429 bursts
+    burst_seconds: float = 1.0
+    retry_after_seconds: int = 1
+    seed: int = 42
+
+
+def _fraction(*parts) -> float:
+    """A stable value in [0, 1) for these inputs"""
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def _latency_seconds(profile: FakeBeagProfile, rng: random.Random) -> float:
+    median = profile.latency_median_ms / 1000
+    p99 = max(profile.latency_p99_ms / 1000, median)
+    if profile.latency_dist == "constant":
+        return median
+    if profile.latency_dist == "uniform":
+        # Symmetric around the median, topping out at the p99
+        return max(0.0, rng.uniform(2 * median - p99, p99))
+    if median <= 0:
+        return 0.0
+    sigma = (math.log(p99) - math.log(median)) / _Z_99 if p99 > median else 0.0
+    return rng.lognormvariate(math.log(median), sigma)
+
+
+def create_app(profile: FakeBeagProfile) -> FastAPI:
+    """The fake Beag API, plus /_stats and /_reset for the benchmark runner"""
+    app = FastAPI(title="Fake Beag API")
+    started = time.monotonic()
+    calls = Counter()
+    attempts = defaultdict(int)
+    
+    def in_burst() -> bool:
+        if profile.burst_every_seconds <= 0:
+            return False
+        return (time.monotonic() - started) % profile.burst_every_seconds < profile.burst_seconds
+    
+    def subscription(key: str, email: str, client_id: int) -> dict:
+        pick = _fraction(profile.seed, "status", key) * sum(weight for _, weight in STATUS_WEIGHTS)
+        for status, weight in STATUS_WEIGHTS:
+            pick -= weight
+            if pick < 0:
+                break
+        days = int(_fraction(profile.seed, "days", key) * 365)
+        return {
+            "email": email,
+            "status": status,
+            "plan_id": 1 + int(_fraction(profile.seed, "plan", key) * 3),
+            "start_date": "2026-01-01T00:00:00Z",
+            "end_date": f"2027-{1 + days // 31 % 12:02d}-{1 + days % 28:02d}T00:00:00Z",
+            "my_saas_app_id": "bgapp_benchmark",
+            "client_id": client_id
+        }
+    
+    async def answer(endpoint: str, key: str, email: str, client_id: int, api_key: Optional[str]):
+        if not api_key:
+            calls[(endpoint, 401)] += 1
+            return JSONResponse({"detail": "Missing API key"}, status_code=401)
+        
+        attempt = attempts[key]
+        attempts[key] += 1
+        rng = random.Random(f"{profile.seed}:{key}:{attempt}")
+        await asyncio.sleep(_latency_seconds(profile, rng))
+        
+        if in_burst():
+            calls[(endpoint, 429)] += 1
+            return JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(profile.retry_after_seconds)}
+            )
+        if rng.random() < profile.error_rate:
+            calls[(endpoint, 500)] += 1
+            return JSONResponse({"error": "server_error"}, status_code=500)
+        if _fraction(profile.seed, "found", key) < profile.not_found_rate:
+            calls[(endpoint, 404)] += 1
+            return JSONResponse({"error": "client_not_found"}, status_code=404)
+        calls[(endpoint, 200)] += 1
+        return subscription(key, email, client_id)
+    
+    @app.get("/clients/by-email/{email}")
+    async def by_email(email: str, x_api_key: Optional[str] = Header(None)):
+        client_id = 1000 + int(_fraction(profile.seed, "id", email) * 10 ** 9)
+        return await answer("by-email", email, email, client_id, x_api_key)
+    
+    @app.get("/clients/by-id/{client_id}")
+    async def by_id(client_id: int, x_api_key: Optional[str] = Header(None)):
+        return await answer("by-id", f"id:{client_id}", f"client{client_id}@example.com", client_id, x_api_key)
+    
+    @app.get("/_stats")
+    async def stats():
+        by_status = Counter()
+        for (_, status_code), count in calls.items():
+            by_status[str(status_code)] += count
+        return {
+            "calls": sum(calls.values()),
+            "by_status": dict(by_status),
+            "by_endpoint": {f"{endpoint} {code}": count for (endpoint, code), count in calls.items()},
+            "profile": asdict(profile)
+        }
+    
+    @app.post("/_reset")
+    async def reset():
+        nonlocal started
+        calls.clear()
+        attempts.clear()
+        started = time.monotonic()
+        return Response(status_code=204)
+    
+    return app
+
+
+def serve(profile: FakeBeagProfile, host: str, port: int) -> None:
+    """Run the fake Beag API until the process is stopped"""
+    import uvicorn
+    
+    uvicorn.run(create_app(profile), host=host, port=port, log_level="warning", access_log=False)
@@ -0,0 +1,252 @@
+"""
+Sync benchmark against a local fake Beag API
+
+Seeds a dedicated Postgres database with synthetic users, runs
+SubscriptionSyncService.sync_all_users against benchmarks/fake_beag.py and reports
+throughput, peak RSS, database round-trips and Beag calls. Everything runs
+offline and is seeded, so numbers are comparable across commits on the same machine.
+
+    python -m benchmarks.sync_benchmark --database-url postgresql://localhost/beag_bench --users 10000
+
+The database's users, sync_logs and sync_jobs tables are truncated on every run.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, fields
+from datetime import datetime
+from benchmarks.fake_beag import FakeBeagProfile, serve
+
+logger = logging.getLogger("benchmark")
+
+# Summary figures reported per run and as the median across runs
+REPORTED = [
+    "users_per_second",
+    "duration_seconds",
+    "peak_rss_mb",
+    "db_round_trips",
+    "db_round_trips_per_user",
+    "beag_calls",
+    "beag_retries",
+    "beag_latency_p50",
+    "beag_latency_p99",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _wait_for_fake(url: str, timeout: float = 15.0) -> None:
+    import httpx
+    
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            httpx.get(f"{url}/_stats", timeout=1.0).raise_for_status()
+            return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Fake Beag API did not start at {url}")
+            time.sleep(0.1)
+
+
+def seed_users(count: int) -> None:
+    """Empty the benchmark tables and insert `count` synthetic users with COPY"""
+    from sqlalchemy import text
+    from app.database import Base, engine
+    from app.services.user_import import insert_emails
+    import app.models  # noqa: F401
+    
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE users, sync_logs, sync_jobs RESTART IDENTITY CASCADE"))
+    insert_emails([f"bench-{i:07d}@example.com" for i in range(count)])
+
+
+def sync_process(options: dict, results) -> None:
+    """
+    Run one sync in a fresh process and put its measurements on `results`
+    
+    A new process per run keeps peak RSS, the rate limiter and the circuit
+    breaker from carrying over between runs.
+    """
+    import asyncio
+    from sqlalchemy import event
+    from app.database import engine
+    from app.services.beag_client import get_rate_limiter_stats
+    from app.services.sync_service import SubscriptionSyncService
+    
+    logging.basicConfig(level=options["log_level"])
+    round_trips = [0]
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_round_trip(conn, cursor, statement, parameters, context, executemany):
+        # pg8000 sends each parameter set of an executemany separately
+        round_trips[0] += len(parameters) if executemany else 1
+    
+    rss_before = _rss_mb()
+    retries_before = get_rate_limiter_stats()["retries"]
+    summary = asyncio.run(SubscriptionSyncService().sync_all_users(
+        concurrency=options["concurrency"],
+        batch_size=options["batch_size"],
+        page_size=options["page_size"]
+    ))
+    latency = (summary.get("telemetry") or {}).get("beag_latency_seconds") or {}
+    users = summary["total_users"]
+    results.put({
+        "status": summary["status"],
+        "users": users,
+        "users_synced": summary["users_synced"],
+        "users_failed": summary["users_failed"],
+        "duration_seconds": summary["duration_seconds"],
+        "users_per_second": summary.get("users_per_second"),
+        "rss_before_sync_mb": rss_before,
+        "peak_rss_mb": _rss_mb(),
+        "db_round_trips": round_trips[0],
+        "db_round_trips_per_user": round(round_trips[0] / users, 3) if users else None,
+        "beag_retries": get_rate_limiter_stats()["retries"] - retries_before,
+        "beag_latency_p50": latency.get("p50"),
+        "beag_latency_p99": latency.get("p99"),
+        "phase_seconds": (summary.get("telemetry") or {}).get("phase_seconds")
+    })
+
+
+def run_benchmark(args) -> dict:
+    import httpx
+    
+    profile = FakeBeagProfile(**{f.name: getattr(args, f.name) for f in fields(FakeBeagProfile)})
+    port = _free_port()
+    fake_url = f"http://127.0.0.1:{port}"
+    
+    # Children inherit this environment; app.config reads it on import
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["BEAG_API_URL"] = fake_url
+    os.environ["BEAG_API_KEY"] = "benchmark"
+    os.environ["USER_CACHE_NOTIFY"] = "false"
+    
+    # spawn: the fake server and every run start from a clean interpreter
+    context = multiprocessing.get_context("spawn")
+    fake = context.Process(target=serve, args=(profile, "127.0.0.1", port), name="fake-beag", daemon=True)
+    fake.start()
+    try:
+        _wait_for_fake(fake_url)
+        options = {
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+            "page_size": args.page_size,
+            "log_level": logging.INFO if args.verbose else logging.WARNING
+        }
+        runs = []
+        for index in range(args.repeat):
+            seed_users(args.users)
+            httpx.post(f"{fake_url}/_reset").raise_for_status()
+            
+            results = context.Queue()
+            process = context.Process(target=sync_process, args=(options, results), name=f"sync-run-{index}")
+            process.start()
+            while True:
+                try:
+                    run = results.get(timeout=1.0)
+                    break
+                except queue.Empty:
+                    if not process.is_alive():
+                        raise RuntimeError(f"Sync run {index + 1} exited without results (exit code {process.exitcode})")
+            process.join()
+            
+            fake_stats = httpx.get(f"{fake_url}/_stats").json()
+            run["beag_calls"] = fake_stats["calls"]
+            run["beag_calls_by_status"] = fake_stats["by_status"]
+            runs.append(run)
+            logger.info(
+                f"Run {index + 1}/{args.repeat}: {run['status']}, {run['users_per_second']} users/sec, "
+                f"{run['db_round_trips']} DB round-trips, {run['beag_calls']} Beag calls, peak RSS {run['peak_rss_mb']} MB"
+            )
+    finally:
+        fake.terminate()
+        fake.join(timeout=10)
+    
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "users": args.users,
+        "options": {key: options[key] for key in ("concurrency", "batch_size", "page_size")},
+        "profile": asdict(profile),
+        "runs": runs,
+        "median": {
+            key: statistics.median(run[key] for run in runs)
+            for key in REPORTED
+            if all(run.get(key) is not None for run in runs)
+        }
+    }
+
+
+def main() -> None:
+    defaults = FakeBeagProfile()
+    parser = argparse.ArgumentParser(description="Benchmark the subscription sync against a fake Beag API")
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCHMARK_DATABASE_URL"),
+        help="Dedicated Postgres database; its users, sync_logs and sync_jobs are truncated (default: BENCHMARK_DATABASE_URL)"
+    )
+    parser.add_argument("--users", type=int, default=10000, help="Synthetic users to seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs to make; the median is reported")
+    parser.add_argument("--concurrency", type=int, default=None, help="Beag lookups in flight (default: SYNC_CONCURRENCY)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Users per database write (default: SYNC_BATCH_SIZE)")
+    parser.add_argument("--page-size", type=int, default=None, help="Users read per page (default: SYNC_PAGE_SIZE)")
+    parser.add_argument("--latency-dist", choices=["constant", "uniform", "lognormal"], default=defaults.latency_dist)
+    parser.add_argument("--latency-median-ms", type=float, default=defaults.latency_median_ms)
+    parser.add_argument("--latency-p99-ms", type=float, default=defaults.latency_p99_ms)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of calls answering 500")
+    parser.add_argument("--not-found-rate", type=float, default=defaults.not_found_rate, help="Fraction of users Beag doesn't know (404)")
+    parser.add_argument("--burst-every-seconds", type=float, default=defaults.burst_every_seconds, help="Start a 429 burst this often (0 = never)")
+    parser.add_argument("--burst-seconds", type=float, default=defaults.burst_seconds, help="How long each 429 burst lasts")
+    parser.add_argument("--retry-after-seconds", type=int, default=defaults.retry_after_seconds, help="Retry-After sent with 429s")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the sync's own logs")
+    args = parser.parse_args()
+    
+    if not args.database_url:
+        parser.error("--database-url (or BENCHMARK_DATABASE_URL) is required; use a database you can throw away")
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    result = run_benchmark(args)
+    
+    logger.info(f"\n📊 Sync benchmark @ {result['commit']}: {args.users} users, {args.repeat} runs (median)")
+    for key, value in result["median"].items():
+        logger.info(f"  {key:<26} {value}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
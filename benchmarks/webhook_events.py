@@ -0,0 +1,166 @@
+"""
+Webhook event generator: sends signed subscription events to a running API
+
+Builds events for synthetic users (bench-0000000@example.com..., as seeded by
+benchmarks.sync_benchmark, or --emails), signs them with BEAG_WEBHOOK_SECRET the
+way Beag does and posts them to /api/webhooks/beag. A fraction can be delivered
+out of order or twice, to exercise the stale and duplicate handling. Reports
+acknowledgement latency and, with --wait, how long the API took to apply them.
+
+    python -m benchmarks.webhook_events --events 10000 --users 1000 --batch 50 --concurrency 20 --wait
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import List
+import httpx
+from benchmarks.fake_beag import STATUS_WEIGHTS
+
+logger = logging.getLogger("webhook_events")
+
+
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    """Same scheme as app.services.webhooks.sign: HMAC-SHA256 of "{timestamp}." + body"""
+    return "sha256=" + hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+
+
+def build_events(args) -> List[dict]:
+    """
+    Events in delivery order
+    
+    occurred_at increases by a millisecond per event. --out-of-order moves that
+    fraction of events to a random later position, and --duplicates sends that
+    fraction a second time later on.
+    """
+    rng = random.Random(args.seed)
+    emails = args.emails.split(",") if args.emails else [f"bench-{i:07d}@example.com" for i in range(args.users)]
+    client_ids = {email: 100000 + index for index, email in enumerate(emails)}
+    statuses, weights = zip(*STATUS_WEIGHTS)
+    started = datetime.now(timezone.utc) - timedelta(milliseconds=args.events)
+    events = []
+    for index in range(args.events):
+        email = rng.choice(emails)
+        events.append({
+            "event_id": f"evt_{args.seed}_{index}",
+            "occurred_at": (started + timedelta(milliseconds=index)).isoformat(),
+            "email": email,
+            "status": rng.choices(statuses, weights)[0],
+            "plan_id": rng.randint(1, 3),
+            "start_date": "2026-01-01T00:00:00+00:00",
+            "end_date": "2027-01-01T00:00:00+00:00",
+            "my_saas_app_id": "bgapp_benchmark",
+            "client_id": client_ids[email]
+        })
+    
+    for index in range(len(events)):
+        if rng.random() < args.out_of_order:
+            event = events.pop(index)
+            events.insert(rng.randint(index, len(events)), event)
+    for event in list(events):
+        if rng.random() < args.duplicates:
+            events.insert(rng.randint(events.index(event) + 1, len(events)), event)
+    return events
+
+
+async def send(args, events: List[dict]) -> dict:
+    batches = [events[i:i + args.batch] for i in range(0, len(events), args.batch)]
+    latencies, status_codes, totals = [], Counter(), Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    interval = 1 / args.rate if args.rate else 0
+    
+    async def post(client: httpx.AsyncClient, batch: List[dict]) -> None:
+        async with semaphore:
+            body = json.dumps(batch if args.batch > 1 else batch[0]).encode()
+            timestamp = int(time.time())
+            started = time.perf_counter()
+            try:
+                response = await client.post(args.url, content=body, headers={
+                    "Content-Type": "application/json",
+                    "X-Beag-Timestamp": str(timestamp),
+                    "X-Beag-Signature": sign(args.secret, timestamp, body)
+                })
+            except httpx.HTTPError as e:
+                status_codes[type(e).__name__] += 1
+                return
+            latencies.append(time.perf_counter() - started)
+            status_codes[str(response.status_code)] += 1
+            if response.status_code == 202:
+                totals.update(response.json())
+    
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        tasks = []
+        for batch in batches:
+            tasks.append(asyncio.create_task(post(client, batch)))
+            if interval:
+                await asyncio.sleep(interval)
+        await asyncio.gather(*tasks)
+    duration = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "requests": len(batches),
+        "events_sent": len(events),
+        "accepted": totals["accepted"],
+        "duplicates": totals["duplicates"],
+        "status_codes": dict(status_codes),
+        "duration_seconds": round(duration, 3),
+        "events_per_second": round(len(events) / duration, 1) if duration > 0 else 0.0,
+        "ack_ms_p50": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "ack_ms_p99": round(latencies[int(len(latencies) * 0.99)] * 1000, 1) if latencies else None,
+        "ack_ms_max": round(latencies[-1] * 1000, 1) if latencies else None
+    }
+
+
+def wait_until_applied(stats_url: str, timeout: float) -> dict:
+    """Poll the event stats until nothing is pending; returns the final counts and the wait"""
+    started = time.monotonic()
+    while True:
+        events = httpx.get(stats_url).json()["events"]
+        if not events["PENDING"] or time.monotonic() - started > timeout:
+            return {"applied_after_seconds": round(time.monotonic() - started, 3), "events_by_status": events}
+        time.sleep(0.1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Send signed Beag subscription webhook events to the API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/webhooks/beag")
+    parser.add_argument("--secret", default=os.environ.get("BEAG_WEBHOOK_SECRET"), help="Default: BEAG_WEBHOOK_SECRET")
+    parser.add_argument("--events", type=int, default=1000, help="Distinct events to generate")
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users the events are spread over")
+    parser.add_argument("--emails", help="Comma-separated emails to use instead of the synthetic users")
+    parser.add_argument("--batch", type=int, default=1, help="Events per request (1 sends single objects)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight")
+    parser.add_argument("--rate", type=float, default=0, help="Requests started per second (0 = as fast as possible)")
+    parser.add_argument("--out-of-order", type=float, default=0.05, help="Fraction of events delivered late")
+    parser.add_argument("--duplicates", type=float, default=0.02, help="Fraction of events delivered twice")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--wait", action="store_true", help="Wait until the API has applied every event")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Give up waiting after this many seconds")
+    args = parser.parse_args()
+    
+    if not args.secret:
+        parser.error("--secret (or BEAG_WEBHOOK_SECRET) is required")
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    events = build_events(args)
+    result = asyncio.run(send(args, events))
+    if args.wait:
+        result.update(wait_until_applied(f"{args.url.rstrip('/')}/stats", args.timeout))
+    
+    logger.info(f"\n📨 Sent {result['events_sent']} events in {result['requests']} requests")
+    for key, value in result.items():
+        logger.info(f"  {key:<22} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+Test settings, set before anything imports app.config
+
+The tests run against a throwaway SQLite database and never call Beag.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="beag-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db?check_same_thread=false&timeout=60"
+os.environ.setdefault("BEAG_API_KEY", "test")
+os.environ["HEALTH_PROBE_INTERVAL_SECONDS"] = "0.05"
@@ -0,0 +1,63 @@
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def _fail(breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout_seconds=60)
+    _fail(breaker, 2)
+    assert breaker.state == CLOSED
+    _fail(breaker, 1)
+    assert breaker.state == OPEN
+    assert breaker.is_open()
+    assert not breaker.allow_request()
+    assert breaker.rejected_calls == 1
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout_seconds=60)
+    _fail(breaker, 2)
+    breaker.record_success()
+    _fail(breaker, 2)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_limited_trial_calls():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout_seconds=0, half_open_max_calls=2)
+    _fail(breaker, 1)
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_trial_success_closes():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout_seconds=0)
+    _fail(breaker, 1)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert [(t["from"], t["to"]) for t in breaker.transitions] == [
+        (CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)
+    ]
+
+
+def test_trial_failure_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout_seconds=0)
+    _fail(breaker, 1)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_abandoned_trial_frees_its_slot():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout_seconds=0)
+    _fail(breaker, 1)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_abandoned()
+    assert breaker.allow_request()
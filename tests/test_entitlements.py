@@ -0,0 +1,47 @@
+from datetime import timedelta
+import pytest
+from app.services import scheduler
+from app.services.entitlements import etag_matches, max_age_seconds
+
+ETAG = '"abc123"'
+NOW = scheduler.utcnow()
+
+
+@pytest.mark.parametrize("if_none_match", [ETAG, f"W/{ETAG}", f'"other", {ETAG}', "*", f" {ETAG} "])
+def test_etag_matches(if_none_match):
+    assert etag_matches(if_none_match, ETAG)
+
+
+@pytest.mark.parametrize("if_none_match", [None, "", '"other"', "abc123", '"abc"'])
+def test_etag_does_not_match(if_none_match):
+    assert not etag_matches(if_none_match, ETAG)
+
+
+def _user(last_synced=NOW - timedelta(hours=1), next_sync_at=NOW + timedelta(hours=1), end_date=None) -> dict:
+    return {"last_synced": last_synced, "next_sync_at": next_sync_at, "end_date": end_date}
+
+
+def test_max_age_is_capped_by_setting():
+    assert max_age_seconds(_user(), True, NOW) == 300
+
+
+def test_max_age_never_runs_past_next_sync():
+    assert max_age_seconds(_user(next_sync_at=NOW + timedelta(seconds=42)), True, NOW) == 42
+
+
+def test_overdue_sync_is_not_cached():
+    assert max_age_seconds(_user(next_sync_at=NOW - timedelta(minutes=5)), True, NOW) == 0
+
+
+def test_without_next_sync_falls_back_to_sync_interval():
+    last_synced = NOW - timedelta(hours=6, seconds=-30)
+    assert max_age_seconds(_user(last_synced=last_synced, next_sync_at=None), False, NOW) == 30
+
+
+def test_max_age_never_runs_past_access_end():
+    end_date = NOW - timedelta(minutes=15) + timedelta(seconds=10)
+    assert max_age_seconds(_user(end_date=end_date), True, NOW) == 10
+
+
+def test_never_synced_user_is_not_cached():
+    assert max_age_seconds(_user(last_synced=None), False, NOW) == 0
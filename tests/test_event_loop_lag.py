@@ -0,0 +1,93 @@
+"""
+Async handlers must not run database I/O on the event loop thread
+
+Every statement is slowed down with a blocking sleep, then the DB-backed
+endpoints are hit concurrently while a sampler measures how late the loop wakes
+up. A query executed on the loop would delay the sampler by at least
+QUERY_DELAY_SECONDS; run on the DB thread pool, it doesn't delay it at all.
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from sqlalchemy import event
+from app.database import Base, engine
+from app.main import create_app
+from app.services.beag_client import BeagClient
+from app.services.health_probe import health_prober
+import app.models  # noqa: F401  (registers the tables)
+
+QUERY_DELAY_SECONDS = 0.2
+SAMPLE_INTERVAL_SECONDS = 0.005
+CONCURRENT_USERS = 8
+
+# Half a slowed-down query: room for thread start-up and GIL hand-offs, none for a query
+MAX_LOOP_LAG_SECONDS = QUERY_DELAY_SECONDS / 2
+
+
+def _slow_query(*args):
+    time.sleep(QUERY_DELAY_SECONDS)
+
+
+async def _no_subscription(self, email, fresh=False):
+    await asyncio.sleep(0.01)
+    return None
+
+
+@pytest.fixture
+def slow_database(monkeypatch):
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(BeagClient, "get_subscription_by_email", _no_subscription)
+    event.listen(engine, "before_cursor_execute", _slow_query)
+    yield
+    event.remove(engine, "before_cursor_execute", _slow_query)
+    engine.dispose()
+    Base.metadata.drop_all(bind=engine)
+
+
+async def _sample_lag(lags: list, stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+        lags.append(loop.time() - started - SAMPLE_INTERVAL_SECONDS)
+
+
+async def _run_load() -> tuple:
+    transport = httpx.ASGITransport(app=create_app())
+    lags, stop = [], asyncio.Event()
+    sampler = None
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Warm-up, so one-off costs (statement compilation, imports) aren't measured
+            warmup = await client.post("/api/users/", json={"email": "warmup@example.com"})
+            await client.post(f"/api/users/sync/{warmup.json()['id']}")
+            await health_prober.probe_once()
+            
+            sampler = asyncio.create_task(_sample_lag(lags, stop))
+            health_prober.start()
+            created = await asyncio.gather(*(
+                client.post("/api/users/", json={"email": f"lag-{i}@example.com"})
+                for i in range(CONCURRENT_USERS)
+            ))
+            responses = list(created) + list(await asyncio.gather(
+                *(client.post(f"/api/users/sync/{response.json()['id']}") for response in created),
+                *(client.post("/api/users/", json={"email": f"lag-{i}@example.com"}) for i in range(CONCURRENT_USERS)),
+                *(client.get("/api/health/") for _ in range(CONCURRENT_USERS)),
+                *(client.get("/api/health/setup-status") for _ in range(CONCURRENT_USERS))
+            ))
+    finally:
+        await health_prober.stop()
+        stop.set()
+        if sampler:
+            await sampler
+    return responses, lags
+
+
+def test_db_handlers_do_not_block_event_loop(slow_database):
+    responses, lags = asyncio.run(_run_load())
+    
+    assert [response.status_code for response in responses] == [200] * len(responses)
+    assert health_prober.probe("database")["ok"]
+    assert max(lags) < MAX_LOOP_LAG_SECONDS, f"event loop stalled for {max(lags) * 1000:.0f} ms"
+    assert len(lags) > 10
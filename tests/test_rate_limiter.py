@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from app.services.rate_limiter import AdaptiveRateLimiter
+
+
+def _limiter(**overrides) -> AdaptiveRateLimiter:
+    options = dict(initial_limit=4, min_limit=1, max_limit=8, latency_target_seconds=1.0, decrease_cooldown_seconds=0)
+    options.update(overrides)
+    return AdaptiveRateLimiter(**options)
+
+
+def _call(limiter: AdaptiveRateLimiter, latency: float = 0.1, overloaded: bool = False) -> None:
+    async def call():
+        await limiter.acquire()
+        await limiter.release(latency, overloaded)
+    asyncio.run(call())
+
+
+def test_fast_successes_increase_limit_additively():
+    limiter = _limiter()
+    # About one more slot per round of `limit` fast responses
+    for _ in range(4):
+        _call(limiter)
+    assert 4.9 < limiter.limit < 5
+    assert limiter.in_flight == 0
+
+
+def test_limit_never_exceeds_max():
+    limiter = _limiter(initial_limit=8)
+    _call(limiter)
+    assert limiter.limit == 8
+
+
+def test_overload_decreases_limit_multiplicatively():
+    limiter = _limiter()
+    _call(limiter, overloaded=True)
+    assert limiter.limit == 2
+    assert limiter.stats["overloaded"] == 1
+
+
+def test_slow_response_decreases_limit_gently():
+    limiter = _limiter()
+    _call(limiter, latency=2.0)
+    assert limiter.limit == pytest.approx(3.6)
+    assert limiter.stats["slow"] == 1
+
+
+def test_limit_never_drops_below_min():
+    limiter = _limiter(initial_limit=2, min_limit=2)
+    _call(limiter, overloaded=True)
+    assert limiter.limit == 2
+
+
+def test_failures_within_cooldown_count_once():
+    limiter = _limiter(decrease_cooldown_seconds=60)
+    _call(limiter, overloaded=True)
+    _call(limiter, overloaded=True)
+    assert limiter.limit == 2
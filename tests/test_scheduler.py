@@ -0,0 +1,47 @@
+from datetime import timedelta
+import pytest
+from app.services import scheduler
+
+NOW = scheduler.utcnow()
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(scheduler.random, "uniform", lambda low, high: high)
+
+
+def _interval(status, end_date=None, changed_at=None, change_count=0) -> timedelta:
+    return scheduler.next_sync_at(status, end_date, changed_at, change_count, NOW) - NOW
+
+
+def test_stable_active_user_is_checked_less_often():
+    assert _interval("PAID") == timedelta(hours=12)
+
+
+def test_recent_status_change_is_checked_more_often():
+    assert _interval("PAID", changed_at=NOW - timedelta(days=1), change_count=1) == timedelta(hours=3)
+
+
+def test_flapping_user_gets_no_stable_backoff():
+    assert _interval("PAID", changed_at=NOW - timedelta(days=60), change_count=3) == timedelta(hours=6)
+
+
+def test_inactive_user_is_clamped_to_max_interval():
+    assert _interval(None) == timedelta(hours=48)
+
+
+def test_checked_just_after_end_date():
+    assert _interval("PAID", end_date=NOW + timedelta(hours=1)) == timedelta(hours=1, minutes=15)
+
+
+def test_lapsed_active_subscription_is_watched():
+    assert _interval("PAID", end_date=NOW - timedelta(hours=1)) == timedelta(minutes=30)
+
+
+def test_lapsed_watch_ends_after_watch_window():
+    assert _interval("PAID", end_date=NOW - timedelta(days=3)) == timedelta(hours=12)
+
+
+def test_naive_end_date_is_treated_as_utc():
+    naive = (NOW + timedelta(hours=1)).replace(tzinfo=None)
+    assert _interval("PAID", end_date=naive) == timedelta(hours=1, minutes=15)
@@ -0,0 +1,90 @@
+"""
+_flush_batch writes a batch in one go and, if that fails, row by row
+
+The writes themselves are faked: the tests cover how results are split,
+ordered, retried and reported, not the SQL.
+"""
+from contextlib import contextmanager
+from types import SimpleNamespace
+import pytest
+from app.services import scheduler, user_cache
+from app.services.sync_service import NO_SUBSCRIPTION_FINGERPRINT, SubscriptionSyncService
+
+FETCHED_AT = scheduler.utcnow()
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+    
+    @contextmanager
+    def begin_nested(self):
+        yield
+    
+    def commit(self):
+        self.commits += 1
+
+
+def _user(user_id: int, fingerprint: str = "stale") -> SimpleNamespace:
+    return SimpleNamespace(
+        id=user_id,
+        email=f"user-{user_id}@example.com",
+        subscription_status=None,
+        status_changed_at=None,
+        status_change_count=0,
+        subscription_fingerprint=fingerprint
+    )
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = SubscriptionSyncService()
+    service.writes, service.failing_ids = [], set()
+    
+    def write_batch(db, changed, unchanged):
+        ids = [user.id for user, _, _ in changed + unchanged]
+        service.writes.append(ids)
+        if service.failing_ids.intersection(ids):
+            raise RuntimeError("write failed")
+    
+    monkeypatch.setattr(service, "_write_batch", write_batch)
+    return service
+
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    emails = []
+    monkeypatch.setattr(user_cache, "invalidate_on_commit", lambda db, batch: emails.extend(batch))
+    return emails
+
+
+def test_batch_is_written_once_in_id_order(service, invalidated):
+    db = FakeSession()
+    users = [_user(3), _user(1, NO_SUBSCRIPTION_FINGERPRINT), _user(2)]
+    succeeded, failed = service._flush_batch(db, [(user, None, FETCHED_AT) for user in users])
+    
+    # Changed and unchanged rows go to separate statements, each in id order
+    assert service.writes == [[2, 3, 1]]
+    assert {(user.id, changed) for user, _, changed in succeeded} == {(1, False), (2, True), (3, True)}
+    assert failed == []
+    assert sorted(invalidated) == sorted(user.email for user in users)
+    assert db.commits == 1
+
+
+def test_failed_batch_is_retried_row_by_row(service, invalidated):
+    db = FakeSession()
+    service.failing_ids = {2}
+    users = [_user(3), _user(2), _user(1)]
+    succeeded, failed = service._flush_batch(db, [(user, None, FETCHED_AT) for user in users])
+    
+    assert service.writes == [[1, 2, 3], [1], [2], [3]]
+    assert [user.id for user, _, _ in succeeded] == [1, 3]
+    assert [user.id for user, _ in failed] == [2]
+    # Only rows that were written are evicted from the cache
+    assert invalidated == ["user-1@example.com", "user-3@example.com"]
+    assert db.commits == 1
+
+
+def test_empty_batch_writes_nothing(service):
+    assert service._flush_batch(FakeSession(), []) == ([], [])
+    assert service.writes == []
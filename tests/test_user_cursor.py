@@ -0,0 +1,28 @@
+import base64
+import pytest
+from fastapi import HTTPException
+from app.routers.users import _decode_cursor, _encode_cursor
+
+
+@pytest.mark.parametrize("last_id", [0, 1, 42, 2**40])
+def test_cursor_round_trip(last_id):
+    cursor = _encode_cursor(last_id)
+    assert "=" not in cursor
+    assert _decode_cursor(cursor) == last_id
+
+
+def _raw_cursor(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    _raw_cursor(b"not json"),
+    _raw_cursor(b'{"offset": 5}'),
+    _raw_cursor(b'{"id": "5"}'),
+    _raw_cursor(b"[5]"),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,18 @@
+from app.services.user_import import normalize_emails
+
+
+def test_normalize_emails_lowercases_domain_and_dedupes():
+    emails, invalid = normalize_emails([" Ann@Example.COM", "Bob@example.com", "Ann@example.com "])
+    assert emails == ["Ann@example.com", "Bob@example.com"]
+    assert invalid == []
+
+
+def test_normalize_emails_keeps_local_part_case():
+    emails, _ = normalize_emails(["ann@example.com", "ANN@example.com"])
+    assert emails == ["ann@example.com", "ANN@example.com"]
+
+
+def test_normalize_emails_reports_invalid():
+    emails, invalid = normalize_emails(["not-an-email", "a@b", "two@@example.com", "ok@example.com", ""])
+    assert emails == ["ok@example.com"]
+    assert invalid == ["not-an-email", "a@b", "two@@example.com", ""]
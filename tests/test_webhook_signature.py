@@ -0,0 +1,36 @@
+import pytest
+from app.config import settings
+from app.services.webhooks import WebhookSignatureError, sign, verify_signature
+
+SECRET = "s3cret"
+SIGNED_AT = 1_700_000_000
+BODY = b'[{"event_id": "evt_1"}]'
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr(settings, "beag_webhook_secret", SECRET)
+
+
+def test_valid_signature_passes():
+    verify_signature(BODY, str(SIGNED_AT), sign(SECRET, SIGNED_AT, BODY), now=SIGNED_AT + 10)
+
+
+@pytest.mark.parametrize("timestamp, signature", [
+    (None, sign(SECRET, SIGNED_AT, BODY)),
+    (str(SIGNED_AT), None),
+    ("yesterday", sign(SECRET, SIGNED_AT, BODY)),
+    (str(SIGNED_AT), sign("other", SIGNED_AT, BODY)),
+    (str(SIGNED_AT), sign(SECRET, SIGNED_AT, BODY + b" ")),
+    # The timestamp is signed, so it can't be swapped for a fresh one
+    (str(SIGNED_AT + 1), sign(SECRET, SIGNED_AT, BODY)),
+])
+def test_bad_signature_is_rejected(timestamp, signature):
+    with pytest.raises(WebhookSignatureError):
+        verify_signature(BODY, timestamp, signature, now=SIGNED_AT)
+
+
+def test_old_signature_is_rejected():
+    signature = sign(SECRET, SIGNED_AT, BODY)
+    with pytest.raises(WebhookSignatureError, match="window"):
+        verify_signature(BODY, str(SIGNED_AT), signature, now=SIGNED_AT + settings.beag_webhook_tolerance_seconds + 1)
@@ -1,44 +1,131 @@
+import argparse
 import asyncio
 import logging
-from datetime import datetime
-from app.services.sync_service import SubscriptionSyncService
+import multiprocessing
+import signal
+from app.logging_config import setup_logging
+from app.metrics import MULTIPROCESS_DIR, event_loop_lag_monitor, mark_process_dead, start_metrics_server
+from app.services.coordination import run_scheduled_sweep, sweep_leader
+from app.services.heartbeat import HeartbeatReporter
+from app.services.sync_queue import SyncQueueConsumer
+from app.services.http_client import start_http_client, close_http_client
+from app.services.scheduler import worker_interval_seconds, describe_worker_interval
 from app.config import settings
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queued, written off the event loop)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
-async def sync_subscriptions():
-    """Sync all user subscriptions with Beag API"""
-    sync_service = SubscriptionSyncService()
-    result = await sync_service.sync_all_users()
-    return result
-
-
 async def run_worker():
-    """Run the sync worker every SYNC_INTERVAL_HOURS"""
-    logger.info(f"Starting subscription sync worker (interval: {settings.sync_interval_hours} hours)")
+    """
+    Run the sync worker every SYNC_POLL_MINUTES (or SYNC_INTERVAL_HOURS if adaptive sync is off)
     
-    while True:
-        logger.info(f"Starting subscription sync at {datetime.now()}")
-        
-        try:
-            result = await sync_subscriptions()
-            logger.info(f"Subscription sync completed: {result}")
-        except Exception as e:
-            logger.error(f"Error during sync: {str(e)}")
-        
-        # Wait for next sync interval
-        sleep_seconds = settings.sync_interval_hours * 3600
-        logger.info(f"Next sync in {settings.sync_interval_hours} hours")
-        await asyncio.sleep(sleep_seconds)
+    The worker competes with the web processes for the sweep leader lock; passes
+    only sync while this process holds it
+    """
+    logger.info(f"Starting subscription sync worker ({describe_worker_interval()})")
+    await start_http_client()
+    sweep_leader.start()
+    event_loop_lag_monitor.start()
+    heartbeat = HeartbeatReporter("worker")
+    heartbeat.start()
+    
+    try:
+        while True:
+            try:
+                result = await run_scheduled_sweep()
+                heartbeat.record_pass(result.get("status"))
+                if result.get("status") != "SKIPPED":
+                    logger.info(f"Subscription sync completed: {result}")
+            except Exception as e:
+                logger.error(f"Error during sync: {str(e)}")
+                heartbeat.record_pass("ERROR")
+            
+            # Wait for next sync pass
+            await asyncio.sleep(worker_interval_seconds())
+    finally:
+        await heartbeat.stop()
+        await event_loop_lag_monitor.stop()
+        await sweep_leader.stop()
+        await close_http_client()
+        mark_process_dead()
+
+
+async def run_consumer():
+    """Consume sync jobs from the Postgres queue until stopped"""
+    await start_http_client()
+    event_loop_lag_monitor.start()
+    heartbeat = HeartbeatReporter("consumer")
+    heartbeat.start()
+    try:
+        await SyncQueueConsumer().run()
+    finally:
+        await heartbeat.stop()
+        await event_loop_lag_monitor.stop()
+        await close_http_client()
+        mark_process_dead()
+
+
+def consumer_process(index: int):
+    # Entry point of each consumer process (spawned: logging is set up again on import)
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    # In multiprocess mode the worker's own port already reports every consumer
+    if settings.worker_metrics_port and not MULTIPROCESS_DIR:
+        start_metrics_server(settings.worker_metrics_port + 1 + index)
+    try:
+        asyncio.run(run_consumer())
+    except (KeyboardInterrupt, SystemExit):
+        pass
+
+
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(0)
+
+
+def start_consumers(count: int) -> list:
+    # spawn: each consumer builds its own engine, pool and HTTP client
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for index in range(count):
+        process = context.Process(target=consumer_process, args=(index,), name=f"sync-consumer-{index}", daemon=True)
+        process.start()
+        processes.append(process)
+    logger.info(f"Started {count} sync queue consumer processes")
+    return processes
+
+
+def stop_consumers(processes: list) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout=30)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Subscription sync worker")
+    parser.add_argument(
+        "--consumers",
+        type=int,
+        default=None,
+        help="Sync queue consumer processes to run when SYNC_QUEUE_ENABLED is set (default: SYNC_QUEUE_CONSUMERS)"
+    )
+    args = parser.parse_args()
+    
+    if settings.worker_metrics_port:
+        start_metrics_server(settings.worker_metrics_port)
+    
+    consumers = []
+    if settings.sync_queue_enabled:
+        consumers = start_consumers(settings.sync_queue_consumers if args.consumers is None else args.consumers)
+    
     # Run initial sync immediately, then continue with scheduled syncs
+    # (with the job queue enabled, the scheduled passes only queue the work)
     logger.info("Starting worker...")
-    asyncio.run(run_worker())
\ No newline at end of file
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    try:
+        asyncio.run(run_worker())
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("Worker stopped")
+    finally:
+        stop_consumers(consumers)
\ No newline at end of file